@@ -0,0 +1,51 @@
+"""
+Benchmarks calls of curried closures, one argument at a time against
+saturated calls that bind all arguments at once.
+
+Run with: python benchmarks/bench_calls.py
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from evaluator import apply_function, call_function, evaluate_node  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+from values import IntegerValue  # noqa: E402
+
+ARGUMENTS = [IntegerValue(1), IntegerValue(2), IntegerValue(3), IntegerValue(4)]
+
+
+def one_at_a_time(function):
+    for argument in ARGUMENTS:
+        function = apply_function(function, argument)
+    return function
+
+
+def allocations(call) -> int:
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run() -> None:
+    function = evaluate_node(
+        Parser(extract_tokens(["a -> b -> c -> d -> a + b + c + d"])).parse_program()
+        .declarations[0].expression)
+
+    for name, call in [("curried", lambda: one_at_a_time(function)),
+                       ("saturated", lambda: call_function(function, ARGUMENTS))]:
+        timer = timeit.Timer(call)
+        loops, _ = timer.autorange()
+        best = min(timer.repeat(repeat=5, number=loops)) / loops
+        print(f"{name:<12} {best * 1e6:>8.2f} us/call {allocations(call):>8} bytes peak")
+
+
+if __name__ == "__main__":
+    run()
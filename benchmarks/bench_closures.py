@@ -0,0 +1,39 @@
+"""
+Measures the memory kept alive by closures created inside function calls.
+
+Each call binds a large list that the returned closure doesn't use. When
+closures capture the whole scope, every closure keeps its list alive.
+
+Run with: python benchmarks/bench_closures.py [closures]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from evaluator import call_function, evaluate_node  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+from values import IntegerValue, ListValue  # noqa: E402
+
+
+def run(count: int) -> None:
+    make = evaluate_node(
+        Parser(extract_tokens(["data -> n -> (x -> x + n)"])).parse_program()
+        .declarations[0].expression)
+
+    tracemalloc.start()
+    closures = []
+    for n in range(count):
+        data = ListValue.from_iterable([IntegerValue(n)] * 1000)
+        closures.append(call_function(make, [data, IntegerValue(n)]))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{count} closures retain {retained / 1024:.0f} KiB ({retained / count:.0f} bytes each)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,43 @@
+"""
+Benchmarks handling requests with a script, by compiling the script for
+every request against compiling it once and running it with the input of
+each request bound.
+
+Run with: python benchmarks/bench_embedding.py [requests]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import embedding  # noqa: E402
+
+SCRIPT = """
+{ total = list/fold add 0 (list/map price order.items), count = list/length order.items }
+; add = a -> b -> a + b
+; price = item -> item.quantity * (discount item.sku + item.unit)
+; discount = | "A" -> 0 - 1 | "B" -> 0 - 2 | _ -> 0
+"""
+
+
+def order(n: int):
+    return {"items": [{"sku": "AB"[k % 2], "quantity": k + n % 3, "unit": 10 + k} for k in range(5)]}
+
+
+def run(requests: int) -> None:
+    started = time.perf_counter()
+    for n in range(requests):
+        embedding.CompiledProgram(embedding.compile_source(SCRIPT), "").run(bindings={"order": order(n)})
+    print(f"{'reparsed':<10} {(time.perf_counter() - started) / requests * 1e6:>8.1f} us per request")
+
+    started = time.perf_counter()
+    for n in range(requests):
+        embedding.compile(SCRIPT).run(bindings={"order": order(n)})
+    print(f"{'compiled':<10} {(time.perf_counter() - started) / requests * 1e6:>8.1f} us per request")
+    print(f"  cache hits, misses, programs: {embedding.cache_info()}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000)
@@ -0,0 +1,53 @@
+"""
+Benchmarks the memory taken by a repetitive generated config with and
+without shared AST nodes, and the time taken by a program that repeats
+calls with and without common-subexpression elimination.
+
+Run with: python benchmarks/bench_hash_consing.py [entries]
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from evaluator import evaluate_program  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from optimiser import eliminate_common_subexpressions  # noqa: E402
+from parser import Parser  # noqa: E402
+
+
+def parse(source: str, share_nodes: bool = True):
+    return Parser(extract_tokens(source.splitlines()), share_nodes=share_nodes).parse_program()
+
+
+def config(entries: int) -> str:
+    defaults = '{ retries = 3, timeout = 2.5, tags = ["a", "b", "c"], backoff = x -> x * 2 }'
+    records = ", ".join(f'{{ name = "host{n % 10}", port = 8080, options = {defaults} }}'
+                        for n in range(entries))
+    return f"[{records}]"
+
+
+def run(entries: int) -> None:
+    source = config(entries)
+    for share_nodes in (False, True):
+        tracemalloc.start()
+        program = parse(source, share_nodes)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{'shared' if share_nodes else 'unshared':<10} {size / 1024:>8.0f} KiB for {entries} entries")
+        del program
+
+    source = ("list/fold step 0 (list/range 0 2000)"
+              " ; step = acc -> x -> acc + cost x * cost x + cost x"
+              " ; cost = x -> list/fold (a -> b -> a + b) 0 (list/range 0 30)")
+    for name, optimise in [("plain", lambda program: program), ("cse", eliminate_common_subexpressions)]:
+        program = optimise(parse(source))
+        seconds = min(timeit.repeat(lambda: evaluate_program(program), number=1, repeat=3))
+        print(f"{name:<10} {seconds * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000)
@@ -0,0 +1,51 @@
+"""
+Benchmarks numeric code with and without the arithmetic specialised by
+type inference, and how the time of inference grows with the program.
+
+Run with: python benchmarks/bench_inference.py [elements]
+"""
+
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from evaluator import evaluate_program  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+from type_inference import infer_types, specialise  # noqa: E402
+
+
+def parse(source: str):
+    return Parser(extract_tokens(source.splitlines())).parse_program()
+
+
+def run(count: int) -> None:
+    source = (f"list/fold step 0 (list/range 0 {count})"
+              " ; step = acc -> x -> acc + x * x - x / 2 + square (x - 1)"
+              " ; square = x -> x * x")
+
+    checked = parse(source)
+    specialised = parse(source)
+    assert specialise(specialised) is not None
+
+    for name, program in [("checked", checked), ("specialised", specialised)]:
+        seconds = min(timeit.repeat(lambda: evaluate_program(program), number=1, repeat=5))
+        print(f"{name:<12} {seconds * 1e3:>8.1f} ms for {count} elements")
+
+    # A chain of definitions, each using the one before it
+    for definitions in (100, 1000, 10000):
+        source = "f0 1\n" + "\n".join(
+            f"; f{n} = x -> f{n + 1} (x + {n})" for n in range(definitions)) \
+            + f"\n; f{definitions} = x -> x * 2"
+        program = parse(source)
+        start = time.perf_counter()
+        infer_types(program)
+        seconds = time.perf_counter() - start
+        print(f"inference of {definitions:>5} definitions: {seconds * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,43 @@
+"""
+Measures the time and memory of evaluating a literal-heavy expression
+many times, keeping every result alive.
+
+Literals evaluate to a value stored on their node, and small integers
+and short texts are shared, so repeated evaluations only allocate the
+lists holding them.
+
+Run with: python benchmarks/bench_literals.py [evaluations]
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from evaluator import evaluate_node  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+
+# Mixed types, so the elements are stored boxed
+SOURCE = "[" + ", ".join(f'{n}, "item {n % 10}", {n}.5' for n in range(100)) + "]"
+
+
+def run(count: int) -> None:
+    expression = Parser(extract_tokens([SOURCE])).parse_expression()
+
+    seconds = timeit.timeit(lambda: evaluate_node(expression), number=count)
+
+    tracemalloc.start()
+    results = [evaluate_node(expression) for _ in range(count)]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_evaluation = retained / len(results)
+    print(f"{count} evaluations of 300 literals: {seconds / count * 1e6:.0f} us and "
+          f"{per_evaluation / 1024:.1f} KiB retained each")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,68 @@
+"""
+Measures the memory used per AST node and per runtime value.
+
+Run with: python benchmarks/bench_memory.py [count]
+"""
+
+import os
+import sys
+import tracemalloc
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+from scrapscript_ast import ASTNode  # noqa: E402
+from values import (EMPTY_SHAPE, FloatValue, IntegerValue, RecordValue,  # noqa: E402
+                    TextValue, VariantValue, HoleValue)
+
+
+def allocated(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def count_nodes(root: object) -> int:
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ASTNode):
+            count += 1
+            stack.extend(getattr(node, name) for name in node.__dataclass_fields__)
+        elif isinstance(node, list):
+            stack.extend(node)
+
+    return count
+
+
+def run(count: int) -> None:
+    shape = EMPTY_SHAPE.with_field("a")
+
+    # Each list holds `count` distinct values, the list itself is subtracted
+    values: List[tuple] = [
+        ("IntegerValue", lambda n: IntegerValue(n + 100_000)),
+        ("FloatValue", lambda n: FloatValue(n + 0.5)),
+        ("TextValue", lambda n: TextValue("x")),
+        ("RecordValue", lambda n: RecordValue(shape=shape, slots=[HoleValue()])),
+        ("VariantValue", lambda n: VariantValue(tag="a", payload=HoleValue())),
+    ]
+    empty = allocated(lambda: [None for _ in range(count)])
+    for name, make in values:
+        size = allocated(lambda: [make(n) for n in range(count)]) - empty
+        print(f"{name:<16} {size / count:>8.1f} bytes/value")
+
+    source = ["[" + ", ".join(f"x{n} * {n} + 1.5" for n in range(count // 10)) + "]"]
+    tokens = extract_tokens(source)
+    nodes = count_nodes(Parser(list(tokens)).parse_expression())
+    size = allocated(lambda: Parser(list(tokens)).parse_expression())
+    print(f"{'AST':<16} {size / nodes:>8.1f} bytes/node ({nodes} nodes)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
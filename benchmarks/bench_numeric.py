@@ -0,0 +1,44 @@
+"""
+Benchmarks numeric lists against lists of boxed numbers.
+
+Run with: python benchmarks/bench_numeric.py [size]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numeric_array  # noqa: E402
+from evaluator import evaluate_node  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+from prelude import BUILTINS  # noqa: E402
+from values import FloatValue, ListValue, make_list  # noqa: E402
+
+
+def measure(name: str, function) -> None:
+    start = time.perf_counter()
+    function()
+    print(f"{name:<28} {(time.perf_counter() - start) * 1e3:>10.1f} ms")
+
+
+def run(size: int) -> None:
+    print(f"{size} floats, backend: {'numpy' if numeric_array.numpy else 'array'}")
+
+    floats = [FloatValue(n * 0.5) for n in range(size)]
+    boxed = ListValue.from_iterable(floats)
+    numeric = make_list(floats)
+    double = evaluate_node(
+        Parser(extract_tokens(["x -> x * 2.0 + 1.0"])).parse_program().declarations[0].expression)
+
+    measure("list/sum boxed", lambda: BUILTINS["list/sum"].function(boxed))
+    measure("list/sum numeric", lambda: BUILTINS["list/sum"].function(numeric))
+    measure("list/map boxed", lambda: list(BUILTINS["list/map"].function(double, boxed)))
+    measure("list/map numeric", lambda: BUILTINS["list/map"].function(double, numeric))
+    measure("list/sort numeric", lambda: BUILTINS["list/sort"].function(numeric))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,88 @@
+"""
+Micro-benchmarks for the builtins in the prelude.
+
+Every builtin has a benchmark case here, calling it directly with
+saturated arguments so only the native implementation is measured.
+Streams returned by the builtins are consumed as part of the call.
+
+Run with: python benchmarks/bench_prelude.py [name ...]
+"""
+
+import os
+import sys
+import timeit
+from typing import Dict, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from prelude import BUILTINS  # noqa: E402
+from values import FALSE, TRUE, BuiltinFunction, BytesValue, FloatValue, IntegerValue, ListValue, StreamValue, TextValue, Value, make_list  # noqa: E402
+
+_words = ListValue.from_iterable(TextValue(f"word{n}") for n in range(1000))
+_numbers = ListValue.from_iterable(IntegerValue(n) for n in range(1000))
+_floats = make_list([FloatValue(n * 0.5) for n in range(1000, 0, -1)])
+_blobs = ListValue.from_iterable(BytesValue(bytes(64)) for _ in range(1000))
+_increment = BuiltinFunction(
+    name="increment", arity=1, function=lambda x: IntegerValue(x.value + 1))
+_is_even = BuiltinFunction(
+    name="is_even", arity=1, function=lambda x: TRUE if x.value % 2 == 0 else FALSE)
+_add = BuiltinFunction(
+    name="add", arity=2, function=lambda x, y: IntegerValue(x.value + y.value))
+
+CASES: Dict[str, Tuple[Value, ...]] = {
+    "text/length": (TextValue("a" * 1000),),
+    "text/repeat": (IntegerValue(1000), TextValue("ab")),
+    "text/join": (TextValue(", "), _words),
+    "string/join": (TextValue(", "), _words),
+    "text/concat": (_words,),
+    "text/split": (TextValue(","), TextValue(",".join(["word"] * 1000))),
+    "text/upper": (TextValue("hello world " * 100),),
+    "text/lower": (TextValue("HELLO WORLD " * 100),),
+    "list/length": (_numbers,),
+    "list/range": (IntegerValue(0), IntegerValue(1000)),
+    "list/repeat": (IntegerValue(1000), IntegerValue(1)),
+    "list/take": (IntegerValue(10), _numbers),
+    "list/get": (IntegerValue(500), _numbers),
+    "list/reverse": (_numbers,),
+    "list/concat": (ListValue.from_iterable([_numbers, _numbers]),),
+    "list/map": (_increment, _numbers),
+    "list/filter": (_is_even, _numbers),
+    "list/fold": (_add, IntegerValue(0), _numbers),
+    "list/sum": (_floats,),
+    "list/sort": (_floats,),
+    "bytes/length": (BytesValue(bytes(1000)),),
+    "bytes/slice": (IntegerValue(10), IntegerValue(900), BytesValue(bytes(1000))),
+    "bytes/join": (_blobs,),
+    "bytes/from_text": (TextValue("hello world " * 100),),
+    "bytes/to_text": (BytesValue(b"hello world " * 100),),
+    "int/abs": (IntegerValue(-5),),
+    "int/min": (IntegerValue(5), IntegerValue(3)),
+    "int/max": (IntegerValue(5), IntegerValue(3)),
+    "int/to_float": (IntegerValue(5),),
+    "int/to_text": (IntegerValue(12345),),
+    "float/abs": (FloatValue(-1.5),),
+    "float/to_int": (FloatValue(1.5),),
+}
+
+
+def run(names) -> None:
+    for name in names:
+        builtin = BUILTINS[name]
+        arguments = CASES[name]
+
+        def call():
+            result = builtin.function(*arguments)
+            # Lazy results have to be consumed to measure the actual work
+            if isinstance(result, StreamValue):
+                for _ in result:
+                    pass
+
+        timer = timeit.Timer(call)
+        loops, _ = timer.autorange()
+        best = min(timer.repeat(repeat=5, number=loops)) / loops
+
+        print(f"{name:<20} {best * 1e6:>10.2f} us/call")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:] or sorted(BUILTINS))
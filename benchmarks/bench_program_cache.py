@@ -0,0 +1,41 @@
+"""
+Benchmarks compiling a long script from source against loading it from
+the program cache.
+
+Run with: python benchmarks/bench_program_cache.py [lines]
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+from program_cache import ProgramCache  # noqa: E402
+
+
+def source(lines: int) -> str:
+    # One binding per line, each using the one below it
+    bindings = [f"v{n} = {{ name = \"entry {n}\", value = v{n + 1}.value + {n} }}" for n in range(lines - 1)]
+    return "\n; ".join(["v0.value", *bindings, f"v{lines - 1} = {{ name = \"last\", value = 0 }}"])
+
+
+def run(lines: int) -> None:
+    text = source(lines)
+    parse = lambda: Parser(extract_tokens(text.splitlines())).parse_program()  # noqa: E731
+    seconds = min(timeit.repeat(parse, number=1, repeat=3))
+    print(f"{'parse':<6} {seconds * 1e3:>8.1f} ms for {lines} lines")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ProgramCache(directory)
+        cache.store(text, 0, parse())
+        size = sum(entry[1] for entry in cache.entries())
+        seconds = min(timeit.repeat(lambda: cache.load(text), number=1, repeat=3))
+        print(f"{'cached':<6} {seconds * 1e3:>8.1f} ms, {size / 1024:.0f} KiB on disk")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
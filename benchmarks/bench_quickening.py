@@ -0,0 +1,40 @@
+"""
+Benchmarks numeric code with and without quickened operations and name
+lookups, and prints how often their guards hit.
+
+Run with: python benchmarks/bench_quickening.py [elements]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import quickening  # noqa: E402
+from evaluator import evaluate_program  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+
+
+def parse(source: str):
+    return Parser(extract_tokens(source.splitlines())).parse_program()
+
+
+def run(count: int) -> None:
+    source = (f"list/fold step 0 (list/range 0 {count})"
+              " ; step = acc -> x -> acc + x * x - x / 2 + square (x - 1)"
+              " ; square = x -> x * x")
+
+    for name, limit in [("generic", 0), ("quickened", quickening.ADAPTIVE_LIMIT)]:
+        quickening.ADAPTIVE_LIMIT = limit
+        # A fresh tree, so nothing is specialised from the previous run
+        program = parse(source)
+        quickening.METRICS.reset()
+        seconds = min(timeit.repeat(lambda: evaluate_program(program), number=1, repeat=5))
+        print(f"{name:<10} {seconds * 1e3:>8.1f} ms for {count} elements")
+        print(f"  {quickening.METRICS.summary()}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
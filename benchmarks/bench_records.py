@@ -0,0 +1,63 @@
+"""
+Benchmarks lists of records stored row by row against columnar storage.
+
+Run with: python benchmarks/bench_records.py [rows]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from evaluator import evaluate_node  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+from prelude import BUILTINS  # noqa: E402
+from values import EMPTY_SHAPE, IntegerValue, ListValue, RecordValue, TextValue, make_list  # noqa: E402
+
+
+def function(source: str):
+    return evaluate_node(Parser(extract_tokens([source])).parse_program().declarations[0].expression)
+
+
+def allocated(build) -> float:
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def measure(name: str, call) -> None:
+    start = time.perf_counter()
+    call()
+    print(f"{name:<28} {(time.perf_counter() - start) * 1e3:>10.1f} ms")
+
+
+def run(count: int) -> None:
+    shape = EMPTY_SHAPE.with_field("a").with_field("b")
+
+    def rows():
+        return [RecordValue(shape=shape, slots=[IntegerValue(n), TextValue("x" if n % 2 else "y")])
+                for n in range(count)]
+
+    for name, build in [("rows", lambda: ListValue.from_iterable(rows())),
+                        ("columns", lambda: make_list(rows()))]:
+        print(f"{name:<28} {allocated(build) / count:>10.1f} bytes/row")
+
+    boxed = ListValue.from_iterable(rows())
+    columnar = make_list(rows())
+    project = function("r -> r.a")
+    keep = function('r -> r.b == "x"')
+
+    measure("project rows", lambda: list(BUILTINS["list/map"].function(project, boxed)))
+    measure("project columns", lambda: BUILTINS["list/map"].function(project, columnar))
+    measure("filter rows", lambda: list(BUILTINS["list/filter"].function(keep, boxed)))
+    measure("filter columns", lambda: BUILTINS["list/filter"].function(keep, columnar))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,45 @@
+"""
+Benchmarks running a program with an expensive top-level binding without
+the result cache, and with it (on the first run, which stores the value,
+and on later runs, which load it).
+
+Run with: python benchmarks/bench_result_cache.py [depth]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from evaluator import evaluate_program  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+
+
+def parse(source: str):
+    return Parser(extract_tokens(source.splitlines())).parse_program()
+
+
+def timed(name: str, run) -> None:
+    started = time.perf_counter()
+    run()
+    print(f"{name:<12} {(time.perf_counter() - started) * 1e3:>8.1f} ms")
+
+
+def run(depth: int) -> None:
+    source = (f"table |> list/length ; table = list/fold (acc -> n -> acc +< slow n) [] (list/range 0 {depth})"
+              " ; slow = | 0 -> 1 | n -> slow (n - 1) + slow (n - 1)")
+
+    timed("uncached", lambda: evaluate_program(parse(source)))
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(directory)
+        timed("first run", lambda: evaluate_program(parse(source), results=cache))
+        timed("cached", lambda: evaluate_program(parse(source), results=cache))
+        print(f"  {cache.summary()}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 18)
@@ -0,0 +1,52 @@
+"""
+Benchmarks a program using hundreds of definitions, written out in the
+program against imported by hash from the scrapyard.
+
+Run with: python benchmarks/bench_scrapyard.py [definitions]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import scrapyard  # noqa: E402
+from evaluator import evaluate_program  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+
+
+def parse(source: str):
+    return Parser(extract_tokens(source.splitlines())).parse_program()
+
+
+def definition(n: int) -> str:
+    clauses = " ".join(f'| {k} -> {{ id = {k}, name = "case {k}", weight = {k}.5 }}' for k in range(20))
+    return f"{clauses} | x -> {{ id = x + {n}, name = \"other\", weight = 0.0 }}"
+
+
+def timed(name: str, run) -> None:
+    started = time.perf_counter()
+    run()
+    print(f"{name:<10} {(time.perf_counter() - started) * 1e3:>8.1f} ms")
+
+
+def run(count: int) -> None:
+    uses = ", ".join(f"(d{n} {n % 25}).id" for n in range(count))
+    inline = f"[{uses}]" + "".join(f" ; d{n} = {definition(n)}" for n in range(count))
+    timed("inline", lambda: evaluate_program(parse(inline)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        digests = [scrapyard.Scrapyard(directory).save(definition(n)) for n in range(count)]
+        imported = "[" + ", ".join(f"($sha256'{digest} {n % 25}).id" for n, digest in enumerate(digests)) + "]"
+
+        # A fresh process: nothing has been loaded yet
+        scrapyard.use(directory)
+        timed("imported", lambda: evaluate_program(parse(imported)))
+        scrapyard.use(None)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
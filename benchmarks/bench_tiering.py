@@ -0,0 +1,41 @@
+"""
+Benchmarks a program with a few hot functions on the tree-walker alone,
+and with hot functions compiled to Python.
+
+Run with: python benchmarks/bench_tiering.py [elements]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tiering  # noqa: E402
+from evaluator import evaluate_program  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+
+
+def parse(source: str):
+    return Parser(extract_tokens(source.splitlines())).parse_program()
+
+
+def run(count: int) -> None:
+    source = (f"list/fold step 0 (list/range 0 {count})"
+              " ; step = acc -> x -> acc + x * x - x / 2 + square (x - 1) + bits x"
+              " ; square = x -> x * x"
+              " ; bits = | 0 -> 0 | n -> 1 + bits (n / 2)")
+
+    for name, threshold in [("interpreted", None), ("tiered", tiering.COMPILE_THRESHOLD)]:
+        tiering.COMPILE_THRESHOLD = threshold
+        # A fresh tree, so nothing is compiled from the previous run
+        program = parse(source)
+        seconds = min(timeit.repeat(lambda: evaluate_program(program), number=1, repeat=5))
+        print(f"{name:<12} {seconds * 1e3:>8.1f} ms for {count} elements")
+
+    print(tiering.describe_tiers(program))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,56 @@
+"""
+Benchmarks pattern matching on a large sum type.
+
+Variants of a defined type carry their index, so matching jumps straight
+to the clauses for that variant. Untyped atoms are compared
+against the clauses one by one, which is what every match used to do.
+
+Run with: python benchmarks/bench_variants.py [variants]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from evaluator import apply_function, evaluate_program  # noqa: E402
+from lexer import extract_tokens  # noqa: E402
+from parser import Parser  # noqa: E402
+from prelude import prelude_scope  # noqa: E402
+from scope import Scope  # noqa: E402
+from values import atom  # noqa: E402
+
+
+def tag_name(number: int) -> str:
+    # Tags can't contain digits
+    letters = ""
+    while True:
+        number, letter = divmod(number, 26)
+        letters += chr(ord("a") + letter)
+        if number == 0:
+            return letters
+
+
+def run(count: int) -> None:
+    tags = [tag_name(n) for n in range(count)]
+    source = [
+        "1",
+        "; f = " + " ".join(f"| #{tag} -> {n}" for n, tag in enumerate(tags)),
+        "; t : " + " ".join(f"#{tag}" for tag in tags),
+    ]
+    scope = Scope(parent=prelude_scope())
+    evaluate_program(Parser(extract_tokens(source)).parse_program(), scope=scope)
+
+    function = scope.get("f")
+    variant_type = scope.get("t")
+    last = variant_type.construct(variant_type.index(tags[-1]), [])
+
+    number = 10_000
+    for name, argument in [("t::" + tags[-1], last), ("#" + tags[-1], atom(tags[-1]))]:
+        seconds = timeit.timeit(lambda: apply_function(function, argument), number=number)
+        print(f"match {name:<10} against {count} clauses: {seconds / number * 1e6:>7.2f} us")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
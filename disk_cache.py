@@ -0,0 +1,159 @@
+"""
+This module implements the storage shared by the on-disk caches: one file
+per entry in a cache directory, named by a key (a hex digest), written
+atomically and evicted least recently used first.
+
+Entries are written to a temporary file and renamed into place, so a
+crashed or concurrent run never sees half an entry. Reading an entry
+touches it, and once the entries of a cache grow past its size limit, the
+ones that were used longest ago are removed.
+
+The caches are best effort: an entry that can't be read is a miss, and an
+entry that can't be written is only logged.
+"""
+
+from __future__ import annotations
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+from typing import Iterable, List, Optional, Tuple
+
+# The default limit of the size of a cache, in bytes
+MAX_CACHE_SIZE = 64 * 1024 * 1024
+
+
+def hash_modules(modules: Iterable[str]) -> str:
+    """A hash of the source of some interpreter modules, and of the Python version."""
+    digest = hashlib.sha256(sys.implementation.cache_tag.encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for module in modules:
+        with open(os.path.join(directory, module), "rb") as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+def default_cache_directory() -> str:
+    """$SCRAPPY_CACHE_DIR, or scrappy in the user's cache directory."""
+    directory = os.environ.get("SCRAPPY_CACHE_DIR")
+    if directory:
+        return directory
+
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "scrappy")
+
+
+class DiskCache():
+    """The entries of one kind of cache, the files with its suffix in a directory."""
+    __slots__ = ("directory", "max_size", "hits", "misses", "bytes_read", "bytes_written")
+
+    # The file name suffix of the entries
+    suffix = ".cache"
+
+    directory: str
+    max_size: int
+    hits: int
+    misses: int
+    bytes_read: int
+    bytes_written: int
+
+    def __init__(self, directory: str, max_size: int = MAX_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.reset()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def read(self, key: str) -> Optional[bytes]:
+        """The data of an entry, or None if there is none. Doesn't count as a hit or miss."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        # Marks the entry as recently used, so it's evicted last
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.bytes_read += len(data)
+        return data
+
+    def write(self, key: str, data: bytes) -> None:
+        """Writes an entry atomically, and evicts old entries if the cache is full."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    file.write(data)
+                os.replace(temporary, self.path(key))
+            except BaseException:
+                os.unlink(temporary)
+                raise
+        except OSError as e:
+            logging.debug("Couldn't write to the cache in %s: %s", self.directory, e)
+            return
+
+        self.bytes_written += len(data)
+        self.evict()
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """The (last use, size, path) of every entry, least recently used first."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith(self.suffix):
+                        try:
+                            status = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((status.st_mtime, status.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+
+        entries.sort()
+        return entries
+
+    def size(self) -> int:
+        """The size of all entries, in bytes."""
+        return sum(entry[1] for entry in self.entries())
+
+    def evict(self, max_size: Optional[int] = None) -> int:
+        """
+        Removes the least recently used entries until the cache fits in
+        `max_size` (by default its own limit), and returns how many.
+        """
+        if max_size is None:
+            max_size = self.max_size
+
+        entries = self.entries()
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            size -= entry_size
+            removed += 1
+
+        return removed
+
+    def clear(self) -> None:
+        self.evict(0)
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
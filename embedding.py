@@ -0,0 +1,197 @@
+"""
+This module is the API for running scrapscript from Python: a program is
+compiled once, and can then be run any number of times, with different
+values bound to the names it leaves free.
+
+    program = compile('greeting ++ name ; greeting = "hi "')
+    program.run(bindings={"name": "ron"})    # TextValue("hi ron")
+    program.run(bindings={"name": "cowboy"})
+
+Compiling (lexing, parsing and optimising) a source that was compiled
+before returns the same CompiledProgram, from an LRU of the last
+CACHE_SIZE programs keyed by the hash of their source, so running the
+same script for every request of a service only pays for evaluating it.
+
+Every error is raised as a ScrapError: ScrapParseError for a source that
+can't be compiled, and ScrapEvalError (or another subclass) for a program
+that fails while running. Lists are lazy inside the interpreter, so the
+result of a run is computed fully before it's returned, and the errors
+of computing it are raised by run() too.
+
+Programs can be compiled and run from several threads. The caches on
+a program's tree are each set in one store (e.g. a field access caches
+the shape and the slot as one tuple), so a thread sees a whole cache
+entry or none of it, never half of another thread's.
+"""
+
+from __future__ import annotations
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Mapping, Optional, Tuple
+
+from evaluator import evaluate_program
+from exceptions import ScrapError, ScrapEvalError, ScrapParseError
+from lexer import InvalidTokenException, extract_tokens
+from optimiser import PassManager
+from parser import Parser
+from scope import Scope
+from scrapscript_ast import Program
+from values import (EMPTY_SHAPE, HOLE, BytesValue, FloatValue, ListValue, RecordListValue, RecordValue,
+                    StreamValue, TaggedVariantValue, TextValue, Value, VariantValue, integer, make_list,
+                    to_boolean)
+
+# How many compiled programs are kept
+CACHE_SIZE = 128
+
+_compiled: OrderedDict[str, CompiledProgram] = OrderedDict()
+_hits = 0
+_misses = 0
+# Guards the cache and its counters
+_lock = threading.Lock()
+
+
+def to_value(value: Any) -> Value:
+    """
+    The scrapscript value of a Python value: numbers, text, bytes, None
+    (the hole), booleans (#true and #false), lists and tuples (lists), and
+    dicts with text keys (records). Values are passed through as they are.
+    """
+    match value:
+        case Value():
+            return value
+        case None:
+            return HOLE
+        case bool():
+            return to_boolean(value)
+        case int():
+            return integer(value)
+        case float():
+            return FloatValue(value)
+        case str():
+            return TextValue(value)
+        case bytes() | bytearray():
+            return BytesValue(bytes(value))
+        case list() | tuple():
+            return make_list([to_value(element) for element in value])
+        case dict() if all(isinstance(name, str) for name in value):
+            shape = EMPTY_SHAPE
+            for name in value:
+                shape = shape.with_field(name)
+            return RecordValue(shape=shape, slots=[to_value(element) for element in value.values()])
+
+    raise ScrapEvalError(f"Can't turn a Python {type(value).__name__} into a scrapscript value")
+
+
+def _compute(value: Value) -> None:
+    """Computes the elements of every stream in a value, which are stored once computed."""
+    pending = [value]
+    while pending:
+        value = pending.pop()
+        match value:
+            case StreamValue():
+                pending.append(value.materialize())
+            case ListValue():
+                pending.extend(value)
+            case RecordListValue():
+                pending.extend(value.columns)
+            case RecordValue():
+                pending.extend(value.slots)
+            case VariantValue() | TaggedVariantValue():
+                pending.append(value.payload)
+
+
+class CompiledProgram():
+    __slots__ = ("program", "digest")
+
+    program: Program
+    # The hash of the source and optimisation level it was compiled from
+    digest: str
+
+    def __init__(self, program: Program, digest: str):
+        self.program = program
+        self.digest = digest
+
+    def run(self, bindings: Optional[Mapping[str, Any]] = None) -> Value:
+        """
+        Runs the program, with the `bindings` in scope (as values, or as
+        Python values, see to_value). Definitions of the program hide
+        bindings of the same name, and bindings hide builtins.
+        """
+        from prelude import prelude_scope
+
+        # Bound in the program's global scope and not in a parent of it,
+        # as that's where closures look up global names (see evaluator.capture)
+        scope = Scope(parent=prelude_scope())
+        for name, value in (bindings or {}).items():
+            scope.put(name, to_value(value))
+
+        try:
+            result = evaluate_program(self.program, scope)
+            _compute(result)
+            return result
+        except ScrapError:
+            raise
+        except RecursionError:
+            raise ScrapEvalError("Maximum recursion depth exceeded")
+        except ArithmeticError as e:
+            raise ScrapEvalError(str(e)) from e
+
+    def __repr__(self):
+        return f"CompiledProgram({self.digest[:12]})"
+
+
+def compile_source(source: str, optimisation_level: int = 0) -> Program:
+    """Lexes, parses and optimises a source, without the cache."""
+    try:
+        program = Parser(extract_tokens(source.splitlines())).parse_program()
+    except InvalidTokenException as e:
+        raise ScrapParseError(f"Invalid token on line {e.line_number}: {e.input_string}") from e
+    except ScrapError:
+        raise
+    except Exception as e:
+        # The parser reports syntax errors as plain exceptions
+        raise ScrapParseError(str(e)) from e
+
+    if optimisation_level:
+        program = PassManager.for_level(optimisation_level).run(program)
+
+    return program
+
+
+def compile(source: str, optimisation_level: int = 0) -> CompiledProgram:
+    """The compiled program of a source, compiled once and then shared."""
+    global _hits, _misses
+
+    digest = hashlib.sha256(f"-O{optimisation_level}\0{source}".encode()).hexdigest()
+    with _lock:
+        compiled = _compiled.get(digest)
+        if compiled is not None:
+            _hits += 1
+            _compiled.move_to_end(digest)
+            return compiled
+        _misses += 1
+
+    # Compiled without the lock, another thread may compile the same source
+    compiled = CompiledProgram(compile_source(source, optimisation_level), digest)
+    with _lock:
+        compiled = _compiled.setdefault(digest, compiled)
+        _compiled.move_to_end(digest)
+        if len(_compiled) > CACHE_SIZE:
+            _compiled.popitem(last=False)
+
+    return compiled
+
+
+def cache_info() -> Tuple[int, int, int]:
+    """The hits, misses and number of programs of the compiled program cache."""
+    with _lock:
+        return _hits, _misses, len(_compiled)
+
+
+def clear_cache() -> None:
+    global _hits, _misses
+    with _lock:
+        _compiled.clear()
+        _hits = 0
+        _misses = 0
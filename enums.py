@@ -6,6 +6,18 @@ class Operator(str, Enum):
     DIVIDE = "/"
     ADD = "+"
     SUBTRACT = "-"
+    CONCATENATE = "++"
+    APPEND = "+<"
+    PIPE = "|>"
+    COMPOSE = ">>"
+    EQUAL = "=="
+    LESS_THAN = "<"
+    GREATER_THAN = ">"
+
+
+class StreamStage(str, Enum):
+    MAP = "map"
+    FILTER = "filter"
 
 
 # You can also move PrecedencePosition here if you like.
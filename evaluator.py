@@ -1,18 +1,34 @@
 
 
 import logging
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
 from exceptions import ScrapEvalError, ScrapTypeError
 from scope import Scope
 from values import *
 from scrapscript_ast import *
+from free_variables import UnknownNode, free_variables
 from enums import Operator
+from quickening import METRICS as QUICKENING, adapt_operation, lookup
+from tiering import tier_up
 
+if TYPE_CHECKING:
+    from result_cache import ResultCache
 
-def evaluate_program(program: Program):
 
-    scope = Scope()
+def evaluate_program(program: Program, scope: Optional[Scope] = None,
+                     results: Optional["ResultCache"] = None):
+    """
+    Evaluates the statements of a program, last first. With a result cache,
+    the values of its top-level expressions are loaded from (and stored in)
+    the cache.
+    """
 
-    return_value: Value = HoleValue()
+    if scope is None:
+        # The prelude calls back into the evaluator, so it's imported here
+        from prelude import prelude_scope
+        scope = Scope(parent=prelude_scope())
+
+    return_value: Value = HOLE
 
     for n, statement in enumerate(reversed(program.declarations)):
         logging.debug(f"evaluating statement #{n}, {statement}")
@@ -21,52 +37,137 @@ def evaluate_program(program: Program):
             case ExpressionStatement():
                 logging.debug(
                     f"Running expression statement ({type(statement.expression)}): {statement.expression}")
-                return_value = evaluate_node(statement.expression, scope=scope)
-                logging.debug(f"Got return value: {return_value}")
+                return_value = evaluate_node(statement.expression, scope=scope) if results is None \
+                    else results.evaluate(statement.expression, scope)
+                # Formatted lazily, printing a stream would materialise it
+                logging.debug("Got return value: %s", return_value)
             case FunctionDefinitionStatement():
                 name = statement.name
-                body = evaluate_node(statement.body, scope=scope)
+                body = evaluate_node(statement.body, scope=scope) if results is None \
+                    else results.evaluate(statement.body, scope)
 
-                logging.debug(f"Storing in scope: {name} = {body}")
+                logging.debug("Storing in scope: %s = %s", name, body)
                 # Store returned value!
                 scope.put(name, body)
-                return_value = HoleValue()
+                _bind_without_cycle(body, scope)
+                return_value = HOLE
+
+            case TypeDefinitionStatment():
+                scope.put(statement.name.name, define_type(statement))
+                return_value = HOLE
 
-            # case TypeDefinitionStatment():
-            #     raise NotImplementedError
             case _:
                 raise ScrapEvalError(
                     f"Unknown statement type: {type(statement)}")
 
+    if _may_hold_functions(return_value):
+        # The result may call the definitions after the program has ended,
+        # so they have to keep the scope alive after all
+        for value in scope.variables.values():
+            if isinstance(value, Closure):
+                value.hold_scope_strongly()
+
     return return_value
 
 
+def _bind_without_cycle(value: Value, scope: Scope) -> None:
+    """Called after binding a value in a scope, see Closure."""
+    if isinstance(value, Closure):
+        value.hold_scope_weakly(scope)
+
+
+def _may_hold_functions(value: Value) -> bool:
+    match value:
+        case IntegerValue() | FloatValue() | TextValue() | BytesValue() | HoleValue() \
+                | NumericListValue() | VariantType():
+            return False
+        case VariantValue() | TaggedVariantValue():
+            return _may_hold_functions(value.payload)
+        case RecordValue():
+            return any(_may_hold_functions(slot) for slot in value.slots)
+        case ListValue():
+            return any(_may_hold_functions(element) for element in value)
+        case RecordListValue():
+            return any(_may_hold_functions(column) for column in value.columns)
+
+    # Functions, and streams which may still call functions
+    return True
+
+
 def evaluate_node(node: ASTNode, scope: Scope = Scope()) -> Value:
 
-    logging.debug(f"Evaluating [{type(node)}] node: {node}")
+    # Formatted lazily, this runs for every node
+    logging.debug("Evaluating [%s] node: %s", type(node), node)
 
     match node:
-        case IntegerLiteral():
-            return IntegerValue(value=node.value)
-        case FloatLiteral():
-            return FloatValue(value=node.value)
-        case TextLiteral():
-            return TextValue(value=node.value)
-        case HexLiteral():
-            return HexValue(value=node.value)
-        case Base64Literal():
-            return Base64Value(value=node.value)
+        case IntegerLiteral() | FloatLiteral() | TextLiteral() | HexLiteral() | Base64Literal():
+            # Values are immutable, so a literal evaluates to the same value
+            # every time. It's created once and kept on the node.
+            if node.cached_value is None:
+                node.cached_value = literal_value(node)
+            return node.cached_value
+        case InterpolatedTextLiteral():
+            # Build the whole text with one join instead of a chain of ++
+            return TextValue("".join([
+                part if isinstance(part, str)
+                else interpolate(evaluate_node(part, scope=scope))
+                for part in node.parts
+            ]))
 
         case Identifier():
-            return scope.get(node.name)
+            return lookup(node, scope)
+
+        case Atom():
+            return atom(node.value)
+
+        case HashReference():
+            return evaluate_reference(node)
+
+        case VariantConstruction():
+            return evaluate_variant(node, scope=scope)
 
         case FunctionDefinitionStatement():
-            closure = Closure(body=node.body, scope=scope)
+            closure = Closure(body=node.body, scope=capture(node.body, scope))
 
             # Store the closure in the scope
             scope.put(node.name, closure)
+            _bind_without_cycle(closure, scope)
+
+            return HOLE
+
+        case ListLiteral():
+            return make_list([evaluate_node(element, scope=scope) for element in node.elements])
+
+        case RecordLiteral():
+            return evaluate_record(node, scope=scope)
+
+        case Function():
+            return Closure(body=node, scope=capture(node, scope))
 
-            return HoleValue()
+        case Application():
+            return evaluate_application(node, scope=scope)
+
+        case FieldAccess():
+            record = evaluate_node(node.record, scope=scope)
+            if not isinstance(record, RecordValue):
+                raise ScrapTypeError(
+                    f"Can't access field '{node.name}' on <{type(record)}> objects")
+
+            # Inline cache hit: same shape as last time, no lookup by name needed
+            shape = record.shape
+            cached = node.cached_slot
+            if cached is not None and cached[0] is shape:
+                return record.slots[cached[1]]
+
+            slot = shape.slot_of(node.name)
+            if slot is None:
+                raise ScrapEvalError(f"Record has no field '{node.name}'")
+
+            node.cached_slot = (shape, slot)
+            return record.slots[slot]
+
+        case UnaryOperation(specialised=operation) if operation is not None:
+            return operation(evaluate_node(node.expression, scope=scope))
 
         case UnaryOperation():
             value = evaluate_node(node.expression, scope=scope)
@@ -81,36 +182,516 @@ def evaluate_node(node: ASTNode, scope: Scope = Scope()) -> Value:
                     raise ScrapEvalError(
                         f"Operator <{node.operator}> is not a valid unary operator")
 
+        case PatternMatchExpression():
+            return Closure(body=node, scope=capture(node, scope))
+
+        case BinaryOperation(specialised=operation) if operation is not None:
+            # The operand types were proven by type inference, no checks needed
+            return operation(evaluate_node(node.left, scope=scope),
+                             evaluate_node(node.right, scope=scope))
+
+        case BinaryOperation(operator=Operator.COMPOSE):
+            return evaluate_composition(node, scope=scope)
+
+        case BinaryOperation(operator=Operator.PIPE):
+            return evaluate_pipeline(node, scope=scope)
+
         case BinaryOperation():
             left = evaluate_node(node=node.left, scope=scope)
             right = evaluate_node(node=node.right, scope=scope)
-            match node.operator:
-                case Operator.ADD:
-                    if not isinstance(left, Addable):
-                        raise ScrapTypeError(
-                            f"Operator + not valid on <{type(left)}> objects")
+            quickened = node.quickened
+            if quickened is not None and type(left) is quickened[0] \
+                    and type(right) is quickened[0]:
+                QUICKENING.operation_hits += 1
+                return quickened[1](left, right)
 
-                    return left.add(right)
+            operation = adapt_operation(node, left, right)
+            if operation is not None:
+                return operation(left, right)
 
-                case Operator.SUBTRACT:
-                    if not isinstance(left, Subtractable):
-                        raise ScrapTypeError(
-                            f"Operator + not valid on <{type(left)}> objects")
+            return binary_operation(node.operator, left, right)
 
-                    return left.subtract(right)
+    raise ScrapEvalError(f"Don't know how to handle node: <{node}>")
 
-                case Operator.MULTIPLY:
-                    if not isinstance(left, Multipliable):
-                        raise ScrapTypeError(
-                            f"Operator + not valid on <{type(left)}> objects")
 
-                    return left.multiply(right)
+def binary_operation(operator: Operator, left: Value, right: Value) -> Value:
+    """Applies an arithmetic, comparison, `++` or `+<` operator, with type checks."""
+    match operator:
+        case Operator.ADD:
+            if not isinstance(left, Addable):
+                raise ScrapTypeError(
+                    f"Operator + not valid on <{type(left)}> objects")
 
-                case Operator.DIVIDE:
-                    if not isinstance(left, Dividable):
-                        raise ScrapTypeError(
-                            f"Operator + not valid on <{type(left)}> objects")
+            return left.add(right)
 
-                    return left.divide(right)
+        case Operator.SUBTRACT:
+            if not isinstance(left, Subtractable):
+                raise ScrapTypeError(
+                    f"Operator + not valid on <{type(left)}> objects")
 
-    raise ScrapEvalError(f"Don't know how to handle node: <{node}>")
+            return left.subtract(right)
+
+        case Operator.MULTIPLY:
+            if not isinstance(left, Multipliable):
+                raise ScrapTypeError(
+                    f"Operator + not valid on <{type(left)}> objects")
+
+            return left.multiply(right)
+
+        case Operator.DIVIDE:
+            if not isinstance(left, Dividable):
+                raise ScrapTypeError(
+                    f"Operator + not valid on <{type(left)}> objects")
+
+            return left.divide(right)
+
+        case Operator.CONCATENATE:
+            if not isinstance(left, Concatenatable):
+                raise ScrapTypeError(
+                    f"Operator ++ not valid on <{type(left)}> objects")
+
+            return left.concatenate(right)
+
+        case Operator.APPEND:
+            if not isinstance(left, Appendable):
+                raise ScrapTypeError(
+                    f"Operator +< not valid on <{type(left)}> objects")
+
+            return left.append(right)
+
+        case Operator.EQUAL | Operator.LESS_THAN | Operator.GREATER_THAN:
+            return to_boolean(comparison(operator, left, right))
+
+    raise ScrapEvalError(f"Operator <{operator}> is not a valid binary operator")
+
+
+def evaluate_application(node: Application, scope: Scope) -> Value:
+    # Collect all arguments of a curried call like `f a b c`
+    arguments: List[Expression] = []
+    head: Expression = node
+    while isinstance(head, Application):
+        arguments.append(head.argument)
+        head = head.function
+    arguments.reverse()
+
+    function = evaluate_node(head, scope=scope)
+    return call_function(function, [evaluate_node(argument, scope=scope) for argument in arguments])
+
+
+def capture(node: Expression, scope: Scope) -> Scope:
+    """
+    The scope a function created in `scope` closes over. It only holds the
+    free variables of the function that are bound in local scopes (the
+    parameters and pattern variables of the functions being called), on
+    top of the global scope, so the closure doesn't keep the rest of the
+    local scopes alive. Global names are still looked up when the function
+    is called, as functions can refer to themselves or to later
+    definitions there.
+    """
+    try:
+        names = free_variables(node)
+    except UnknownNode:
+        return scope
+
+    global_scope = _global_scope(scope)
+    captured: Dict[str, Value] = {}
+    current: Optional[Scope] = scope
+    while current is not None and current is not global_scope:
+        for name in names:
+            if name not in captured and name in current.variables:
+                captured[name] = current.variables[name]
+        current = current.parent
+
+    if not captured:
+        return global_scope
+
+    closure_scope = Scope(parent=global_scope)
+    closure_scope.variables = captured
+    return closure_scope
+
+
+def _global_scope(scope: Scope) -> Scope:
+    """The outermost scope of a program, below the prelude."""
+    from prelude import prelude_scope
+    prelude = prelude_scope()
+
+    while scope.parent is not None and scope.parent is not prelude:
+        scope = scope.parent
+
+    return scope
+
+
+def uncurry(node: Function) -> Tuple[Function, ...]:
+    """The nested functions of `a -> b -> c -> ...`, which take one argument each."""
+    lambdas = node.cached_lambdas
+    if lambdas is None:
+        nested = [node]
+        while isinstance(nested[-1].body, Function):
+            nested.append(nested[-1].body)
+        lambdas = node.cached_lambdas = tuple(nested)
+
+    return lambdas
+
+
+def call_function(function: Value, arguments: Sequence[Value]) -> Value:
+    """
+    Applies a function to several arguments, like `f a b c`.
+
+    Curried functions take as many of the arguments as they can in one
+    step: a builtin is called once with all of them, and a closure of
+    nested lambdas binds all their parameters in a single scope, instead
+    of building a partial application for every argument. A closure given
+    fewer arguments than it has lambdas becomes a closure of the rest.
+    """
+    index = 0
+    count = len(arguments)
+    while index < count:
+        match function:
+            case BuiltinFunction():
+                needed = function.arity - len(function.arguments)
+                if count - index < needed:
+                    return BuiltinFunction(name=function.name, arity=function.arity,
+                                           function=function.function,
+                                           arguments=function.arguments + tuple(arguments[index:]))
+
+                function = function.function(*function.arguments, *arguments[index:index + needed])
+                index += needed
+
+            case Closure(body=Function() as body):
+                lambdas = uncurry(body)
+                taken = min(len(lambdas), count - index)
+
+                if taken == len(lambdas):
+                    compiled = tier_up(body)
+                    if compiled is not None:
+                        function = compiled(function.scope, *arguments[index:index + taken])
+                        index += taken
+                        continue
+
+                scope = Scope(parent=function.scope)
+                for lambda_node, argument in zip(lambdas, arguments[index:index + taken]):
+                    scope.put(lambda_node.parameter.name, argument)
+                index += taken
+
+                if taken < len(lambdas):
+                    return Closure(body=lambdas[taken], scope=capture(lambdas[taken], scope))
+
+                function = evaluate_node(lambdas[-1].body, scope=scope)
+
+            case _:
+                function = apply_function(function, arguments[index])
+                index += 1
+
+    return function
+
+
+def _is_identity(node: Expression) -> bool:
+    """Is this the identity function, e.g. `x -> x`?"""
+    return isinstance(node, Function) and node.body == node.parameter
+
+
+def _operands(node: BinaryOperation) -> List[Expression]:
+    """The operands of a left-leaning chain of one operator, e.g. `f >> g >> h`."""
+    operands: List[Expression] = []
+    head: Expression = node
+    while isinstance(head, BinaryOperation) and head.operator == node.operator:
+        operands.append(head.right)
+        head = head.left
+    operands.append(head)
+    operands.reverse()
+
+    return operands
+
+
+def evaluate_composition(node: BinaryOperation, scope: Scope) -> Value:
+    # `f >> g >> h` becomes a single function applying f, g and h in a loop,
+    # leaving out identity functions altogether
+    stages: List[Value] = []
+    for operand in _operands(node):
+        if _is_identity(operand):
+            continue
+
+        stage = evaluate_node(operand, scope=scope)
+        if isinstance(stage, ComposedFunction):
+            stages.extend(stage.stages)
+        elif not (isinstance(stage, Closure) and _is_identity(stage.body)):
+            stages.append(stage)
+
+    if len(stages) == 1:
+        return stages[0]
+
+    return ComposedFunction(stages=tuple(stages))
+
+
+def evaluate_pipeline(node: BinaryOperation, scope: Scope) -> Value:
+    # `x |> f |> g` is `g (f x)`, applied stage by stage in a loop
+    operands = _operands(node)
+
+    value = evaluate_node(operands[0], scope=scope)
+    for operand in operands[1:]:
+        if not _is_identity(operand):
+            value = apply_function(evaluate_node(operand, scope=scope), value)
+
+    return value
+
+
+def apply_function(function: Value, argument: Value) -> Value:
+    match function:
+        case BuiltinFunction():
+            return function.apply(argument)
+
+        case ComposedFunction():
+            for stage in function.stages:
+                argument = apply_function(stage, argument)
+            return argument
+
+        case Closure(body=Function()):
+            assert isinstance(function.body, Function)
+            if len(uncurry(function.body)) == 1:
+                compiled = tier_up(function.body)
+                if compiled is not None:
+                    return compiled(function.scope, argument)
+
+            scope = Scope(parent=function.scope)
+            scope.put(function.body.parameter.name, argument)
+            return evaluate_node(function.body.body, scope=scope)
+
+        case Closure(body=PatternMatchExpression()):
+            assert isinstance(function.body, PatternMatchExpression)
+            compiled = tier_up(function.body)
+            if compiled is not None:
+                return compiled(function.scope, argument)
+
+            clauses = function.body.clauses
+            if isinstance(argument, TaggedVariantValue):
+                # Only the clauses that can match this variant
+                clauses = variant_clauses(function.body, argument.variant_type)[argument.index]
+
+            for clause in clauses:
+                scope = Scope(parent=function.scope)
+                if match_pattern(clause.pattern, argument, scope=scope):
+                    return evaluate_node(clause.body, scope=scope)
+
+            raise ScrapEvalError(f"No pattern matched {argument}")
+
+    raise ScrapTypeError(f"<{type(function)}> objects are not functions")
+
+
+ARITHMETIC_OPERATORS = (Operator.ADD, Operator.SUBTRACT, Operator.MULTIPLY, Operator.DIVIDE)
+COMPARISON_OPERATORS = (Operator.EQUAL, Operator.LESS_THAN, Operator.GREATER_THAN)
+
+# The lists that can be mapped or filtered as a whole, see `map_elementwise`
+ElementwiseList = Union[NumericListValue, RecordListValue]
+
+
+def map_elementwise(function: Value, values: ElementwiseList) -> Optional[Value]:
+    """
+    Maps a lambda like `x -> x * 2 + 1` or `r -> r.a` over a whole numeric
+    or record list at once, by evaluating its body with the list (or the
+    columns of the records) in place of the parameter, so every operator
+    runs elementwise on the arrays. Returns None if the function isn't
+    such a lambda, and it has to be applied row by row instead.
+    """
+    if not (isinstance(function, Closure) and isinstance(function.body, Function)):
+        return None
+
+    result = _evaluate_elementwise(
+        function.body.body, function.body.parameter.name, values, function.scope)
+    if not isinstance(result, SEQUENCE_TYPES):
+        # e.g. `x -> 1`, which doesn't use the parameter
+        return None
+
+    return result
+
+
+def filter_elementwise(predicate: Value, values: ElementwiseList) -> Optional[Value]:
+    """
+    Filters a whole numeric or record list at once with a comparison like
+    `x -> x > 2` or `r -> r.b == "x"`, see `map_elementwise`.
+    """
+    if not (isinstance(predicate, Closure) and isinstance(predicate.body, Function)):
+        return None
+
+    body = predicate.body.body
+    if not (isinstance(body, BinaryOperation) and body.operator in COMPARISON_OPERATORS):
+        return None
+
+    parameter = predicate.body.parameter.name
+    left = _evaluate_elementwise(body.left, parameter, values, predicate.scope)
+    right = _evaluate_elementwise(body.right, parameter, values, predicate.scope)
+    if left is None or right is None:
+        return None
+
+    mask = compare_elementwise(body.operator, left, right)
+    if mask is None:
+        mask = compare_elementwise(body.operator, right, left, reflected=True)
+    if mask is None:
+        return None
+
+    return values.select(mask)
+
+
+def _evaluate_elementwise(node: Expression, parameter: str, values: ElementwiseList,
+                          scope: Scope) -> Optional[Value]:
+    match node:
+        case Identifier(name=name) if name == parameter:
+            return values if isinstance(values, NumericListValue) else None
+
+        case FieldAccess(record=Identifier(name=name)) if name == parameter:
+            # A column read, e.g. `r.a`
+            return values.column(node.name) if isinstance(values, RecordListValue) else None
+
+        case Identifier() | IntegerLiteral() | FloatLiteral() | TextLiteral():
+            value = evaluate_node(node, scope=scope)
+            return value if isinstance(value, (IntegerValue, FloatValue, TextValue)) else None
+
+        case BinaryOperation(operator=operator) if operator in ARITHMETIC_OPERATORS:
+            left = _evaluate_elementwise(node.left, parameter, values, scope)
+            right = _evaluate_elementwise(node.right, parameter, values, scope)
+            if not (isinstance(left, (NumericListValue, IntegerValue, FloatValue))
+                    and isinstance(right, (NumericListValue, IntegerValue, FloatValue))):
+                return None
+
+            if isinstance(right, NumericListValue) and not isinstance(left, NumericListValue):
+                return right.elementwise(operator, left, reflected=True)
+
+            return arithmetic(operator, left, right)
+
+    return None
+
+
+def match_pattern(pattern: Pattern, value: Value, scope: Scope) -> bool:
+    """Matches a value against a pattern, binding any variables in scope."""
+    match pattern:
+        case WildcardPattern():
+            return True
+
+        case VariablePattern():
+            scope.put(pattern.identifier.name, value)
+            return True
+
+        case LiteralPattern():
+            return evaluate_node(pattern.literal, scope=scope) == value
+
+        case VariantPattern():
+            if not isinstance(value, (VariantValue, TaggedVariantValue)) \
+                    or value.tag != pattern.tag.value:
+                return False
+
+            # A pattern without a payload ignores it, e.g. `#ron` matches `#ron 3`
+            return pattern.payload is None or match_pattern(pattern.payload, value.payload, scope)
+
+    raise ScrapEvalError(f"Don't know how to match pattern: <{pattern}>")
+
+
+def define_type(statement: TypeDefinitionStatment) -> VariantType:
+    return VariantType(statement.name.name, [
+        (variant.tag.value, variant.parameter is not None)
+        for variant in statement.body.variants
+    ])
+
+
+def evaluate_variant(node: VariantConstruction, scope: Scope) -> Value:
+    variant_type = scope.get(node.type_name.name)
+    if not isinstance(variant_type, VariantType):
+        raise ScrapTypeError(f"{node.type_name.name} is not a type, it's <{type(variant_type)}>")
+
+    return variant_type.construct(
+        variant_type.index(node.variant_name.name),
+        [evaluate_node(argument, scope=scope) for argument in node.arguments],
+    )
+
+
+def variant_clauses(node: PatternMatchExpression,
+                    variant_type: VariantType) -> List[List[PatternClause]]:
+    """
+    The clauses of a pattern match that can match each variant of a type,
+    in order, indexed by the variant's number. Clauses for other tags are
+    left out, so matching a variant doesn't have to try them one by one.
+    The table for the last type is cached on the node.
+    """
+    cached = node.cached_dispatch
+    if cached is not None and cached[0] is variant_type:
+        return cached[1]
+
+    table: List[List[PatternClause]] = [[] for _ in variant_type.tags]
+    for clause in node.clauses:
+        for index, tag in enumerate(variant_type.tags):
+            if not isinstance(clause.pattern, VariantPattern) or clause.pattern.tag.value == tag:
+                table[index].append(clause)
+
+    node.cached_dispatch = (variant_type, table)
+    return table
+
+
+def evaluate_reference(node: HashReference) -> Value:
+    """The value of an expression from the scrapyard, evaluated once per reference."""
+    if node.cached_value is None:
+        from prelude import prelude_scope
+        from scrapyard import current
+
+        # Stored expressions only refer to builtins
+        node.cached_value = evaluate_node(current().load(node.digest), Scope(parent=prelude_scope()))
+
+    return node.cached_value
+
+
+def literal_value(node: Literal) -> Value:
+    """The value of a literal, shared with other literals where possible."""
+    match node:
+        case IntegerLiteral():
+            return integer(node.value)
+        case FloatLiteral():
+            return FloatValue(node.value)
+        case TextLiteral():
+            return text(node.text)
+        case HexLiteral():
+            return HexValue.from_lexeme(node.value)
+        case Base64Literal():
+            return Base64Value.from_lexeme(node.value)
+
+    raise ScrapEvalError(f"Unknown literal: {node}")
+
+
+def interpolate(value: Value) -> str:
+    """The text a value is rendered as inside interpolated text."""
+    if isinstance(value, TextValue):
+        return value.value
+
+    return str(value)
+
+
+def evaluate_record(node: RecordLiteral, scope: Scope) -> RecordValue:
+    if node.spread is None:
+        # The layout of a record literal without a spread never changes,
+        # so the shape only has to be computed once per literal.
+        shape = node.cached_shape
+        if shape is None:
+            shape = EMPTY_SHAPE
+            for record_field in node.fields:
+                shape = shape.with_field(record_field.name)
+            node.cached_shape = shape
+
+        # The parser rejects duplicate fields, so the slots are in field order
+        return RecordValue(
+            shape=shape,
+            slots=[evaluate_node(record_field.value, scope=scope)
+                   for record_field in node.fields]
+        )
+
+    base = evaluate_node(node.spread, scope=scope)
+    if not isinstance(base, RecordValue):
+        raise ScrapTypeError(f"Can't spread <{type(base)}> into a record")
+
+    shape = base.shape
+    slots = list(base.slots)
+    for record_field in node.fields:
+        value = evaluate_node(record_field.value, scope=scope)
+        slot = shape.slot_of(record_field.name)
+        if slot is None:
+            shape = shape.with_field(record_field.name)
+            slots.append(value)
+        else:
+            slots[slot] = value
+
+    return RecordValue(shape=shape, slots=slots)
@@ -24,3 +24,7 @@ class ScrapEvalError(ScrapError):
 
 class ScrapParseError(ScrapError):
     pass
+
+
+class ScrapyardError(ScrapError):
+    pass
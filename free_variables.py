@@ -0,0 +1,118 @@
+"""
+This module implements the free variable analysis used to build closures.
+
+The free variables of an expression are the names it refers to that it
+doesn't bind itself, e.g. `y` (but not `x`) in `x -> x + y`. A closure
+only has to keep those alive, instead of every scope it was created in.
+
+The result is cached on function nodes, as closures are created from the
+same node over and over again.
+"""
+
+from __future__ import annotations
+from typing import FrozenSet, Set
+
+from scrapscript_ast import (
+    ASTNode,
+    Application,
+    Atom,
+    BinaryOperation,
+    FieldAccess,
+    Function,
+    HashReference,
+    Identifier,
+    InterpolatedTextLiteral,
+    ListLiteral,
+    Literal,
+    LiteralPattern,
+    Pattern,
+    PatternMatchExpression,
+    RecordLiteral,
+    UnaryOperation,
+    VariablePattern,
+    VariantConstruction,
+    VariantPattern,
+    WildcardPattern,
+)
+
+
+class UnknownNode(Exception):
+    """Raised for nodes the analysis doesn't know the bindings of."""
+
+
+def free_variables(node: ASTNode) -> FrozenSet[str]:
+    """
+    The free variables of a node. Raises UnknownNode for nodes it can't
+    analyse, in which case everything in scope has to be kept.
+    """
+    match node:
+        case Identifier():
+            return frozenset((node.name,))
+
+        case Function() | PatternMatchExpression():
+            names = node.cached_free_variables
+            if names is None:
+                names = node.cached_free_variables = _function_free_variables(node)
+            return names
+
+        case InterpolatedTextLiteral():
+            return _union(part for part in node.parts if not isinstance(part, str))
+
+        case Literal() | Atom() | HashReference():
+            # Expressions in the scrapyard can't refer to anything in scope
+            return frozenset()
+
+        case UnaryOperation():
+            return free_variables(node.expression)
+
+        case BinaryOperation():
+            return free_variables(node.left) | free_variables(node.right)
+
+        case Application():
+            return free_variables(node.function) | free_variables(node.argument)
+
+        case FieldAccess():
+            return free_variables(node.record)
+
+        case ListLiteral():
+            return _union(node.elements)
+
+        case VariantConstruction():
+            return _union(node.arguments) | {node.type_name.name}
+
+        case RecordLiteral():
+            names = _union(record_field.value for record_field in node.fields)
+            return names | free_variables(node.spread) if node.spread is not None else names
+
+    raise UnknownNode(f"Can't find the free variables of <{type(node).__name__}>")
+
+
+def _function_free_variables(node: Function | PatternMatchExpression) -> FrozenSet[str]:
+    if isinstance(node, Function):
+        return free_variables(node.body) - {node.parameter.name}
+
+    names: Set[str] = set()
+    for clause in node.clauses:
+        names |= free_variables(clause.body) - bound_variables(clause.pattern)
+
+    return frozenset(names)
+
+
+def bound_variables(pattern: Pattern) -> FrozenSet[str]:
+    match pattern:
+        case VariablePattern():
+            return frozenset((pattern.identifier.name,))
+        case WildcardPattern() | LiteralPattern():
+            return frozenset()
+        case VariantPattern():
+            return bound_variables(pattern.payload) if pattern.payload is not None else frozenset()
+
+    raise UnknownNode(f"Can't find the variables bound by <{type(pattern).__name__}>")
+
+
+def _union(nodes) -> FrozenSet[str]:
+    names: Set[str] = set()
+    for node in nodes:
+        names |= free_variables(node)
+
+    return frozenset(names)
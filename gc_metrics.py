@@ -0,0 +1,69 @@
+"""
+This module measures the pauses of Python's cyclic garbage collector.
+
+The interpreter mostly frees values through reference counting, but any
+reference cycle has to wait for the cyclic collector, which stops the
+program while it walks the tracked objects. `GCMetrics` hooks into
+`gc.callbacks` to record how often it ran and for how long, e.g.
+
+    with GCMetrics() as metrics:
+        evaluate_program(program)
+    print(metrics.summary())
+"""
+
+from __future__ import annotations
+import gc
+import time
+from typing import Any, Dict, List, Optional
+
+
+class GCMetrics():
+    collections: List[int]
+    collected: int
+    total_pause: float
+    longest_pause: float
+    _started: Optional[float]
+
+    def __init__(self):
+        self.collections = [0] * len(gc.get_count())
+        self.collected = 0
+        self.total_pause = 0.0
+        self.longest_pause = 0.0
+        self._started = None
+
+    def _callback(self, phase: str, info: Dict[str, Any]) -> None:
+        if phase == "start":
+            self._started = time.perf_counter()
+            return
+
+        if self._started is None:
+            # Started collecting before we were installed
+            return
+
+        pause = time.perf_counter() - self._started
+        self._started = None
+
+        self.collections[info["generation"]] += 1
+        self.collected += info["collected"]
+        self.total_pause += pause
+        self.longest_pause = max(self.longest_pause, pause)
+
+    def start(self) -> None:
+        gc.callbacks.append(self._callback)
+
+    def stop(self) -> None:
+        if self._callback in gc.callbacks:
+            gc.callbacks.remove(self._callback)
+
+    def __enter__(self) -> GCMetrics:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def summary(self) -> str:
+        counts = ", ".join(f"gen{generation}={count}" for generation, count in enumerate(self.collections))
+        return (f"GC: {sum(self.collections)} collections ({counts}), "
+                f"{self.collected} objects collected, "
+                f"{self.total_pause * 1e3:.2f} ms paused, longest {self.longest_pause * 1e3:.2f} ms")
@@ -0,0 +1,142 @@
+"""
+This module implements the hash-consing of AST nodes: structurally
+identical subtrees are replaced by one shared node.
+
+Generated programs repeat the same subexpressions over and over, e.g. the
+same record of defaults in every entry of a config. Each of them would
+otherwise be a separate tree of nodes, with its own caches.
+
+Nodes are shared bottom-up: the children of a node are shared first, so
+two nodes are the same if they have the same type, the same values and
+the very same child nodes (or, for identifiers, the same names). That makes the key of a node small (it holds
+the ids of its children, not their contents), and finding it a single
+dictionary lookup.
+
+Sharing is safe because nothing changes a node after parsing except its
+caches, and those only depend on the node itself (e.g. its free
+variables), or are checked before use (e.g. the record shape of a field
+access). The one exception is type_inference.specialise, which only
+specialises a shared operation that has the same operand types
+everywhere.
+
+The Parser shares the nodes of every program it parses, with an interner
+of its own. Nodes are never shared between programs, as specialise
+changes the operations of the program it's given, whatever other
+programs would make of them.
+"""
+
+from __future__ import annotations
+import dataclasses
+import enum
+from typing import Any, Dict, Hashable, List, Tuple
+
+from scrapscript_ast import ExpressionStatement, FunctionDefinitionStatement, Identifier, \
+    InterpolatedTextLiteral, Program, Statement
+
+
+class NodeInterner():
+    __slots__ = ("_nodes", "duplicates")
+
+    # By the class of the node and the keys of its fields
+    _nodes: Dict[Tuple[type, Tuple[Hashable, ...]], Any]
+    # How many nodes were replaced by an equal node seen before
+    duplicates: int
+
+    def __init__(self):
+        self._nodes = {}
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        """How many different nodes were seen."""
+        return len(self._nodes)
+
+    def intern(self, node: Any) -> Any:
+        """The shared node equal to `node`, which may be `node` itself."""
+        return self._intern(node, {})
+
+    def _intern(self, node: Any, done: Dict[int, Any]) -> Any:
+        # A node can be reached several times if the tree already shares
+        # nodes, e.g. when sharing the output of an optimisation pass
+        shared = done.get(id(node))
+        if shared is not None:
+            return shared
+
+        if isinstance(node, Identifier):
+            # Not shared itself, as it remembers how far up its name was
+            # found (see quickening), which depends on where it's used
+            return node
+
+        fields: List[Hashable] = []
+        for field in dataclasses.fields(node):
+            # Caches aren't compared, and aren't part of the node's identity
+            if not field.compare:
+                continue
+
+            value = self._share(getattr(node, field.name), done)
+            setattr(node, field.name, value)
+            fields.append(self._key(value))
+
+        if isinstance(node, InterpolatedTextLiteral):
+            # The expressions embedded in the text
+            node.parts = [self._share(part, done) for part in node.parts]
+
+        shared = self._nodes.setdefault((type(node), tuple(fields)), node)
+        if shared is not node:
+            self.duplicates += 1
+
+        done[id(node)] = shared
+        return shared
+
+    def _share(self, value: Any, done: Dict[int, Any]) -> Any:
+        if isinstance(value, list):
+            return [self._share(element, done) for element in value]
+        if dataclasses.is_dataclass(value):
+            return self._intern(value, done)
+        return value
+
+    def _key(self, value: Any) -> Hashable:
+        if isinstance(value, list):
+            return tuple(self._key(element) for element in value)
+        if isinstance(value, Identifier):
+            return (Identifier, value.name)
+        if dataclasses.is_dataclass(value):
+            # Already shared, so equal children are the same object
+            return id(value)
+        if isinstance(value, float):
+            # Tells 0.0 and -0.0 apart
+            return (float, value.hex())
+        return (type(value), value)
+
+    def intern_statement(self, statement: Statement) -> Statement:
+        """Shares the nodes of a statement, but not the statement itself."""
+        match statement:
+            case ExpressionStatement():
+                statement.expression = self.intern(statement.expression)
+            case FunctionDefinitionStatement():
+                statement.body = self.intern(statement.body)
+            case _:
+                for field in dataclasses.fields(statement):
+                    setattr(statement, field.name, self._share(getattr(statement, field.name), {}))
+
+        return statement
+
+
+def share_nodes(program: Program) -> Program:
+    """A program with the structurally identical subtrees of `program` shared."""
+    interner = NodeInterner()
+    return Program([interner.intern_statement(statement) for statement in program.declarations])
+
+
+def structure(node: Any) -> Any:
+    """
+    The structure of a tree as nested tuples of type names and values,
+    the same for every tree equal to it however its nodes are shared.
+    """
+    if isinstance(node, list):
+        return tuple(structure(element) for element in node)
+    if isinstance(node, enum.Enum):
+        return (type(node).__name__, node.name)
+    if dataclasses.is_dataclass(node):
+        return (type(node).__name__, *(structure(getattr(node, field.name))
+                                       for field in dataclasses.fields(node) if field.compare))
+    return node
@@ -24,14 +24,16 @@ class TokenType(str, Enum):
     WHITE_SPACE = "WHITE_SPACE"
     RIGHT_ARROW = "->"
     COLON = ":"
-    DOUBLE_COLON = ":"
+    DOUBLE_COLON = "::"
     END_OF_FILE = "EOF"
     PIPE = "|"
+    PIPE_APPLY = "|>"
     IDENTIFIER = "IDENTIFIER"
     PLUS = "+"
     DOUBLE_PLUS = "++"
     MINUS = "-"
     EQUALS = "="
+    DOUBLE_EQUALS = "=="
     ATOM = "#ATOM"
     INTERPOLATED_TEXT = "INTERPOLATED_TEXT"
     TEXT = "TEXT"
@@ -46,6 +48,8 @@ class TokenType(str, Enum):
     INTEGER = "123"
     START_CURLY_BRACKETS = "{"
     END_CURLY_BRACKETS = "}"
+    START_SQUARE_BRACKETS = "["
+    END_SQUARE_BRACKETS = "]"
     DOT = "."
     COMMA = ","
     APPEND = "+<"
@@ -54,20 +58,26 @@ class TokenType(str, Enum):
     UNDERSCORE = "_"
     COMMENT = "-- Comment"
     EXCLAMATION_MARK = "!"
+    HASH_REFERENCE = "$sha256'abcd"
 
 
 lexeme_mapper: Dict[str, TokenType] = {
     r"--.*": TokenType.COMMENT,
     r"\s+": TokenType.WHITE_SPACE,
+    r"\|>": TokenType.PIPE_APPLY,
     r"\|": TokenType.PIPE,
     r";": TokenType.SEMI_COLON,
     r"::": TokenType.DOUBLE_COLON,
     r":": TokenType.COLON,
-    r"[a-zA-Z]+[a-zA-Z0-9_]*": TokenType.IDENTIFIER,
+    # Names can be namespaced with slashes, e.g. `text/repeat`
+    r"[a-zA-Z]+[a-zA-Z0-9_]*(?:/[a-zA-Z]+[a-zA-Z0-9_]*)*": TokenType.IDENTIFIER,
     r"#[a-zA-Z]+": TokenType.ATOM,
-    r'"([^`]*`[^`]*`)+[^`]*"': TokenType.INTERPOLATED_TEXT,
+    # Quotes only appear inside the backticks, as whole string literals, so that an
+    # interpolated text never runs on into the next string on the line
+    r'"([^`"]*`([^`"]|"[^`"]*")*`)+[^`"]*"': TokenType.INTERPOLATED_TEXT,
     r'"[^"]*"': TokenType.TEXT,
     r"\->": TokenType.RIGHT_ARROW,
+    r"==": TokenType.DOUBLE_EQUALS,
     r"=": TokenType.EQUALS,
     r"\+\+": TokenType.DOUBLE_PLUS,
     r"\+<": TokenType.APPEND,
@@ -84,12 +94,15 @@ lexeme_mapper: Dict[str, TokenType] = {
     r"\d+": TokenType.INTEGER,
     r"\{": TokenType.START_CURLY_BRACKETS,
     r"\}": TokenType.END_CURLY_BRACKETS,
+    r"\[": TokenType.START_SQUARE_BRACKETS,
+    r"\]": TokenType.END_SQUARE_BRACKETS,
     r"\.": TokenType.DOT,
     r",": TokenType.COMMA,
     r"~[0-9a-fA-F]+": TokenType.HEXADECIMAL,
     r"~~(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?": TokenType.BASE64,
     r"_": TokenType.UNDERSCORE,
     r"!": TokenType.EXCLAMATION_MARK,
+    r"\$sha256'[0-9a-f]{64}": TokenType.HASH_REFERENCE,
 }
 
 ignored_tokens: Set[TokenType] = {TokenType.COMMENT, TokenType.WHITE_SPACE}
@@ -0,0 +1,212 @@
+"""
+This module implements the unboxed storage behind numeric lists.
+
+A list holding only integers or only floats is stored as a flat array of
+machine numbers instead of a vector of IntegerValue/FloatValue objects.
+The array is a NumPy array when NumPy is installed, so sums, arithmetic
+and sorting run as vectorised loops in C. Without NumPy the standard
+library's `array` module is used: the numbers are still stored unboxed
+(8 bytes each), but the loops run in Python. NumPy is optional, and the
+two backends must give the same results: tests/values/test_numeric_array.py
+runs every test with both (the NumPy half is skipped when it isn't installed).
+
+Integers are stored as 64 bit numbers. Scrapscript integers have no
+size limit, so every operation that could overflow checks the bounds of
+its operands first and returns None if the result might not fit, and
+the caller falls back to the boxed values. Operations that would raise
+an error (like dividing by zero) also return None, so the error comes
+from the usual scalar code.
+"""
+
+from __future__ import annotations
+from array import array
+from itertools import compress, repeat
+from operator import add, eq, gt, lt, mul, sub, truediv
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from enums import Operator
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
+
+INT_MIN = -(1 << 63)
+INT_MAX = (1 << 63) - 1
+
+# Either a 1-dimensional numpy.ndarray or an array.array
+NumericArray = Any
+Number = Union[int, float]
+
+
+def _truncating_divide(a: Number, b: Number) -> int:
+    # Integer division rounds towards zero, like IntegerValue.divide
+    return int(a / b)
+
+
+_PYTHON_OPERATORS: Dict[Operator, Callable[[Any, Any], Any]] = {
+    Operator.ADD: add,
+    Operator.SUBTRACT: sub,
+    Operator.MULTIPLY: mul,
+    Operator.DIVIDE: truediv,
+}
+
+
+def pack(numbers: Iterable[Number], is_float: bool) -> Optional[NumericArray]:
+    """Stores the numbers in an array, or returns None if an integer doesn't fit."""
+    if is_float:
+        if numpy is not None:
+            return numpy.fromiter(numbers, dtype=numpy.float64)
+        return array("d", numbers)
+
+    numbers = numbers if isinstance(numbers, list) else list(numbers)
+    if numbers and (min(numbers) < INT_MIN or max(numbers) > INT_MAX):
+        return None
+
+    if numpy is not None:
+        return numpy.array(numbers, dtype=numpy.int64)
+    return array("q", numbers)
+
+
+def to_list(data: NumericArray) -> List[Number]:
+    """The numbers as Python ints or floats."""
+    return data.tolist()
+
+
+def item(data: NumericArray, index: int) -> Number:
+    number = data[index]
+    return number.item() if numpy is not None else number
+
+
+def _bound(data: NumericArray) -> int:
+    """The largest absolute value in the array, as a Python int."""
+    if len(data) == 0:
+        return 0
+    if numpy is not None:
+        return max(abs(int(data.min())), abs(int(data.max())))
+    return max(abs(min(data)), abs(max(data)))
+
+
+def total(data: NumericArray, is_float: bool) -> Number:
+    if numpy is None:
+        return sum(data)
+
+    if not is_float and len(data) * _bound(data) > INT_MAX:
+        # Might overflow, Python ints don't
+        return sum(data.tolist())
+
+    return data.sum().item()
+
+
+def sort(data: NumericArray) -> NumericArray:
+    if numpy is not None:
+        return numpy.sort(data)
+
+    return array(data.typecode, sorted(data))
+
+
+def reverse(data: NumericArray) -> NumericArray:
+    # A numpy slice is a view, copy it so the result doesn't pin the original
+    return data[::-1].copy() if numpy is not None else data[::-1]
+
+
+def concatenate(left: NumericArray, right: NumericArray) -> NumericArray:
+    if numpy is not None:
+        return numpy.concatenate((left, right))
+
+    return left + right
+
+
+def elementwise(operator: Operator, left: Union[NumericArray, Number],
+                right: Union[NumericArray, Number], is_float: bool) -> Optional[NumericArray]:
+    """
+    Applies an arithmetic operator to two arrays of the same length, or to
+    an array and a single number on either side. Returns None when the
+    result can't be computed safely in the array, see the module docstring.
+    """
+    if operator == Operator.DIVIDE:
+        if isinstance(right, (int, float)):
+            if right == 0:
+                return None
+        elif not (numpy.all(right) if numpy is not None else all(right)):
+            return None
+
+    if not is_float and not _fits(operator, left, right):
+        return None
+
+    if numpy is not None:
+        return _numpy_elementwise(operator, left, right, is_float)
+
+    function: Callable[[Number, Number], Number]
+    if not is_float and operator == Operator.DIVIDE:
+        function = _truncating_divide
+    else:
+        function = _PYTHON_OPERATORS[operator]
+
+    numbers = list(map(function, _operands(left), _operands(right)))
+
+    return array("d" if is_float else "q", numbers)
+
+
+def _operands(value: Union[NumericArray, Number]) -> Iterable[Number]:
+    # A single number is the operand at every index
+    return repeat(value) if isinstance(value, (int, float)) else value
+
+
+# On NumPy arrays these compare elementwise, and give an array of booleans
+_PYTHON_COMPARISONS: Dict[Operator, Callable[[Any, Any], Any]] = {
+    Operator.EQUAL: eq,
+    Operator.LESS_THAN: lt,
+    Operator.GREATER_THAN: gt,
+}
+
+
+def compare(operator: Operator, left: Union[NumericArray, Number],
+            right: Union[NumericArray, Number]) -> Sequence[bool]:
+    """Compares elementwise like `elementwise`, giving a mask for `select`."""
+    function = _PYTHON_COMPARISONS[operator]
+    if numpy is not None:
+        return function(left, right)
+
+    return list(map(function, _operands(left), _operands(right)))
+
+
+def select(data: NumericArray, mask: Sequence[bool]) -> NumericArray:
+    """The elements where the mask is true."""
+    if numpy is not None:
+        return data[numpy.asarray(mask, dtype=bool)]
+
+    return array(data.typecode, compress(data, mask))
+
+
+def _fits(operator: Operator, left: Union[NumericArray, Number],
+          right: Union[NumericArray, Number]) -> bool:
+    left_bound = abs(left) if isinstance(left, int) else _bound(left)
+    right_bound = abs(right) if isinstance(right, int) else _bound(right)
+
+    match operator:
+        case Operator.ADD | Operator.SUBTRACT:
+            return left_bound + right_bound <= INT_MAX
+        case Operator.MULTIPLY:
+            return left_bound * right_bound <= INT_MAX
+        case Operator.DIVIDE:
+            return True
+
+    return False
+
+
+def _numpy_elementwise(operator: Operator, left: Union[NumericArray, Number],
+                       right: Union[NumericArray, Number], is_float: bool) -> NumericArray:
+    match operator:
+        case Operator.ADD:
+            return numpy.add(left, right)
+        case Operator.SUBTRACT:
+            return numpy.subtract(left, right)
+        case Operator.MULTIPLY:
+            return numpy.multiply(left, right)
+        case Operator.DIVIDE if is_float:
+            return numpy.true_divide(left, right)
+        case Operator.DIVIDE:
+            return numpy.trunc(numpy.true_divide(left, right)).astype(numpy.int64)
+
+    raise ValueError(f"Not an arithmetic operator: {operator}")
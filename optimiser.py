@@ -0,0 +1,609 @@
+"""
+This module implements the optimisation passes run between the parser
+and the evaluator, and the pass manager that runs them.
+
+A pass takes a Program and returns an equivalent one. Passes never
+change nodes in place: a node that changes is rebuilt, along with the
+nodes above it, so nothing cached on the old nodes (free variables,
+compiled code, ...) goes stale.
+
+The passes are:
+
+- dead-bindings: removes the bindings of a program (the `; name = ...`
+  after its expression) that nothing uses. Only bindings that can't fail
+  are removed, like functions and literals, so an error in an unused
+  binding is still reported.
+- beta-reduction: applies lambdas applied in place to a literal or a
+  name, e.g. `(x -> x + 1) 2` becomes `2 + 1` and `(x -> x) e` becomes `e`.
+- inlining: puts the value of a binding that is a literal, or a small
+  non-recursive function, where it's used. A function is only inlined
+  where it's called with a literal or a bound name for each parameter,
+  so the call can be reduced right away, e.g. `f 2 ; f = x -> x * x`
+  becomes `2 * 2`. The arguments of an inlined call can't fail, as they
+  may no longer be evaluated, so inlining doesn't hide an error. A
+  binding is only inlined into the statements that run after it, which
+  are the ones in front of it, so it doesn't hide an unbound name either.
+- sharing: shares identical subtrees, see hash_consing. The other passes
+  build new nodes, so this is run again after them.
+- common-subexpressions: binds a call repeated in a function body (or a
+  binding of the program) to a name, so it's evaluated once, e.g.
+  `f x + f x` becomes `(t -> t + t) (f x)`.
+
+The optimisation levels select the passes:
+
+    PassManager.for_level(2).run(program)
+"""
+
+from __future__ import annotations
+import logging
+import operator
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterator, List, Optional, Sequence, Set, Tuple
+
+from free_variables import UnknownNode, bound_variables, free_variables
+from hash_consing import share_nodes
+from scrapscript_ast import *
+
+# The largest function, in nodes, that is inlined
+INLINE_SIZE = 16
+
+NO_NAMES: FrozenSet[str] = frozenset()
+
+
+def _children(node: Expression) -> Iterator[Tuple[Expression, FrozenSet[str]]]:
+    """The child expressions of a node, with the names the node binds around each."""
+    match node:
+        case InterpolatedTextLiteral():
+            for part in node.parts:
+                if not isinstance(part, str):
+                    yield part, NO_NAMES
+        case UnaryOperation():
+            yield node.expression, NO_NAMES
+        case BinaryOperation():
+            yield node.left, NO_NAMES
+            yield node.right, NO_NAMES
+        case Application():
+            yield node.function, NO_NAMES
+            yield node.argument, NO_NAMES
+        case Function():
+            yield node.body, frozenset((node.parameter.name,))
+        case PatternMatchExpression():
+            for clause in node.clauses:
+                yield clause.body, bound_variables(clause.pattern)
+        case FieldAccess():
+            yield node.record, NO_NAMES
+        case ListLiteral():
+            for element in node.elements:
+                yield element, NO_NAMES
+        case RecordLiteral():
+            for record_field in node.fields:
+                yield record_field.value, NO_NAMES
+            if node.spread is not None:
+                yield node.spread, NO_NAMES
+        case VariantConstruction():
+            for argument in node.arguments:
+                yield argument, NO_NAMES
+
+
+def _replace(node: Expression, children: List[Expression]) -> Expression:
+    """A new node like `node`, with new children in the order of `_children`."""
+    match node:
+        case Identifier():
+            return Identifier(node.name)
+        case Atom():
+            return Atom(node.value)
+        case HashReference():
+            return HashReference(node.digest)
+        case InterpolatedTextLiteral():
+            remaining = iter(children)
+            return InterpolatedTextLiteral(node.value, parts=[
+                part if isinstance(part, str) else next(remaining) for part in node.parts])
+        case IntegerLiteral():
+            return IntegerLiteral(node.value)
+        case FloatLiteral():
+            return FloatLiteral(node.value)
+        case TextLiteral():
+            return TextLiteral(node.value)
+        case HexLiteral():
+            return HexLiteral(node.value)
+        case Base64Literal():
+            return Base64Literal(node.value)
+        case UnaryOperation():
+            return UnaryOperation(children[0], node.operator)
+        case BinaryOperation():
+            return BinaryOperation(children[0], children[1], node.operator)
+        case Application():
+            return Application(children[0], children[1])
+        case Function():
+            return Function(Identifier(node.parameter.name), children[0])
+        case PatternMatchExpression():
+            return PatternMatchExpression([
+                PatternClause(clause.pattern, body) for clause, body in zip(node.clauses, children)])
+        case FieldAccess():
+            return FieldAccess(children[0], node.name)
+        case ListLiteral():
+            return ListLiteral(children)
+        case RecordLiteral():
+            fields = [RecordField(record_field.name, value)
+                      for record_field, value in zip(node.fields, children)]
+            return RecordLiteral(fields, children[-1] if node.spread is not None else None)
+        case VariantConstruction():
+            return VariantConstruction(Identifier(node.type_name.name),
+                                       Identifier(node.variant_name.name), children)
+
+    raise UnknownNode(f"Can't rebuild <{type(node).__name__}>")
+
+
+def _copy(node: Expression) -> Expression:
+    return _replace(node, [_copy(child) for child, _ in _children(node)])
+
+
+def count_nodes(program: Program) -> int:
+    """The number of different nodes of a program, a node shared by several places counts once."""
+    seen: Set[int] = set()
+    count = 0
+    stack: List[Expression] = []
+    for statement in program.declarations:
+        count += 1
+        match statement:
+            case ExpressionStatement():
+                stack.append(statement.expression)
+            case FunctionDefinitionStatement():
+                stack.append(statement.body)
+
+    while stack:
+        node = stack.pop()
+        if id(node) not in seen:
+            seen.add(id(node))
+            count += 1
+            stack.extend(child for child, _ in _children(node))
+
+    return count
+
+
+def _is_pure(node: Expression) -> bool:
+    """Can evaluating the node neither fail nor take long?"""
+    match node:
+        case Function() | PatternMatchExpression() | Atom():
+            return True
+        case InterpolatedTextLiteral():
+            return False
+        case Literal():
+            return True
+        case ListLiteral():
+            return all(_is_pure(element) for element in node.elements)
+        case RecordLiteral():
+            return node.spread is None and all(_is_pure(record_field.value)
+                                               for record_field in node.fields)
+
+    return False
+
+
+def _is_trivial(node: Expression) -> bool:
+    """Is the node cheap enough to evaluate in several places instead of once?"""
+    return isinstance(node, (Identifier, Atom)) \
+        or isinstance(node, Literal) and not isinstance(node, InterpolatedTextLiteral)
+
+
+class _Captured(Exception):
+    """Raised when a substitution would put a name where it's bound to something else."""
+
+
+def _substitute(node: Expression, replacements: Dict[str, Expression]) -> Expression:
+    """A copy of the node with the free uses of some names replaced."""
+    if isinstance(node, Identifier) and node.name in replacements:
+        return _copy(replacements[node.name])
+
+    children: List[Expression] = []
+    for child, names in _children(node):
+        active = replacements
+        if names:
+            active = {name: value for name, value in replacements.items() if name not in names}
+            used = free_variables(child)
+            if any(name in used and names & free_variables(value)
+                   for name, value in active.items()):
+                raise _Captured()
+
+        children.append(_substitute(child, active))
+
+    return _replace(node, children)
+
+
+def _parameters(function: Function) -> Tuple[List[str], Expression]:
+    """The parameters and the innermost body of `a -> b -> ...`."""
+    parameters = [function.parameter.name]
+    body = function.body
+    while isinstance(body, Function):
+        parameters.append(body.parameter.name)
+        body = body.body
+
+    return parameters, body
+
+
+def _map_statements(program: Program, transform: Callable[[Expression], Expression]) -> Program:
+    return _map_statements_at(program, lambda index, node: transform(node))
+
+
+def _map_statements_at(program: Program, transform: Callable[[int, Expression], Expression]) -> Program:
+    """Like _map_statements, with the index of the statement the expression is in."""
+    declarations: List[Statement] = []
+    for index, statement in enumerate(program.declarations):
+        match statement:
+            case ExpressionStatement():
+                statement = ExpressionStatement(transform(index, statement.expression))
+            case FunctionDefinitionStatement():
+                statement = FunctionDefinitionStatement(statement.name, transform(index, statement.body))
+        declarations.append(statement)
+
+    return Program(declarations)
+
+
+# =====================================================================
+# == Dead binding elimination
+# =====================================================================
+
+def eliminate_dead_bindings(program: Program) -> Program:
+    declarations = program.declarations
+
+    def removable(index: int, statement: FunctionDefinitionStatement) -> bool:
+        # The first statement is the result of the program, even a binding
+        return index > 0 and _is_pure(statement.body)
+
+    definitions: Dict[str, List[Expression]] = {}
+    pending: List[str] = []
+    try:
+        for index, statement in enumerate(declarations):
+            match statement:
+                case FunctionDefinitionStatement() if removable(index, statement):
+                    definitions.setdefault(statement.name, []).append(statement.body)
+                case FunctionDefinitionStatement():
+                    pending.extend(free_variables(statement.body))
+                case ExpressionStatement():
+                    pending.extend(free_variables(statement.expression))
+
+        live: Set[str] = set()
+        while pending:
+            name = pending.pop()
+            if name not in live:
+                live.add(name)
+                for body in definitions.get(name, ()):
+                    pending.extend(free_variables(body))
+    except UnknownNode:
+        return program
+
+    return Program([statement for index, statement in enumerate(declarations)
+                    if not isinstance(statement, FunctionDefinitionStatement)
+                    or not removable(index, statement) or statement.name in live])
+
+
+# =====================================================================
+# == Beta reduction
+# =====================================================================
+
+def reduce_applications(program: Program) -> Program:
+    return _map_statements(program, _reduce)
+
+
+def _reduce(node: Expression) -> Expression:
+    node = _replace(node, [_reduce(child) for child, _ in _children(node)])
+    if isinstance(node, Application) and isinstance(node.function, Function):
+        reduced = _apply(node.function, node.argument)
+        if reduced is not None:
+            return reduced
+
+    return node
+
+
+def _apply(function: Function, argument: Expression) -> Optional[Expression]:
+    """The body of a lambda with the argument in place of the parameter, if that's cheaper."""
+    name = function.parameter.name
+    body = function.body
+    if isinstance(body, Identifier) and body.name == name:
+        return argument
+
+    if name not in free_variables(body):
+        # The argument would only be evaluated to be thrown away
+        return body if _is_pure(argument) else None
+
+    if not _is_trivial(argument):
+        return None
+
+    try:
+        return _substitute(body, {name: argument})
+    except _Captured:
+        return None
+
+
+# =====================================================================
+# == Inlining
+# =====================================================================
+
+def inline_bindings(program: Program) -> Program:
+    # The prelude is imported here, as it imports the evaluator
+    from prelude import BUILTINS
+
+    bodies: Dict[str, List[Expression]] = {}
+    # The statements run from the last to the first, so a name is bound
+    # before the statements in front of its last definition
+    last: Dict[str, int] = {}
+    for index, statement in enumerate(program.declarations):
+        if isinstance(statement, FunctionDefinitionStatement):
+            bodies.setdefault(statement.name, []).append(statement.body)
+            last[statement.name] = index
+
+    # A name bound more than once, or shadowing a builtin, means different
+    # things depending on when it's looked up
+    single = {name: definitions[0] for name, definitions in bodies.items()
+              if len(definitions) == 1 and name not in BUILTINS}
+
+    try:
+        constants = {name: body for name, body in single.items()
+                     if _is_trivial(body) and not isinstance(body, Identifier)}
+        functions = {name: body for name, body in single.items()
+                     if isinstance(body, Function) and _inlinable(name, body, single)}
+    except UnknownNode:
+        return program
+
+    def inline(index: int, node: Expression) -> Expression:
+        # Only the bindings evaluated before the statement, which are the
+        # names bound when it runs (see _inline_call)
+        before = {name for name, position in last.items() if position > index}
+        defined = frozenset(before) | frozenset(BUILTINS)
+        return _inline(node, NO_NAMES, defined,
+                       {name: body for name, body in constants.items() if name in before},
+                       {name: body for name, body in functions.items() if name in before})
+
+    return _map_statements_at(program, inline)
+
+
+def _inlinable(name: str, function: Function, definitions: Dict[str, Expression]) -> bool:
+    parameters, _ = _parameters(function)
+    if len(set(parameters)) != len(parameters):
+        return False
+
+    size = count_nodes(Program([ExpressionStatement(function)]))
+    if size > INLINE_SIZE:
+        return False
+
+    # Not recursive, directly or through other definitions
+    seen: Set[str] = set()
+    pending = list(free_variables(function))
+    while pending:
+        used = pending.pop()
+        if used == name:
+            return False
+        if used not in seen and used in definitions:
+            seen.add(used)
+            pending.extend(free_variables(definitions[used]))
+
+    return True
+
+
+def _inline(node: Expression, bound: FrozenSet[str], defined: FrozenSet[str],
+            constants: Dict[str, Expression], functions: Dict[str, Function]) -> Expression:
+    if isinstance(node, Identifier) and node.name in constants and node.name not in bound:
+        return _copy(constants[node.name])
+
+    if isinstance(node, Application):
+        arguments: List[Expression] = []
+        head: Expression = node
+        while isinstance(head, Application):
+            arguments.append(head.argument)
+            head = head.function
+        arguments.reverse()
+
+        arguments = [_inline(argument, bound, defined, constants, functions) for argument in arguments]
+        if isinstance(head, Identifier) and head.name in functions and head.name not in bound:
+            inlined = _inline_call(functions[head.name], arguments, bound, defined)
+            if inlined is not None:
+                return _inline(inlined, bound, defined, constants, functions)
+
+        result = _inline(head, bound, defined, constants, functions)
+        for argument in arguments:
+            result = Application(result, argument)
+        return result
+
+    return _replace(node, [_inline(child, bound | names, defined, constants, functions)
+                           for child, names in _children(node)])
+
+
+def _inline_call(function: Function, arguments: List[Expression],
+                 bound: FrozenSet[str], defined: FrozenSet[str]) -> Optional[Expression]:
+    parameters, body = _parameters(function)
+    if len(arguments) < len(parameters) or not all(map(_is_trivial, arguments[:len(parameters)])):
+        return None
+
+    # An argument is no longer evaluated if its parameter isn't used (or only
+    # used in a branch that isn't taken), so it must not be able to fail: a
+    # name that isn't bound anywhere would fail
+    if any(isinstance(argument, Identifier) and argument.name not in bound | defined
+           for argument in arguments[:len(parameters)]):
+        return None
+
+    if free_variables(function) & bound:
+        # A name the function uses is bound to something else where it's called
+        return None
+
+    try:
+        result = _substitute(body, dict(zip(parameters, arguments)))
+    except _Captured:
+        return None
+
+    for argument in arguments[len(parameters):]:
+        result = Application(result, argument)
+    return result
+
+
+# =====================================================================
+# == Common subexpression elimination
+# =====================================================================
+
+def eliminate_common_subexpressions(program: Program) -> Program:
+    # Identical subexpressions are then the same node, and easy to count
+    program = share_nodes(program)
+    names = iter(range(1, sys.maxsize))
+    done: Dict[int, Expression] = {}
+    return share_nodes(_map_statements(program, lambda node: _eliminate(node, names, done)))
+
+
+def _strict(node: Expression) -> Iterator[Expression]:
+    """The subexpressions evaluated whenever `node` is, `node` included: all but function bodies."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        if not isinstance(node, (Function, PatternMatchExpression)):
+            stack.extend(child for child, _ in _children(node))
+
+
+def _size(node: Expression) -> int:
+    return 1 + sum(_size(child) for child, _ in _children(node))
+
+
+def _eliminate(node: Expression, names: Iterator[int], done: Dict[int, Expression]) -> Expression:
+    """
+    Binds the calls repeated in `node` (not counting function bodies, which
+    are evaluated in scopes of their own) to names, so they're evaluated
+    once, e.g. `f x + f x` becomes `(t -> t + t) (f x)`.
+    """
+    node = _in_bodies(node, names, done)
+
+    bindings: List[Tuple[str, Expression]] = []
+    while True:
+        counts: Dict[int, int] = {}
+        nodes: Dict[int, Expression] = {}
+        for root in [node, *(value for _, value in bindings)]:
+            for subexpression in _strict(root):
+                counts[id(subexpression)] = counts.get(id(subexpression), 0) + 1
+                nodes[id(subexpression)] = subexpression
+
+        # Only calls are worth a binding (which costs a closure), and
+        # calls can't be told apart from other repeated expressions
+        # without evaluating them
+        candidates = [nodes[key] for key, count in counts.items() if count > 1
+                      and any(isinstance(part, Application) for part in _strict(nodes[key]))]
+        if not candidates:
+            break
+
+        # The largest first, so the value of a binding never refers to the
+        # bindings made before it, which are evaluated inside it
+        target = max(candidates, key=_size)
+        # Identifiers can't start with an underscore, so the name can't
+        # hide one of the program's
+        name = f"_cse{next(names)}"
+
+        node = _replace_strict(node, target, name)
+        bindings = [(name, target)] + [(bound, _replace_strict(value, target, name))
+                                       for bound, value in bindings]
+
+    for name, value in reversed(bindings):
+        node = Application(Function(Identifier(name), node), value)
+    return node
+
+
+def _in_bodies(node: Expression, names: Iterator[int], done: Dict[int, Expression]) -> Expression:
+    """The node with the repeated calls bound in the bodies of the functions in it."""
+    result = done.get(id(node))
+    if result is not None:
+        return result
+
+    match node:
+        case Function():
+            body = _eliminate(node.body, names, done)
+            result = node if body is node.body else Function(Identifier(node.parameter.name), body)
+        case PatternMatchExpression():
+            bodies = [_eliminate(clause.body, names, done) for clause in node.clauses]
+            result = node if all(body is clause.body for body, clause in zip(bodies, node.clauses)) \
+                else PatternMatchExpression([PatternClause(clause.pattern, body)
+                                             for clause, body in zip(node.clauses, bodies)])
+        case _:
+            children = [child for child, _ in _children(node)]
+            replaced = [_in_bodies(child, names, done) for child in children]
+            result = node if all(map(operator.is_, replaced, children)) else _replace(node, replaced)
+
+    done[id(node)] = result
+    return result
+
+
+def _replace_strict(node: Expression, target: Expression, name: str) -> Expression:
+    """The node with `target` replaced by a name, where it's always evaluated."""
+    if node is target:
+        return Identifier(name)
+    if isinstance(node, (Function, PatternMatchExpression)):
+        return node
+
+    children = [child for child, _ in _children(node)]
+    replaced = [_replace_strict(child, target, name) for child in children]
+    return node if all(map(operator.is_, replaced, children)) else _replace(node, replaced)
+
+
+# =====================================================================
+# == Pass manager
+# =====================================================================
+
+@dataclass(frozen=True, slots=True)
+class Pass:
+    name: str
+    run: Callable[[Program], Program]
+
+
+DEAD_BINDINGS = Pass("dead-bindings", eliminate_dead_bindings)
+BETA_REDUCTION = Pass("beta-reduction", reduce_applications)
+INLINING = Pass("inlining", inline_bindings)
+SHARING = Pass("sharing", share_nodes)
+COMMON_SUBEXPRESSIONS = Pass("common-subexpressions", eliminate_common_subexpressions)
+
+# The passes of each optimisation level, in order
+LEVELS: Dict[int, Tuple[Pass, ...]] = {
+    0: (),
+    1: (BETA_REDUCTION, DEAD_BINDINGS, SHARING),
+    2: (INLINING, BETA_REDUCTION, DEAD_BINDINGS, COMMON_SUBEXPRESSIONS),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class PassStatistics:
+    name: str
+    seconds: float
+    nodes_before: int
+    nodes_after: int
+
+
+class PassManager():
+    __slots__ = ("passes", "statistics")
+
+    passes: Sequence[Pass]
+    statistics: List[PassStatistics]
+
+    def __init__(self, passes: Sequence[Pass]):
+        self.passes = passes
+        self.statistics = []
+
+    @classmethod
+    def for_level(cls, level: int) -> PassManager:
+        return cls(LEVELS[level])
+
+    def run(self, program: Program) -> Program:
+        for optimisation in self.passes:
+            before = count_nodes(program)
+            start = time.perf_counter()
+            program = optimisation.run(program)
+            seconds = time.perf_counter() - start
+
+            statistics = PassStatistics(optimisation.name, seconds, before, count_nodes(program))
+            self.statistics.append(statistics)
+            logging.debug("Pass %s took %.2f ms, %s -> %s nodes", statistics.name,
+                          seconds * 1e3, statistics.nodes_before, statistics.nodes_after)
+
+        return program
+
+    def summary(self) -> str:
+        if not self.statistics:
+            return "Passes: none"
+
+        return "Passes: " + ", ".join(
+            f"{statistics.name} {statistics.seconds * 1e3:.2f} ms "
+            f"({statistics.nodes_before} -> {statistics.nodes_after} nodes)"
+            for statistics in self.statistics)
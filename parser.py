@@ -3,13 +3,15 @@ from enum import Enum
 from types import MappingProxyType
 from typing import Dict, Iterable, Iterator, List, Optional
 from enums import Operator
-from lexer import Token, TokenType
+from lexer import Token, TokenType, extract_tokens
 
 from enums import PrecedencePosition
 
 import logging
 
 from scrapscript_ast import *
+from hash_consing import NodeInterner
+from values import Base64Value, HexValue
 
 
 # Used for calculating the precendence of tokens
@@ -20,6 +22,14 @@ OPERATOR_PRECEDENCE: MappingProxyType[PrecedencePosition, MappingProxyType[Token
             TokenType.MINUS: 10,
             TokenType.MULTIPLY: 20,
             TokenType.SLASH: 20,
+            TokenType.DOUBLE_PLUS: 6,
+            TokenType.DOUBLE_EQUALS: 8,
+            TokenType.LESS_THAN: 8,
+            TokenType.GREATER_THAN: 8,
+            TokenType.APPEND: 11,
+            TokenType.RIGHT_ARROW: 5,
+            TokenType.PIPE_APPLY: 4,
+            TokenType.PIPE_FORWARD: 3,
         }),
         PrecedencePosition.PREFIX: MappingProxyType({
             TokenType.MINUS: 100,
@@ -27,16 +37,32 @@ OPERATOR_PRECEDENCE: MappingProxyType[PrecedencePosition, MappingProxyType[Token
     }
 )
 
+# Infix operators that group to the right, e.g. `a ++ b ++ c` is `a ++ (b ++ c)`
+RIGHT_ASSOCIATIVE_OPERATORS: frozenset[TokenType] = frozenset({
+    TokenType.DOUBLE_PLUS,
+    TokenType.RIGHT_ARROW,
+})
+
+# Function application is written as juxtaposition, e.g. `f x`,
+# and binds tighter than all infix operators
+APPLICATION_PRECEDENCE = 40
+
 
 class Parser:
     _current_token: Token
     _next_token: Token
     _token_generator: Iterator[Token]
+    _interner: NodeInterner
+    _share_nodes: bool
 
-    def __init__(self, tokens: Iterable[Token]):
+    def __init__(self, tokens: Iterable[Token], share_nodes: bool = True):
         # Create the generator from the iterable.
         self._token_generator = tokens.__iter__()
 
+        # Shares the identical subtrees of the parsed statements, see hash_consing
+        self._interner = NodeInterner()
+        self._share_nodes = share_nodes
+
         self._eof_token = Token(TokenType.END_OF_FILE, '', 0)
 
         # Initialize the buffer slots to a known, safe state BEFORE they are used.
@@ -79,11 +105,18 @@ class Parser:
 
         statements: List[Statement] = []
 
+        # A file of definitions only starts with a semicolon, with no
+        # expression before it
+        while self.current.token_type == TokenType.SEMI_COLON:
+            self.advance()
+
         # Loop through all tokens
         while self._current_token.token_type != TokenType.END_OF_FILE:
             # Parse the next statement
 
             statement = self.parse_statement()
+            if self._share_nodes:
+                statement = self._interner.intern_statement(statement)
             logging.debug("Found a new statement")
             logging.debug(statement)
             statements.append(statement)
@@ -103,11 +136,10 @@ class Parser:
                 and self.next_token.token_type == TokenType.EQUALS:
             return self.parse_function_definition()
 
+        # name : #a #b ...  or  name : <Type> = <Expression>
         elif self._current_token.token_type == TokenType.IDENTIFIER\
                 and self.next_token.token_type == TokenType.COLON:
-
-            raise NotImplementedError(
-                "Type definition parsing is not implemented yet")
+            return self.parse_type_definition()
 
         else:
             expression = self.parse_expression()
@@ -134,18 +166,54 @@ class Parser:
             TokenType.INTEGER,
             TokenType.FLOAT,
             TokenType.TEXT,
+            TokenType.INTERPOLATED_TEXT,
             TokenType.HEXADECIMAL,
             TokenType.BASE64,
             TokenType.IDENTIFIER,
+            TokenType.ATOM,
+            TokenType.HASH_REFERENCE,
             TokenType.MINUS,
             TokenType.EXCLAMATION_MARK,
             TokenType.START_PARANTHESIS,
             TokenType.PIPE,
-            TokenType.START_CURLY_BRACKETS,  # TODO: This is not actually implemented
+            TokenType.START_CURLY_BRACKETS,
+            TokenType.START_SQUARE_BRACKETS,
+        ]
+
+    @staticmethod
+    def _can_start_argument(token: Token):
+        # Prefix operators and pattern matches can't be passed as arguments
+        # without parenthesis, `f - 1` is a subtraction and not `f (-1)`
+        return token.token_type in [
+            TokenType.INTEGER,
+            TokenType.FLOAT,
+            TokenType.TEXT,
+            TokenType.INTERPOLATED_TEXT,
+            TokenType.HEXADECIMAL,
+            TokenType.BASE64,
+            TokenType.IDENTIFIER,
+            TokenType.ATOM,
+            TokenType.HASH_REFERENCE,
+            TokenType.START_PARANTHESIS,
+            TokenType.START_CURLY_BRACKETS,
+            TokenType.START_SQUARE_BRACKETS,
         ]
 
     def parse_prefix_expression(self) -> Expression:
 
+        expression = self.parse_primary_expression()
+
+        # Field access binds tighter than anything else, e.g. `rec.a.b`
+        while self.current.token_type == TokenType.DOT \
+                and self.next_token.token_type == TokenType.IDENTIFIER:
+            self.advance()
+            expression = FieldAccess(record=expression, name=self.current.lexeme)
+            self.advance()
+
+        return expression
+
+    def parse_primary_expression(self) -> Expression:
+
         if not self._can_start_prefix_expression(self.current):
             raise Exception(
                 f"Prefix expression cannot start with token: {self.current}"
@@ -175,6 +243,16 @@ class Parser:
                 case TokenType.TEXT:
                     # Strip quotation characters
                     return TextLiteral(token.lexeme)
+                case TokenType.INTERPOLATED_TEXT:
+                    return self.parse_interpolated_text(token.lexeme)
+                case TokenType.HEXADECIMAL:
+                    return self.make_hex_literal(token.lexeme)
+                case TokenType.BASE64:
+                    return self.make_base64_literal(token.lexeme)
+                case TokenType.ATOM:
+                    return Atom(token.lexeme[1:])  # Strip the "#"
+                case TokenType.HASH_REFERENCE:
+                    return HashReference(token.lexeme[len("$sha256'"):])
                 case TokenType.START_PARANTHESIS:
                     # Here we have a nested expression.
                     nested_expression = self.parse_expression()
@@ -199,14 +277,66 @@ class Parser:
                     return self.parse_pattern_match_expression()
 
                 case TokenType.START_CURLY_BRACKETS:
-                    raise NotImplementedError(
-                        "Prefix expressions starting with curly brackets is not yet supported"
-                    )
+                    return self.parse_record_expression()
+
+                case TokenType.START_SQUARE_BRACKETS:
+                    return self.parse_list_expression()
 
         logging.debug(
             f"Failed parsing token: {self.current} followed by {self.next_token}")
         raise Exception("Failed parsing prefix")
 
+    def parse_record_expression(self) -> RecordLiteral:
+        # { a = 1, b = "x" } or { ..g, a = 2 }
+        # The opening curly bracket has already been consumed
+        fields: List[RecordField] = []
+        spread: Optional[Expression] = None
+
+        while self.current.token_type != TokenType.END_CURLY_BRACKETS:
+            if self.current.token_type == TokenType.DOT:
+                # Spread of another record, e.g. `..g`
+                self.advance()
+                assert self.current.token_type == TokenType.DOT, "Record spread needs two dots '..'"
+                self.advance()
+                if spread is not None or fields:
+                    raise Exception("A record spread has to come first in the record")
+                spread = self.parse_expression()
+            else:
+                assert self.current.token_type == TokenType.IDENTIFIER, f"{self.current} is not a valid record field name"
+                name = self.current.lexeme
+                self.advance()
+                assert self.current.token_type == TokenType.EQUALS, f"{self.current} needs to be a equals sign '='"
+                self.advance()
+                if any(record_field.name == name for record_field in fields):
+                    raise Exception(f"Duplicate record field '{name}'")
+                fields.append(RecordField(name=name, value=self.parse_expression()))
+
+            if self.current.token_type != TokenType.COMMA:
+                break
+            self.advance()
+
+        assert self.current.token_type == TokenType.END_CURLY_BRACKETS, f"{self.current} needs to be a closing curly bracket '}}'"
+        self.advance()
+
+        return RecordLiteral(fields=fields, spread=spread)
+
+    def parse_list_expression(self) -> ListLiteral:
+        # [1, 2, 3]
+        # The opening square bracket has already been consumed
+        elements: List[Expression] = []
+
+        while self.current.token_type != TokenType.END_SQUARE_BRACKETS:
+            elements.append(self.parse_expression())
+
+            if self.current.token_type != TokenType.COMMA:
+                break
+            self.advance()
+
+        assert self.current.token_type == TokenType.END_SQUARE_BRACKETS, f"{self.current} needs to be a closing square bracket ']'"
+        self.advance()
+
+        return ListLiteral(elements=elements)
+
     def parse_variant_construction(self) -> VariantConstruction:
         # IDENTIFIER::IDENTIFIER expression
         assert self.current.token_type == TokenType.IDENTIFIER
@@ -223,7 +353,7 @@ class Parser:
         # Now parse zero or more parameters, which are expressions
         arguments: List[Expression] = []
 
-        while self._can_start_prefix_expression(self.current):
+        while self._can_start_argument(self.current):
             arguments.append(self.parse_prefix_expression())
 
         return VariantConstruction(type_name=type_name, variant_name=variant_name, arguments=arguments)
@@ -244,30 +374,45 @@ class Parser:
     def parse_pattern_match_clause(self) -> PatternClause:
         # EXPRESSION -> EXPRESSION
 
+        pattern = self.parse_pattern()
+
+        assert self.current.token_type == TokenType.RIGHT_ARROW, f"{self.current} needs to be a right arrow '->'"
+        self.advance()
+
+        body = self.parse_expression()
+
+        return PatternClause(pattern=pattern, body=body)
+
+    def parse_pattern(self) -> Pattern:
+
         pattern: Pattern
 
         match self.current.token_type:
 
             case TokenType.IDENTIFIER:
-                pattern = VariablePattern(identifier=self.current.lexeme)
+                pattern = VariablePattern(identifier=Identifier(self.current.lexeme))
                 self.advance()
 
             case TokenType.UNDERSCORE:
                 pattern = WildcardPattern()
                 self.advance()
 
+            case TokenType.ATOM:
+                # #tag, optionally followed by a pattern for the payload,
+                # e.g. `#ron n` or `#parent #m`
+                tag = self.parse_atom()
+                payload: Optional[Pattern] = None
+                if self.current.token_type != TokenType.RIGHT_ARROW:
+                    payload = self.parse_pattern()
+                pattern = VariantPattern(tag=tag, payload=payload)
+
             # The last valid case is a literal
             case _:
                 literal = self.parse_literal()
                 # parse_literal already runs self.advance(), so we don't have to
                 pattern = LiteralPattern(literal=literal)
 
-        assert self.current.token_type == TokenType.RIGHT_ARROW, f"{self.current} needs to be a right arrow '->'"
-        self.advance()
-
-        body = self.parse_expression()
-
-        return PatternClause(pattern=pattern, body=body)
+        return pattern
 
     def parse_expression(self, precedence: int = 0) -> Expression:
         # Parse a expression. something like "5 + 1" or
@@ -277,20 +422,46 @@ class Parser:
 
         left_term: Expression = self.parse_prefix_expression()
 
-        while precedence < self.get_operator_precedence(self.current.token_type, position=PrecedencePosition.INFIX):
+        while True:
+            if precedence < APPLICATION_PRECEDENCE and self._can_start_argument(self.current):
+                # Function application, `f x y` is `(f x) y`
+                left_term = Application(
+                    function=left_term,
+                    argument=self.parse_prefix_expression()
+                )
+                continue
+
+            if not precedence < self.get_operator_precedence(self.current.token_type, position=PrecedencePosition.INFIX):
+                break
+
             # We have lower precedance than the next expression,
             # parse that expression first!
 
             operator_token = self.current
 
+            operator_precedence = self.get_operator_precedence(
+                operator_token.token_type,
+                position=PrecedencePosition.INFIX
+            )
+            if operator_token.token_type in RIGHT_ASSOCIATIVE_OPERATORS:
+                # Let an operator of the same precedence claim the right term
+                operator_precedence -= 1
+
+            if operator_token.token_type == TokenType.RIGHT_ARROW:
+                # A function, e.g. `x -> x + 1`
+                if not isinstance(left_term, Identifier):
+                    raise Exception(
+                        f"Function parameter needs to be a name, not {left_term}")
+                self.advance()
+                left_term = Function(
+                    parameter=left_term,
+                    body=self.parse_expression(precedence=operator_precedence)
+                )
+                continue
+
             operator = self.parse_operator()
 
-            right_term = self.parse_expression(
-                precedence=self.get_operator_precedence(
-                    operator_token.token_type,
-                    position=PrecedencePosition.INFIX
-                )
-            )
+            right_term = self.parse_expression(precedence=operator_precedence)
 
             # Here we need to wrap the old left term with a new expression,
             # where the right term is the new right term
@@ -316,21 +487,53 @@ class Parser:
                 return Operator.MULTIPLY
             case TokenType.SLASH:
                 return Operator.DIVIDE
+            case TokenType.DOUBLE_PLUS:
+                return Operator.CONCATENATE
+            case TokenType.APPEND:
+                return Operator.APPEND
+            case TokenType.PIPE_APPLY:
+                return Operator.PIPE
+            case TokenType.PIPE_FORWARD:
+                return Operator.COMPOSE
+            case TokenType.DOUBLE_EQUALS:
+                return Operator.EQUAL
+            case TokenType.LESS_THAN:
+                return Operator.LESS_THAN
+            case TokenType.GREATER_THAN:
+                return Operator.GREATER_THAN
 
         raise Exception(
             f"Failed to parse operator, {token.token_type} is not a valid operator!")
 
-    def parse_type_definition(self) -> TypeDefinitionStatment:
+    def parse_type_definition(self) -> Statement:
         name = self.current.lexeme
         assert self.current.token_type == TokenType.IDENTIFIER
         self.advance()
         assert self.current.token_type == TokenType.COLON
         self.advance()
 
+        if self.current.token_type != TokenType.ATOM:
+            return self.parse_annotated_definition(name)
+
         expression = self.parse_type_expression()
 
         return TypeDefinitionStatment(name=Identifier(name=name), body=expression)
 
+    def parse_annotated_definition(self, name: str) -> Statement:
+        # name : <Type> = <Expression>, the annotation is only documentation
+        # (types are inferred), so it's skipped
+        while self.current.token_type not in (TokenType.EQUALS, TokenType.END_OF_FILE):
+            self.advance()
+
+        if self.current.token_type != TokenType.EQUALS:
+            raise Exception(f"Expected a definition after the type of {name}")
+
+        self.advance()
+
+        body = self.parse_expression()
+
+        return FunctionDefinitionStatement(name=name, body=body)
+
     def parse_type_expression(self) -> TypeExpression:
         variants: List[TypeVariant] = []
 
@@ -380,6 +583,53 @@ class Parser:
         self.advance()
         return atom
 
+    @staticmethod
+    def parse_interpolated_text(lexeme: str) -> TextLiteral | InterpolatedTextLiteral:
+        # "hello `name`!" is compiled into the parts ["hello ", name, "!"].
+        # Text literals in the template are folded into the surrounding
+        # chunks, and a template without any other expressions is folded
+        # into a plain text literal.
+        parts: List[Union[str, Expression]] = []
+
+        def add_text(text: str):
+            if parts and isinstance(parts[-1], str):
+                parts[-1] += text
+            elif text:
+                parts.append(text)
+
+        # Every other segment between backticks is an embedded expression
+        for n, segment in enumerate(lexeme[1:-1].split("`")):
+            if n % 2 == 0:
+                add_text(segment)
+                continue
+
+            parser = Parser(extract_tokens([segment]))
+            expression = parser.parse_expression()
+            if parser.current.token_type != TokenType.END_OF_FILE:
+                raise Exception(
+                    f"Unexpected {parser.current} in interpolated text {lexeme}")
+
+            match expression:
+                case TextLiteral():
+                    add_text(expression.text)
+                case _:
+                    parts.append(expression)
+
+        if all(isinstance(part, str) for part in parts):
+            return TextLiteral(f'"{"".join(parts)}"')  # type: ignore[arg-type]
+
+        return InterpolatedTextLiteral(lexeme, parts=parts)
+
+    @staticmethod
+    def make_hex_literal(lexeme: str) -> HexLiteral:
+        # Decode the bytes once while parsing, evaluation then reuses them
+        return HexLiteral(lexeme, cached_value=HexValue.from_lexeme(lexeme))
+
+    @staticmethod
+    def make_base64_literal(lexeme: str) -> Base64Literal:
+        # Large blobs are only decoded when the value is first used
+        return Base64Literal(lexeme, cached_value=Base64Value.from_lexeme(lexeme))
+
     def parse_literal(self) -> Literal:
 
         result: Literal
@@ -392,9 +642,9 @@ class Parser:
             case TokenType.FLOAT:
                 result = FloatLiteral(float(self.current.lexeme))
             case TokenType.HEXADECIMAL:
-                result = HexLiteral(self.current.lexeme)
+                result = self.make_hex_literal(self.current.lexeme)
             case TokenType.BASE64:
-                result = Base64Literal(self.current.lexeme)
+                result = self.make_base64_literal(self.current.lexeme)
             case _:
                 raise Exception(f"Invalid literal: {self.current}")
 
@@ -0,0 +1,202 @@
+"""
+This module implements the persistent vector backing scrapscript lists.
+
+It is a bit-partitioned vector trie in the style of Clojure's vectors:
+elements live in 32-wide leaf nodes at the bottom of a shallow tree, and
+the last (partial) leaf is kept aside as a "tail" so appending rarely
+touches the tree at all. Every operation returns a new vector and older
+versions stay valid, as nodes are never changed once they are shared.
+
+The one exception is the tail: a vector may grow its tail list in place
+when nobody else has grown it yet (the length of the list still matches
+the number of tail elements the vector knows about). Older versions only
+ever look at the first `tail_count` elements, so they are unaffected, and
+repeatedly appending to the newest version never copies the tail.
+"""
+
+from __future__ import annotations
+from typing import Any, Iterable, Iterator, List, Tuple
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+
+class PersistentVector():
+    __slots__ = ("_count", "_shift", "_root", "_tail", "_tail_count")
+
+    _count: int
+    _shift: int
+    _root: List[Any]
+    _tail: List[Any]
+    _tail_count: int
+
+    def __init__(self, count: int = 0, shift: int = BITS, root: List[Any] | None = None,
+                 tail: List[Any] | None = None, tail_count: int = 0):
+        self._count = count
+        self._shift = shift
+        self._root = root if root is not None else []
+        self._tail = tail if tail is not None else []
+        self._tail_count = tail_count
+
+    @staticmethod
+    def from_iterable(values: Iterable[Any]) -> PersistentVector:
+        return EMPTY_VECTOR.extend(values)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("vector index out of range")
+
+        tail_offset = self._count - self._tail_count
+        if index >= tail_offset:
+            return self._tail[index - tail_offset]
+
+        node = self._root
+        level = self._shift
+        while level > 0:
+            node = node[(index >> level) & MASK]
+            level -= BITS
+
+        return node[index & MASK]
+
+    def __iter__(self) -> Iterator[Any]:
+        for leaf in self._leaves():
+            yield from leaf
+        yield from self._tail[:self._tail_count]
+
+    def _leaves(self) -> Iterator[List[Any]]:
+        """Yields the full leaf nodes in the tree, not including the tail."""
+        stack = [(self._root, self._shift)]
+        while stack:
+            node, level = stack.pop()
+            if level == 0:
+                yield node
+            else:
+                stack.extend((child, level - BITS) for child in reversed(node))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PersistentVector):
+            return NotImplemented
+
+        if self._count != other._count:
+            return False
+
+        return all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"PersistentVector({list(self)})"
+
+    def append(self, value: Any) -> PersistentVector:
+        count = self._count
+        tail_count = self._tail_count
+
+        if tail_count < WIDTH:
+            tail = self._tail
+            if len(tail) == tail_count:
+                # Nobody has grown this tail past us yet, we can claim it
+                tail.append(value)
+            else:
+                tail = tail[:tail_count]
+                tail.append(value)
+
+            return PersistentVector(count + 1, self._shift, self._root, tail, tail_count + 1)
+
+        # The tail is full, move it into the tree and start a new one
+        root, shift = _push_tail(count, self._shift, self._root, self._tail)
+        return PersistentVector(count + 1, shift, root, [value], 1)
+
+    def extend(self, values: Iterable[Any]) -> PersistentVector:
+        """Appends all values, only creating a single new vector."""
+        count = self._count
+        shift = self._shift
+        root = self._root
+        tail = self._tail
+        tail_count = self._tail_count
+
+        if len(tail) != tail_count:
+            tail = tail[:tail_count]
+
+        for value in values:
+            if tail_count == WIDTH:
+                root, shift = _push_tail(count, shift, root, tail)
+                tail = []
+                tail_count = 0
+
+            tail.append(value)
+            tail_count += 1
+            count += 1
+
+        if count == self._count:
+            return self
+
+        return PersistentVector(count, shift, root, tail, tail_count)
+
+    def concatenate(self, other: PersistentVector) -> PersistentVector:
+        if other._count == 0:
+            return self
+        if self._count == 0:
+            return other
+
+        count = self._count
+        shift = self._shift
+        root = self._root
+        tail = self._tail
+        tail_count = self._tail_count
+
+        if tail_count == WIDTH:
+            root, shift = _push_tail(count, shift, root, tail)
+            tail = []
+            tail_count = 0
+
+        if tail_count == 0:
+            # We are aligned on a leaf boundary, so the full leaves of the
+            # other vector can be shared as they are instead of copied.
+            for leaf in other._leaves():
+                count += WIDTH
+                root, shift = _push_tail(count, shift, root, leaf)
+
+            return PersistentVector(count, shift, root, tail, tail_count) \
+                .extend(other._tail[:other._tail_count])
+
+        return PersistentVector(count, shift, root, tail, tail_count).extend(other)
+
+
+def _push_tail(count: int, shift: int, root: List[Any], tail: List[Any]) -> Tuple[List[Any], int]:
+    """
+    Moves a full leaf into the tree. `count` is the number of elements in
+    the vector including the leaf. Returns the new root and shift.
+    """
+    # When the root is full, the tree grows by one level
+    if ((count - 1) >> BITS) >= (1 << shift):
+        return [root, _new_path(shift, tail)], shift + BITS
+
+    return _push_leaf(count - 1, shift, root, tail), shift
+
+
+def _push_leaf(index: int, level: int, parent: List[Any], leaf: List[Any]) -> List[Any]:
+    node = list(parent)
+    sub_index = (index >> level) & MASK
+
+    if level == BITS:
+        node.append(leaf)
+    elif sub_index < len(parent):
+        node[sub_index] = _push_leaf(index, level - BITS, parent[sub_index], leaf)
+    else:
+        node.append(_new_path(level - BITS, leaf))
+
+    return node
+
+
+def _new_path(level: int, leaf: List[Any]) -> List[Any]:
+    if level == 0:
+        return leaf
+
+    return [_new_path(level - BITS, leaf)]
+
+
+EMPTY_VECTOR = PersistentVector()
@@ -0,0 +1,379 @@
+"""
+This module defines the builtin functions available to every program,
+e.g. `text/repeat` or `list/map`.
+
+Builtins are implemented natively, working directly on the Python
+representation of the values (`str.join`, `str * n`, ...) instead of
+being written in scrapscript itself. They are registered with the
+`builtin` decorator and live in the prelude scope, which is the parent
+of the root scope of every program.
+"""
+
+from __future__ import annotations
+from functools import cmp_to_key, partial
+from itertools import islice, repeat
+from typing import Callable, Dict, Iterable, Optional, Type, TypeVar
+
+from evaluator import apply_function, call_function, filter_elementwise, map_elementwise
+from enums import Operator
+from exceptions import ScrapEvalError, ScrapTypeError
+from persistent_vector import PersistentVector
+from protocols import Comparable
+from scope import Scope
+from values import (
+    BuiltinFunction,
+    BytesValue,
+    FloatValue,
+    IntegerValue,
+    LIST_TYPES,
+    SEQUENCE_TYPES,
+    ListValue,
+    NumericListValue,
+    RecordListValue,
+    SequenceValue,
+    StreamValue,
+    TextValue,
+    Value,
+    FALSE,
+    TRUE,
+    arithmetic,
+    integer,
+    make_list,
+)
+
+BUILTINS: Dict[str, BuiltinFunction] = {}
+
+V = TypeVar("V", bound=Value)
+
+
+def builtin(name: str, arity: int) -> Callable[[Callable[..., Value]], Callable[..., Value]]:
+    """Registers a Python function as the builtin `name` taking `arity` arguments."""
+    def register(function: Callable[..., Value]) -> Callable[..., Value]:
+        BUILTINS[name] = BuiltinFunction(name=name, arity=arity, function=function)
+        return function
+
+    return register
+
+
+def expect(value: Value, expected: Type[V], name: str) -> V:
+    if not isinstance(value, expected):
+        raise ScrapTypeError(
+            f"{name} expected <{expected.__name__}>, got <{type(value).__name__}>")
+
+    return value
+
+
+def elements(values: Value, name: str) -> Iterable[Value]:
+    """The elements of any kind of list, without materialising a stream."""
+    if not isinstance(values, LIST_TYPES):
+        raise ScrapTypeError(
+            f"{name} expected a list, got <{type(values).__name__}>")
+
+    return values
+
+
+def as_stream(values: Value, name: str) -> StreamValue:
+    if isinstance(values, StreamValue):
+        return values
+
+    list_value = elements(values, name)
+    return StreamValue(lambda: list_value)
+
+
+def compare(left: Value, right: Value) -> int:
+    if not isinstance(left, Comparable) or not isinstance(right, Comparable):
+        raise ScrapTypeError(
+            f"Cannot compare <{type(left).__name__}> and <{type(right).__name__}> values")
+
+    return -1 if left.less_than(right) else 1 if right.less_than(left) else 0
+
+
+def is_true(value: Value, name: str) -> bool:
+    if value == TRUE:
+        return True
+    if value == FALSE:
+        return False
+
+    raise ScrapTypeError(f"{name} expected #true or #false, got {value}")
+
+
+_prelude: Optional[Scope] = None
+
+
+def prelude_scope() -> Scope:
+    """The scope holding all builtins, created once and shared by all programs."""
+    global _prelude
+
+    if _prelude is None:
+        _prelude = Scope()
+        for name, function in BUILTINS.items():
+            _prelude.put(name, function)
+
+    return _prelude
+
+
+# =====================================================================
+# == Text
+# =====================================================================
+
+@builtin("text/length", arity=1)
+def text_length(text: Value) -> Value:
+    # The length of a rope is cached, so this doesn't flatten it
+    return integer(len(expect(text, TextValue, "text/length")))
+
+
+@builtin("text/repeat", arity=2)
+def text_repeat(count: Value, text: Value) -> Value:
+    times = expect(count, IntegerValue, "text/repeat").value
+    return TextValue(expect(text, TextValue, "text/repeat").value * max(times, 0))
+
+
+@builtin("text/join", arity=2)
+def text_join(separator: Value, texts: Value) -> Value:
+    return TextValue(expect(separator, TextValue, "text/join").value.join(
+        [expect(text, TextValue, "text/join").value
+         for text in elements(texts, "text/join")]
+    ))
+
+
+BUILTINS["string/join"] = BuiltinFunction(name="string/join", arity=2, function=text_join)
+
+
+@builtin("text/concat", arity=1)
+def text_concat(texts: Value) -> Value:
+    return TextValue("".join(
+        [expect(text, TextValue, "text/concat").value
+         for text in elements(texts, "text/concat")]
+    ))
+
+
+@builtin("text/split", arity=2)
+def text_split(separator: Value, text: Value) -> Value:
+    parts = expect(text, TextValue, "text/split").value.split(
+        expect(separator, TextValue, "text/split").value)
+    return ListValue.from_iterable(TextValue(part) for part in parts)
+
+
+@builtin("text/upper", arity=1)
+def text_upper(text: Value) -> Value:
+    return TextValue(expect(text, TextValue, "text/upper").value.upper())
+
+
+@builtin("text/lower", arity=1)
+def text_lower(text: Value) -> Value:
+    return TextValue(expect(text, TextValue, "text/lower").value.lower())
+
+
+# =====================================================================
+# == Lists
+# =====================================================================
+#
+# Lists are either eager ListValues or lazy StreamValues. The builtins
+# producing lists return streams, and the ones consuming them iterate
+# them in a single pass without materialising them. Lists of numbers are
+# eager NumericListValues, which most builtins handle on the array.
+
+@builtin("list/length", arity=1)
+def list_length(values: Value) -> Value:
+    if isinstance(values, SEQUENCE_TYPES):
+        return integer(len(values))
+
+    return integer(sum(1 for _ in elements(values, "list/length")))
+
+
+@builtin("list/range", arity=2)
+def list_range(start: Value, stop: Value) -> Value:
+    numbers = range(expect(start, IntegerValue, "list/range").value,
+                    expect(stop, IntegerValue, "list/range").value)
+    return StreamValue(lambda: map(integer, numbers))
+
+
+@builtin("list/repeat", arity=2)
+def list_repeat(count: Value, value: Value) -> Value:
+    times = max(expect(count, IntegerValue, "list/repeat").value, 0)
+    return StreamValue(lambda: repeat(value, times))
+
+
+@builtin("list/take", arity=2)
+def list_take(count: Value, values: Value) -> Value:
+    limit = max(expect(count, IntegerValue, "list/take").value, 0)
+    source = elements(values, "list/take")
+    return StreamValue(lambda: islice(source, limit))
+
+
+@builtin("list/get", arity=2)
+def list_get(index: Value, values: Value) -> Value:
+    position = expect(index, IntegerValue, "list/get").value
+    try:
+        if isinstance(values, SEQUENCE_TYPES):
+            return values[position]
+
+        if position >= 0:
+            return next(islice(elements(values, "list/get"), position, None))
+    except (IndexError, StopIteration):
+        pass
+
+    raise ScrapEvalError(f"list/get index {position} is out of range")
+
+
+@builtin("list/reverse", arity=1)
+def list_reverse(values: Value) -> Value:
+    if isinstance(values, NumericListValue):
+        return values.reverse()
+
+    return make_list(reversed(list(elements(values, "list/reverse"))))
+
+
+@builtin("list/sort", arity=1)
+def list_sort(values: Value) -> Value:
+    if isinstance(values, NumericListValue):
+        return values.sort()
+
+    return make_list(sorted(elements(values, "list/sort"), key=cmp_to_key(compare)))
+
+
+@builtin("list/sum", arity=1)
+def list_sum(values: Value) -> Value:
+    if isinstance(values, NumericListValue):
+        return values.sum()
+
+    total: Optional[Value] = None
+    for value in elements(values, "list/sum"):
+        total = value if total is None else arithmetic(Operator.ADD, total, value)
+
+    return total if total is not None else integer(0)
+
+
+@builtin("list/concat", arity=1)
+def list_concat(lists: Value) -> Value:
+    all_lists = list(elements(lists, "list/concat"))
+    numeric = [values for values in all_lists if isinstance(values, NumericListValue)]
+    if numeric and len(numeric) == len(all_lists):
+        # Stays a numeric list if they all have the same kind of numbers
+        result: SequenceValue = numeric[0]
+        for other in numeric[1:]:
+            result = result.concatenate(other)
+        return result
+
+    vector = PersistentVector()
+    for values in all_lists:
+        if isinstance(values, ListValue):
+            vector = vector.concatenate(values.elements)
+        else:
+            vector = vector.extend(elements(values, "list/concat"))
+
+    return ListValue(vector)
+
+
+@builtin("list/map", arity=2)
+def list_map(function: Value, values: Value) -> Value:
+    if isinstance(values, (NumericListValue, RecordListValue)):
+        # Arithmetic lambdas and field reads run on whole arrays at once
+        result = map_elementwise(function, values)
+        if result is not None:
+            return result
+
+    return as_stream(values, "list/map").map(partial(apply_function, function))
+
+
+@builtin("list/filter", arity=2)
+def list_filter(predicate: Value, values: Value) -> Value:
+    if isinstance(values, (NumericListValue, RecordListValue)):
+        result = filter_elementwise(predicate, values)
+        if result is not None:
+            return result
+
+    return as_stream(values, "list/filter").filter(
+        lambda value: is_true(apply_function(predicate, value), "list/filter"))
+
+
+@builtin("list/fold", arity=3)
+def list_fold(function: Value, initial: Value, values: Value) -> Value:
+    # A left fold, `list/fold f a [x, y]` is `f (f a x) y`
+    accumulator = initial
+    for value in elements(values, "list/fold"):
+        accumulator = call_function(function, (accumulator, value))
+
+    return accumulator
+
+
+# =====================================================================
+# == Bytes
+# =====================================================================
+
+@builtin("bytes/length", arity=1)
+def bytes_length(data: Value) -> Value:
+    return integer(len(expect(data, BytesValue, "bytes/length")))
+
+
+@builtin("bytes/slice", arity=3)
+def bytes_slice(start: Value, stop: Value, data: Value) -> Value:
+    # A view into the same buffer, nothing is copied
+    return expect(data, BytesValue, "bytes/slice").slice(
+        expect(start, IntegerValue, "bytes/slice").value,
+        expect(stop, IntegerValue, "bytes/slice").value,
+    )
+
+
+@builtin("bytes/join", arity=1)
+def bytes_join(values: Value) -> Value:
+    # Every piece is copied exactly once, into the joined result
+    return BytesValue(b"".join(
+        [expect(data, BytesValue, "bytes/join").data
+         for data in elements(values, "bytes/join")]
+    ))
+
+
+@builtin("bytes/from_text", arity=1)
+def bytes_from_text(text: Value) -> Value:
+    return BytesValue(expect(text, TextValue, "bytes/from_text").value.encode("utf-8"))
+
+
+@builtin("bytes/to_text", arity=1)
+def bytes_to_text(data: Value) -> Value:
+    try:
+        return TextValue(str(expect(data, BytesValue, "bytes/to_text").data, "utf-8"))
+    except UnicodeDecodeError as e:
+        raise ScrapEvalError(f"bytes/to_text got invalid UTF-8: {e}")
+
+
+# =====================================================================
+# == Numbers
+# =====================================================================
+
+@builtin("int/abs", arity=1)
+def int_abs(number: Value) -> Value:
+    return integer(abs(expect(number, IntegerValue, "int/abs").value))
+
+
+@builtin("int/min", arity=2)
+def int_min(left: Value, right: Value) -> Value:
+    return integer(min(expect(left, IntegerValue, "int/min").value,
+                   expect(right, IntegerValue, "int/min").value))
+
+
+@builtin("int/max", arity=2)
+def int_max(left: Value, right: Value) -> Value:
+    return integer(max(expect(left, IntegerValue, "int/max").value,
+                   expect(right, IntegerValue, "int/max").value))
+
+
+@builtin("int/to_float", arity=1)
+def int_to_float(number: Value) -> Value:
+    return FloatValue(float(expect(number, IntegerValue, "int/to_float").value))
+
+
+@builtin("int/to_text", arity=1)
+def int_to_text(number: Value) -> Value:
+    return TextValue(str(expect(number, IntegerValue, "int/to_text").value))
+
+
+@builtin("float/abs", arity=1)
+def float_abs(number: Value) -> Value:
+    return FloatValue(abs(expect(number, FloatValue, "float/abs").value))
+
+
+@builtin("float/to_int", arity=1)
+def float_to_int(number: Value) -> Value:
+    # Rounds towards zero, like integer division does
+    return integer(int(expect(number, FloatValue, "float/to_int").value))
@@ -0,0 +1,162 @@
+"""
+This module implements an on-disk cache of parsed programs, so running an
+unchanged script again skips lexing and parsing, like Python's .pyc files.
+
+A cached program is stored under the hash of its source, the optimisation
+level it was compiled with, and the interpreter version (the hash of the
+modules that turn source into a tree), so changing any of them misses
+the cache instead of loading a stale tree:
+
+    cache = ProgramCache(default_cache_directory())
+    program = cache.load(source, level)
+    if program is None:
+        program = compile_program(source, level)
+        cache.store(source, level, program)
+
+Programs are written with pickle, but only the fields that make up a node
+are saved, not its caches (which may hold compiled code, and are rebuilt
+on the first run anyway). Shared nodes stay shared, as the pickler writes
+every object once. Loading only builds nodes, an entry naming any other
+function or class is rejected. See disk_cache for how entries are stored and evicted.
+"""
+
+from __future__ import annotations
+import dataclasses
+import hashlib
+import io
+import logging
+import pickle
+from typing import Any, List, Optional, Tuple
+
+from disk_cache import DiskCache, hash_modules
+from scrapscript_ast import InterpolatedTextLiteral, Program
+
+# The modules that decide what tree a source becomes: the ones the parser
+# and the optimiser import (see test_compiler_modules_cover_the_compiler).
+# The optimiser looks up the builtins, which brings in the evaluator
+COMPILER_MODULES = ("lexer.py", "parser.py", "scrapscript_ast.py", "enums.py",
+                    "hash_consing.py", "optimiser.py", "program_cache.py", "free_variables.py",
+                    "prelude.py", "evaluator.py", "values.py", "numeric_array.py", "result_cache.py",
+                    "tiering.py", "quickening.py", "scope.py", "rope.py", "persistent_vector.py",
+                    "protocols.py", "exceptions.py", "scrapyard.py", "disk_cache.py")
+
+_version: Optional[str] = None
+
+
+def interpreter_version() -> str:
+    """A hash of the interpreter code that builds trees."""
+    global _version
+    if _version is None:
+        _version = hash_modules(COMPILER_MODULES)
+
+    return _version
+
+
+def _rebuild(cls: type, values: Tuple[Any, ...]) -> Any:
+    return cls(*values)
+
+
+def _rebuild_interpolated(value: str, parts: List[Any]) -> InterpolatedTextLiteral:
+    return InterpolatedTextLiteral(value, parts=parts)
+
+
+class _TreePickler(pickle.Pickler):
+    def reducer_override(self, obj: Any) -> Any:
+        if isinstance(obj, InterpolatedTextLiteral):
+            # The parts are parsed from the text, and needed to evaluate it
+            return _rebuild_interpolated, (obj.value, obj.parts)
+
+        if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            # Only the fields passed to the constructor, not the caches
+            return _rebuild, (type(obj), tuple(getattr(obj, field.name)
+                                                for field in dataclasses.fields(obj)
+                                                if field.compare))
+
+        return NotImplemented
+
+
+def dump_tree(node: Any) -> bytes:
+    """The serialised form of a tree."""
+    buffer = io.BytesIO()
+    _TreePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(node)
+    return buffer.getvalue()
+
+
+# The modules whose classes a tree is made of
+_TREE_MODULES = ("scrapscript_ast", "enums")
+
+
+class _TreeUnpickler(pickle.Unpickler):
+    # The cache directory may be written by someone else, so an entry may
+    # only rebuild nodes, not call whatever function it names
+    def find_class(self, module: str, name: str) -> Any:
+        if module == __name__ and name in ("_rebuild", "_rebuild_interpolated"):
+            return super().find_class(module, name)
+
+        if module in _TREE_MODULES and "." not in name:
+            cls = super().find_class(module, name)
+            if isinstance(cls, type) and cls.__module__ == module:
+                return cls
+
+        raise pickle.UnpicklingError(f"Not part of a tree: {module}.{name}")
+
+
+def load_tree(data: bytes) -> Any:
+    """The tree serialised by dump_tree. Raises pickle.UnpicklingError if it's something else."""
+    return _TreeUnpickler(io.BytesIO(data)).load()
+
+
+def dump_program(program: Program) -> bytes:
+    """The serialised form of a program."""
+    return dump_tree(program)
+
+
+def load_program(data: bytes) -> Program:
+    program = load_tree(data)
+    if not isinstance(program, Program):
+        raise TypeError(f"Not a cached program: {type(program).__name__}")
+    return program
+
+
+class ProgramCache(DiskCache):
+    __slots__ = ()
+
+    suffix = ".scrapc"
+
+    def key(self, source: str, level: int) -> str:
+        digest = hashlib.sha256(interpreter_version().encode())
+        digest.update(f"-O{level}\0".encode())
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def load(self, source: str, level: int = 0) -> Optional[Program]:
+        """The cached program of `source`, or None if it isn't cached (or can't be read)."""
+        key = self.key(source, level)
+        data = self.read(key)
+        if data is None:
+            self.misses += 1
+            return None
+
+        try:
+            program = load_program(data)
+        except Exception as e:
+            # A corrupt entry is a miss, and is replaced by the next store
+            logging.debug("Ignoring unreadable cache entry %s: %s", self.path(key), e)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return program
+
+    def store(self, source: str, level: int, program: Program) -> None:
+        """Caches the program of `source`."""
+        try:
+            data = dump_program(program)
+        except (pickle.PicklingError, RecursionError) as e:
+            logging.debug("Couldn't cache the program: %s", e)
+            return
+
+        self.write(self.key(source, level), data)
+
+    def summary(self) -> str:
+        return f"Program cache: {self.hits} hits, {self.misses} misses ({self.directory})"
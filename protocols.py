@@ -25,6 +25,8 @@ if TYPE_CHECKING:
 
 class Addable(ABC):
     """An interface for objects that support the '+' operation."""
+    __slots__ = ()
+
     @abstractmethod
     def add(self, other: Value) -> Value:
         pass
@@ -32,6 +34,8 @@ class Addable(ABC):
 
 class Subtractable(ABC):
     """An interface for objects that support the '-' operation."""
+    __slots__ = ()
+
     @abstractmethod
     def subtract(self, other: Value) -> Value:
         pass
@@ -39,6 +43,8 @@ class Subtractable(ABC):
 
 class Multipliable(ABC):
     """An interface for objects that support the '*' operation."""
+    __slots__ = ()
+
     @abstractmethod
     def multiply(self, other: Value) -> Value:
         pass
@@ -46,6 +52,8 @@ class Multipliable(ABC):
 
 class Dividable(ABC):
     """An interface for objects that support the '/' operation."""
+    __slots__ = ()
+
     @abstractmethod
     def divide(self, other: Value) -> Value:
         pass
@@ -53,6 +61,8 @@ class Dividable(ABC):
 
 class Negatable(ABC):
     """An interface for object supporting to be negated, e.g - 3"""
+    __slots__ = ()
+
 
     @abstractmethod
     def negate(self) -> Value:
@@ -68,6 +78,8 @@ class Concatenatable(ABC):
     An interface for objects that support the '++' operation (concatenation),
     typically used to combine two collections of the same type.
     """
+    __slots__ = ()
+
     @abstractmethod
     def concatenate(self, other: Value) -> Value:
         pass
@@ -78,6 +90,8 @@ class Appendable(ABC):
     An interface for objects that support the '+<' operation (appending an element),
     typically used to add an element to the end of a collection.
     """
+    __slots__ = ()
+
     @abstractmethod
     def append(self, other: Value) -> Value:
         pass
@@ -128,3 +142,15 @@ class Appendable(ABC):
 #         # `a >= b` is the same as `not (a < b)`.
 #         return BooleanValue(not self.less_than(other).value)
 #
+
+
+class Comparable(ABC):
+    """
+    An interface for objects that can be ordered ('<' and '>'). The
+    evaluator turns the result into a `#true` or `#false` variant.
+    """
+    __slots__ = ()
+
+    @abstractmethod
+    def less_than(self, other: Value) -> bool:
+        pass
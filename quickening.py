@@ -0,0 +1,172 @@
+"""
+This module implements the adaptive specialisation ("quickening") of AST
+nodes, modelled on CPython's specialising interpreter.
+
+The first time a node runs, it records what it saw and rewrites itself
+into a fast variant guarded by a cheap check:
+
+- A BinaryOperation on two integers (or two floats) remembers the
+  operand type and the operation for it, e.g. int + int. Next time, if
+  both operands have that type again, the operation runs directly,
+  without the protocol checks and dispatch of the generic path.
+- An Identifier remembers how many scopes up its name was found. Next
+  time it goes straight there, only checking that the scopes it passes
+  still don't bind the name (a global can be defined after a function
+  first looked the name up in the prelude), instead of asking each scope
+  in turn through Scope.get.
+
+When a guard fails the node goes back to the generic version, and
+specialises again the next time it runs. A node that keeps failing its
+guards (or can't be specialised at all) gives up after ADAPTIVE_LIMIT
+tries, so operations on mixed types don't keep paying for the attempts.
+
+`METRICS` counts the hits and misses of the guards, e.g.
+
+    METRICS.reset()
+    evaluate_program(program)
+    print(METRICS.summary())
+"""
+
+from __future__ import annotations
+from operator import eq, gt, lt
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from enums import Operator
+from exceptions import ScrapNameError
+from scope import Scope
+from scrapscript_ast import BinaryOperation, Identifier
+from values import (
+    FloatValue,
+    IntegerValue,
+    UNCHECKED_FLOAT_OPERATIONS,
+    UNCHECKED_INTEGER_OPERATIONS,
+    Value,
+    to_boolean,
+)
+
+# How many times a node may fail to specialise before it stays generic
+ADAPTIVE_LIMIT = 8
+
+
+def _comparison(compare: Callable[[Any, Any], bool]) -> Callable[[Any, Any], Value]:
+    return lambda left, right: to_boolean(compare(left.value, right.value))
+
+
+# (operator, operand type) -> the operation without type checks
+SPECIALISATIONS: Dict[Tuple[Operator, type], Callable[[Any, Any], Value]] = {
+    **{(operator, IntegerValue): operation
+       for operator, operation in UNCHECKED_INTEGER_OPERATIONS.items()},
+    **{(operator, FloatValue): operation
+       for operator, operation in UNCHECKED_FLOAT_OPERATIONS.items()},
+    **{(operator, operand_type): _comparison(compare)
+       for operator, compare in ((Operator.EQUAL, eq), (Operator.LESS_THAN, lt), (Operator.GREATER_THAN, gt))
+       for operand_type in (IntegerValue, FloatValue)},
+}
+
+
+class QuickeningMetrics():
+    __slots__ = ("operation_hits", "operation_misses", "operation_specialisations",
+                 "identifier_hits", "identifier_misses", "identifier_specialisations")
+
+    operation_hits: int
+    operation_misses: int
+    operation_specialisations: int
+    identifier_hits: int
+    identifier_misses: int
+    identifier_specialisations: int
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.operation_hits = 0
+        self.operation_misses = 0
+        self.operation_specialisations = 0
+        self.identifier_hits = 0
+        self.identifier_misses = 0
+        self.identifier_specialisations = 0
+
+    @staticmethod
+    def _rate(hits: int, misses: int) -> str:
+        return f"{hits / (hits + misses):.1%}" if hits + misses else "-"
+
+    def summary(self) -> str:
+        return (f"Quickening: operations {self.operation_hits} hits, {self.operation_misses} misses "
+                f"({self._rate(self.operation_hits, self.operation_misses)} hit rate), "
+                f"{self.operation_specialisations} specialised; "
+                f"identifiers {self.identifier_hits} hits, {self.identifier_misses} misses "
+                f"({self._rate(self.identifier_hits, self.identifier_misses)} hit rate), "
+                f"{self.identifier_specialisations} specialised")
+
+
+METRICS = QuickeningMetrics()
+
+
+def adapt_operation(node: BinaryOperation, left: Value,
+                    right: Value) -> Optional[Callable[[Any, Any], Value]]:
+    """
+    Called by the evaluator when a quickened operation's guard fails, or
+    the operation isn't quickened yet. Returns the specialised operation
+    to run, or None for the generic path.
+    """
+    if node.quickened is not None:
+        # The guard failed, go back to the generic version
+        node.quickened = None
+        node.cached_misses += 1
+        METRICS.operation_misses += 1
+        return None
+
+    if node.cached_misses >= ADAPTIVE_LIMIT:
+        return None
+
+    operand_type = type(left)
+    operation = SPECIALISATIONS.get((node.operator, operand_type)) \
+        if type(right) is operand_type else None
+    if operation is None:
+        node.cached_misses += 1
+        return None
+
+    node.quickened = (operand_type, operation)
+    METRICS.operation_specialisations += 1
+    return operation
+
+
+def lookup(node: Identifier, scope: Scope) -> Value:
+    """The value of an identifier, quickened as described in the module docstring."""
+    name = node.name
+    depth = node.cached_depth
+    if depth is not None:
+        # The guard: the scopes in between don't (now) bind the name, and
+        # the one it was found in still does
+        target: Optional[Scope] = scope
+        for _ in range(depth):
+            if target is None or name in target.variables:
+                break
+            target = target.parent
+        else:
+            if target is not None:
+                value = target.variables.get(name)
+                if value is not None:
+                    METRICS.identifier_hits += 1
+                    return value
+
+        node.cached_depth = None
+        node.cached_misses += 1
+        METRICS.identifier_misses += 1
+
+    depth = 0
+    current: Optional[Scope] = scope
+    while current is not None:
+        value = current.variables.get(name)
+        if value is not None:
+            break
+        current = current.parent
+        depth += 1
+    else:
+        raise ScrapNameError(name)
+
+    if node.cached_misses < ADAPTIVE_LIMIT:
+        node.cached_depth = depth
+        METRICS.identifier_specialisations += 1
+
+    return value
@@ -0,0 +1,267 @@
+"""
+This module implements a persistent cache of the values of expensive
+top-level expressions, shared by every run of every program.
+
+Scrapscript is pure, so the value of an expression only depends on its
+tree and on the values of its free variables. Both are hashed into the
+key of the expression: the tree by its structure, and each free variable
+by its value. A function is hashed by its body and, in turn, by the
+values of the free variables of its body (a recursive function refers
+back to itself by position), so
+
+    slow 30 ; slow = | 0 -> 0 | n -> slow (n - 1) + slow (n - 1)
+
+gets the same key in every program that defines `slow` the same way,
+whatever it's called and wherever it's defined.
+
+Only plain data is stored: numbers, text, bytes, lists, records and
+variants without a type. The value of an expression that is a function,
+a stream, or a variant of a type defined by the program (which is only
+the same type within one run) isn't cached, and neither is anything that
+took less than `min_duration` seconds to evaluate, as reading it back
+wouldn't be any faster. Neither is an expression whose free variables
+hold more than MAX_KEY_VALUES values, as its key is computed on every
+run, whether the value is cached or not. See disk_cache for how entries are stored and
+evicted.
+"""
+
+from __future__ import annotations
+import hashlib
+import logging
+import marshal
+import time
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+import numeric_array
+from disk_cache import MAX_CACHE_SIZE, DiskCache, hash_modules
+from exceptions import ScrapNameError
+from free_variables import UnknownNode, free_variables
+from hash_consing import structure
+from program_cache import COMPILER_MODULES
+from scrapscript_ast import Expression
+from values import (EMPTY_SHAPE, HOLE, Base64Value, BuiltinFunction, BytesValue, Closure,
+                    ComposedFunction, FloatValue, HexValue, HoleValue, IntegerValue, ListValue,
+                    NumericListValue, RecordListValue, RecordValue, TaggedVariantValue, TextValue,
+                    Value, VariantType, VariantValue, atom, integer, make_list)
+
+if TYPE_CHECKING:
+    from scope import Scope
+
+# The modules that decide what value a tree evaluates to: the ones the
+# evaluator imports (see test_runtime_modules_cover_the_evaluator), which
+# the compiler already does, and type_inference, whose specialisations
+# the evaluator runs
+RUNTIME_MODULES = COMPILER_MODULES + ("type_inference.py",)
+
+# Expressions that take less than this many seconds aren't cached
+MIN_DURATION = 0.01
+
+# Computing a key encodes the values of the free variables of an
+# expression, an expression using more values than this isn't cached
+MAX_KEY_VALUES = 10_000
+
+_version: Optional[str] = None
+
+
+def runtime_version() -> str:
+    """A hash of the interpreter code that evaluates trees."""
+    global _version
+    if _version is None:
+        _version = hash_modules(RUNTIME_MODULES)
+
+    return _version
+
+
+class _Uncacheable(Exception):
+    """Raised for values that can't be part of a key, or stored."""
+
+
+class _Key():
+    """The state of encoding the values of a key."""
+    __slots__ = ("closures", "remaining")
+
+    # The closures being encoded, a recursive reference to one is encoded by position
+    closures: List[Closure]
+    # How many more values can be encoded
+    remaining: int
+
+    def __init__(self):
+        self.closures = []
+        self.remaining = MAX_KEY_VALUES
+
+    def count(self, values: int) -> None:
+        self.remaining -= values
+        if self.remaining < 0:
+            raise _Uncacheable("too many values")
+
+
+def _describe(node: Expression, scope: Scope, key: _Key) -> Tuple[Any, ...]:
+    """The tree of an expression, and the values of its free variables."""
+    names = sorted(free_variables(node))
+    return (structure(node), tuple((name, encode_value(scope.get(name), key)) for name in names))
+
+
+def encode_value(value: Value, key: Optional[_Key] = None) -> Any:
+    """
+    A value as nested tuples of Python data. Functions and types can only
+    be encoded for a key, and a key only encodes up to MAX_KEY_VALUES values.
+    """
+    if key is not None:
+        key.count(len(value) if isinstance(value, NumericListValue) else 1)
+
+    match value:
+        case HoleValue():
+            return ("()",)
+        case IntegerValue():
+            return ("int", value.value)
+        case FloatValue():
+            return ("float", value.value)
+        case TextValue():
+            return ("text", value.value)
+        case Base64Value():
+            return ("base64", str(value)[2:])
+        case HexValue():
+            return ("hex", bytes(value.data))
+        case BytesValue():
+            return ("bytes", bytes(value.data))
+        case VariantValue():
+            return ("variant", value.tag, encode_value(value.payload, key))
+        case RecordValue():
+            return ("record", value.shape.fields,
+                    tuple(encode_value(slot, key) for slot in value.slots))
+        case NumericListValue():
+            return ("numbers", value.is_float, tuple(numeric_array.to_list(value.data)))
+        case ListValue() | RecordListValue():
+            return ("list", tuple(encode_value(element, key) for element in value))
+
+    if key is None:
+        raise _Uncacheable(type(value).__name__)
+
+    match value:
+        case Closure():
+            for position, closure in enumerate(key.closures):
+                if closure is value:
+                    return ("recursive", position)
+
+            key.closures.append(value)
+            try:
+                return ("closure", _describe(value.body, value.scope, key))
+            finally:
+                key.closures.pop()
+        case BuiltinFunction():
+            return ("builtin", value.name,
+                    tuple(encode_value(argument, key) for argument in value.arguments))
+        case ComposedFunction():
+            return ("composed", tuple(encode_value(stage, key) for stage in value.stages))
+        case VariantType():
+            return ("type", value.name, value.tags, value.takes_payload)
+        case TaggedVariantValue():
+            return ("tagged", encode_value(value.variant_type, key), value.index,
+                    encode_value(value.payload, key))
+
+    raise _Uncacheable(type(value).__name__)
+
+
+def decode_value(data: Any) -> Value:
+    match data:
+        case ("()",):
+            return HOLE
+        case ("int", number):
+            return integer(number)
+        case ("float", number):
+            return FloatValue(number)
+        case ("text", text):
+            return TextValue(text)
+        case ("base64", encoded):
+            return Base64Value(encoded)
+        case ("hex", data):
+            return HexValue(data)
+        case ("bytes", data):
+            return BytesValue(data)
+        case ("variant", tag, ("()",)):
+            return atom(tag)
+        case ("variant", tag, payload):
+            return VariantValue(tag=tag, payload=decode_value(payload))
+        case ("record", fields, slots):
+            shape = EMPTY_SHAPE
+            for name in fields:
+                shape = shape.with_field(name)
+            return RecordValue(shape=shape, slots=[decode_value(slot) for slot in slots])
+        case ("numbers", is_float, numbers):
+            array = numeric_array.pack(numbers, is_float)
+            if array is not None:
+                return NumericListValue(array, is_float)
+            return make_list([FloatValue(number) if is_float else integer(number) for number in numbers])
+        case ("list", elements):
+            return make_list([decode_value(element) for element in elements])
+
+    raise ValueError(f"Not a cached value: {data!r}")
+
+
+class ResultCache(DiskCache):
+    __slots__ = ("min_duration", "skipped")
+
+    suffix = ".scrapr"
+
+    min_duration: float
+    # How many expensive values couldn't be stored
+    skipped: int
+
+    def __init__(self, directory: str, max_size: int = MAX_CACHE_SIZE,
+                 min_duration: float = MIN_DURATION):
+        super().__init__(directory, max_size)
+        self.min_duration = min_duration
+
+    def key(self, node: Expression, scope: Scope) -> Optional[str]:
+        """The key of an expression in a scope, None if it can't be cached."""
+        try:
+            description = _describe(node, scope, _Key())
+            data = marshal.dumps(description, 2)
+        except (_Uncacheable, UnknownNode, ScrapNameError, RecursionError, ValueError):
+            return None
+
+        digest = hashlib.sha256(runtime_version().encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def evaluate(self, node: Expression, scope: Scope) -> Value:
+        """Evaluates an expression, or loads its value if it's cached."""
+        from evaluator import evaluate_node
+
+        key = self.key(node, scope)
+        if key is None:
+            return evaluate_node(node, scope)
+
+        data = self.read(key)
+        if data is not None:
+            try:
+                value = decode_value(marshal.loads(data))
+            except (ValueError, EOFError, TypeError) as e:
+                logging.debug("Ignoring unreadable cache entry %s: %s", self.path(key), e)
+            else:
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        started = time.perf_counter()
+        value = evaluate_node(node, scope)
+        if time.perf_counter() - started < self.min_duration:
+            return value
+
+        try:
+            data = marshal.dumps(encode_value(value))
+        except (_Uncacheable, RecursionError, ValueError):
+            self.skipped += 1
+            return value
+
+        self.write(key, data)
+        return value
+
+    def reset(self) -> None:
+        super().reset()
+        self.skipped = 0
+
+    def summary(self) -> str:
+        return (f"Result cache: {self.hits} hits, {self.misses} misses, {self.skipped} not storable, "
+                f"{self.bytes_read / 1024:.1f} KiB read, {self.bytes_written / 1024:.1f} KiB written "
+                f"({self.directory})")
@@ -0,0 +1,83 @@
+"""
+This module implements the rope used by long TextValues and BytesValues.
+
+Concatenating two Python strings copies both of them, so building a text
+piece by piece with `++` is quadratic. A rope instead records the
+concatenation as a tree node with a cached length, and the text is only
+flattened (once, with a single `str.join`) when it is actually needed.
+
+Short texts are still plain strings, and small pieces are merged into the
+neighbouring leaf so the tree stays shallow. Flattening walks the tree
+with an explicit stack, so the depth of the tree doesn't matter.
+
+Bytes work the same way, with `bytes` or large `memoryview` leaves that
+are joined into a single `bytes` object once.
+"""
+
+from __future__ import annotations
+from typing import Iterator, List, Union
+
+# Concatenations shorter than this are done directly on the strings
+ROPE_THRESHOLD = 1024
+
+# Small pieces are merged into a neighbouring leaf up to this length
+CHUNK_SIZE = 1024
+
+
+class Rope():
+    __slots__ = ("left", "right", "length")
+
+    left: Piece
+    right: Piece
+    length: int
+
+    def __init__(self, left: Piece, right: Piece):
+        self.left = left
+        self.right = right
+        self.length = len(left) + len(right)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def chunks(self) -> Iterator[Leaf]:
+        """Yields the leaves of the rope from left to right."""
+        stack: List[Piece] = [self]
+
+        while stack:
+            piece = stack.pop()
+            if isinstance(piece, Rope):
+                stack.append(piece.right)
+                stack.append(piece.left)
+            else:
+                yield piece
+
+    def flatten(self) -> str:
+        return "".join(self.chunks())  # type: ignore[arg-type]
+
+    def flatten_bytes(self) -> bytes:
+        return b"".join(self.chunks())  # type: ignore[arg-type]
+
+
+Leaf = Union[str, bytes, memoryview]
+Piece = Union[Leaf, Rope]
+
+
+def concatenate(left: Piece, right: Piece) -> Piece:
+    if len(left) + len(right) < ROPE_THRESHOLD:
+        # Ropes are never shorter than the threshold, so these are leaves
+        assert not isinstance(left, Rope) and not isinstance(right, Rope)
+        return left + right  # type: ignore[operator]
+
+    # Appending a small piece, e.g. `acc ++ "x"`
+    if not isinstance(right, Rope) and isinstance(left, Rope) \
+            and not isinstance(left.right, Rope) \
+            and len(left.right) + len(right) <= CHUNK_SIZE:
+        return Rope(left.left, left.right + right)  # type: ignore[operator]
+
+    # Prepending a small piece, e.g. `"x" ++ acc`
+    if not isinstance(left, Rope) and isinstance(right, Rope) \
+            and not isinstance(right.left, Rope) \
+            and len(left) + len(right.left) <= CHUNK_SIZE:
+        return Rope(left + right.left, right.right)  # type: ignore[operator]
+
+    return Rope(left, right)
@@ -1,13 +1,24 @@
+import gc
 import sys
 import argparse
 import logging
-from typing import List
+from typing import List, Optional
 
 from evaluator import evaluate_node, evaluate_program
 from exceptions import ScrapError
+from gc_metrics import GCMetrics
+from optimiser import PassManager
 from lexer import InvalidTokenException, Token, extract_tokens
 from parser import Parser
+from prelude import prelude_scope
+from disk_cache import MAX_CACHE_SIZE, DiskCache, default_cache_directory
+from program_cache import ProgramCache
+from result_cache import ResultCache
+import scrapyard
 from scrapscript_ast import Program
+import tiering
+from quickening import METRICS as QUICKENING
+from type_inference import specialise
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -16,11 +27,9 @@ logging.basicConfig(
 )
 
 
-def run_interpreter(source_code: str):
-    """
-    Takes raw source code as a string and runs it through the
-    lexer, parser, and (eventually) evaluator.
-    """
+def compile_program(source_code: str, optimisation_level: int = 0,
+                    pass_stats: bool = False) -> Program:
+    """Lexes, parses and optimises source code."""
     logging.debug("--- Running Lexer ---")
     try:
         tokens: List[Token] = extract_tokens(source_code.splitlines())
@@ -42,14 +51,72 @@ def run_interpreter(source_code: str):
         logging.error(f"Parser failed: {e}")
         sys.exit(1)
 
+    if optimisation_level:
+        logging.debug("--- Running Optimisation Passes ---")
+        passes = PassManager.for_level(optimisation_level)
+        ast = passes.run(ast)
+        logging.debug(f"Optimised AST: {ast}")
+        if pass_stats:
+            print(passes.summary(), file=sys.stderr)
+
+    return ast
+
+
+def run_interpreter(source_code: str, gc_stats: bool = False, infer_types: bool = False,
+                    quickening_stats: bool = False, tier_stats: bool = False,
+                    optimisation_level: int = 0, pass_stats: bool = False,
+                    cache: Optional[ProgramCache] = None, cache_stats: bool = False,
+                    results: Optional[ResultCache] = None):
+    """
+    Takes raw source code as a string and runs it through the
+    lexer, parser, and (eventually) evaluator.
+    """
+    ast: Optional[Program] = None
+    if cache is not None:
+        ast = cache.load(source_code, optimisation_level)
+        if cache_stats:
+            print(cache.summary(), file=sys.stderr)
+    if ast is None:
+        ast = compile_program(source_code, optimisation_level, pass_stats)
+        if cache is not None:
+            cache.store(source_code, optimisation_level, ast)
+    else:
+        logging.debug("--- Loaded the parsed program from the cache ---")
+
+    if infer_types:
+        logging.debug("--- Running Type Inference ---")
+        # Optional, a program that can't be typed still runs with all checks
+        result_type = specialise(ast)
+        logging.debug("Inferred type: %s", result_type)
+
     logging.debug("--- Running Evaluator ---")
+    metrics = GCMetrics()
+    QUICKENING.reset()
     try:
-        result = evaluate_program(ast)
+        with metrics:
+            result = evaluate_program(ast, results=results)
         print("\n--- Result ---")
         print(result)
     except ScrapError as e:
         logging.error(f"Runtime Error: {e}")
         sys.exit(1)
+    finally:
+        if gc_stats:
+            print(metrics.summary(), file=sys.stderr)
+        if quickening_stats:
+            print(QUICKENING.summary(), file=sys.stderr)
+        if tier_stats:
+            print(tiering.describe_tiers(ast), file=sys.stderr)
+        if cache_stats and results is not None:
+            print(results.summary(), file=sys.stderr)
+
+
+def prune_caches(caches: List[DiskCache], max_size: int) -> None:
+    """Evicts the least recently used entries of each cache until it fits in `max_size` bytes."""
+    for cache in caches:
+        removed = cache.evict(max_size)
+        print(f"{type(cache).__name__}: removed {removed} entries, "
+              f"{cache.size() / 1024:.1f} KiB left in {cache.directory}")
 
 
 def main():
@@ -66,7 +133,110 @@ def main():
         help="The .scrap file to evaluate. If omitted, reads from standard input."
     )
 
+    parser.add_argument(
+        "--gc-stats",
+        action="store_true",
+        help="Print how often the garbage collector ran, and how long it paused."
+    )
+
+    parser.add_argument(
+        "--infer-types",
+        action="store_true",
+        help="Infer the types of the program, and skip the type checks of arithmetic on known types."
+    )
+
+    parser.add_argument(
+        "--quickening-stats",
+        action="store_true",
+        help="Print how often the specialised operations and name lookups hit or missed."
+    )
+
+    parser.add_argument(
+        "--compile-threshold",
+        type=int,
+        default=tiering.COMPILE_THRESHOLD,
+        help="Compile a function to Python after this many calls, 0 to never compile."
+    )
+
+    parser.add_argument(
+        "--tier-stats",
+        action="store_true",
+        help="Print how often each function was called, and whether it was compiled."
+    )
+
+    parser.add_argument(
+        "-O",
+        dest="optimisation_level",
+        type=int,
+        choices=[0, 1, 2],
+        default=0,
+        help="The optimisation level: 0 runs the program as written, 1 removes unused "
+             "bindings and applies lambdas applied in place, 2 also inlines small functions."
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't load the parsed program from the cache, or store it there."
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        default=default_cache_directory(),
+        help="Where parsed programs are cached (default: $SCRAPPY_CACHE_DIR or ~/.cache/scrappy)."
+    )
+
+    parser.add_argument(
+        "--cache-results",
+        action="store_true",
+        help="Load the values of expensive top-level bindings from the cache, and store them there."
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=MAX_CACHE_SIZE / (1024 * 1024),
+        help="The size limit of each cache, in MiB."
+    )
+
+    parser.add_argument(
+        "--prune-cache",
+        action="store_true",
+        help="Remove the least recently used cache entries until the caches fit --cache-size, and exit."
+    )
+
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Print how often the parsed program and the cached results were found in the cache."
+    )
+
+    parser.add_argument(
+        "--scrapyard",
+        default=scrapyard.default_directory(),
+        help="Where $sha256'... references are looked up "
+             "(default: $SCRAPYARD_DIR or ~/.local/share/scrappy/scrapyard)."
+    )
+
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Save the expression in the file to the scrapyard, print its reference, and exit."
+    )
+
+    parser.add_argument(
+        "--pass-stats",
+        action="store_true",
+        help="Print how long each optimisation pass took, and how many nodes it removed."
+    )
+
     args = parser.parse_args()
+    tiering.COMPILE_THRESHOLD = args.compile_threshold or None
+
+    cache_size = int(args.cache_size * 1024 * 1024)
+    if args.prune_cache:
+        prune_caches([ProgramCache(args.cache_dir), ResultCache(args.cache_dir)], cache_size)
+        return
 
     logging.debug("Reading source code...")
     try:
@@ -75,7 +245,28 @@ def main():
         if args.file is not sys.stdin:
             args.file.close()
 
-    run_interpreter(source_code)
+    scrapyard.use(args.scrapyard)
+    if args.save:
+        try:
+            digest = scrapyard.current().save(source_code)
+        except ScrapError as e:
+            logging.error(f"Couldn't save: {e}")
+            sys.exit(1)
+        print(f"$sha256'{digest}")
+        return
+
+    # The CLI owns the process, and the prelude (and everything loaded
+    # before it) lives until it exits, so move it out of the way of the
+    # cyclic GC instead of walking it again in every full collection
+    prelude_scope()
+    gc.freeze()
+
+    run_interpreter(source_code, gc_stats=args.gc_stats, infer_types=args.infer_types,
+                    quickening_stats=args.quickening_stats, tier_stats=args.tier_stats,
+                    optimisation_level=args.optimisation_level, pass_stats=args.pass_stats,
+                    cache=None if args.no_cache else ProgramCache(args.cache_dir, cache_size),
+                    cache_stats=args.cache_stats,
+                    results=ResultCache(args.cache_dir, cache_size) if args.cache_results else None)
 
 
 if __name__ == '__main__':
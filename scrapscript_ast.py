@@ -6,8 +6,8 @@ The AST is a hierarchical representation of the code's structure, produced
 by the parser. The evaluator will then "walk" this tree to execute the program.
 """
 
-from dataclasses import dataclass
-from typing import List, Optional, Union
+from dataclasses import dataclass, field
+from typing import Any, Callable, FrozenSet, List, Optional, Tuple, Union
 
 # Note: We need to import the Operator enum as it's part of the BinaryOperation node.
 # It's good practice to move shared enums like this to their own file later,
@@ -20,20 +20,20 @@ from enums import Operator
 # == Base Classes: The Foundation of the AST
 # =====================================================================
 
-@dataclass
+@dataclass(slots=True)
 class ASTNode:
     """The common base class for all nodes in the Abstract Syntax Tree."""
     # Common fields like source location (line number, column) could be added here later.
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Statement(ASTNode):
     """Base class for all statements (commands that perform an action)."""
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Expression(ASTNode):
     """Base class for all expressions (constructs that evaluate to a value)."""
     pass
@@ -43,7 +43,7 @@ class Expression(ASTNode):
 # == Program Root
 # =====================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Program(ASTNode):
     """The root node of the entire AST, representing a complete program."""
     declarations: List[Statement]
@@ -53,21 +53,21 @@ class Program(ASTNode):
 # == Statement Nodes
 # =====================================================================
 
-@dataclass
+@dataclass(slots=True)
 class FunctionDefinitionStatement(Statement):
     """A function definition, e.g., `f = 1 + 2`."""
     name: str
     body: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class TypeDefinitionStatment(Statement):
     """A type definition, e.g., `point : #2d | #3d`."""
     name: 'Identifier'
     body: 'TypeExpression'
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionStatement(Statement):
     """A statement that consists of a single expression to be evaluated."""
     expression: Expression
@@ -77,37 +77,136 @@ class ExpressionStatement(Statement):
 # == Expression Nodes
 # =====================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Identifier(Expression):
     """Represents a name, like a variable or function name."""
     name: str
 
+    # How many scopes up the name was found the last time, set by
+    # quickening, and how often that changed
+    cached_depth: Optional[int] = field(default=None, compare=False, repr=False)
+    cached_misses: int = field(default=0, compare=False, repr=False)
+
     def __repr__(self) -> str:
         return self.name
 
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOperation(Expression):
     """A prefix operation, e.g., `-5`."""
     expression: Expression
     operator: Operator
 
+    # The operation without type checks, set by type_inference when the
+    # type of the operand is known
+    specialised: Optional[Callable[[Any], Any]] = field(
+        default=None, compare=False, repr=False)
+
     def __repr__(self) -> str:
         return f"({self.operator.value} {self.expression})"
 
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOperation(Expression):
     """An infix operation, e.g., `1 + 2`."""
     left: Expression
     right: Expression
     operator: Operator
 
+    # The operation without type checks, set by type_inference when the
+    # types of the operands are known
+    specialised: Optional[Callable[[Any, Any], Any]] = field(
+        default=None, compare=False, repr=False)
+
+    # The operand type seen so far and the operation for it, set by
+    # quickening, and how often the operand types changed. One tuple, so
+    # a thread never sees the operation of one type with another type
+    quickened: Optional[Tuple[type, Callable[[Any, Any], Any]]] = field(
+        default=None, compare=False, repr=False)
+    cached_misses: int = field(default=0, compare=False, repr=False)
+
     def __repr__(self) -> str:
         return f"({self.operator.value} {self.left} {self.right})"
 
 
-@dataclass
+@dataclass(slots=True)
+class Function(Expression):
+    """A function of one argument, e.g., `x -> x + 1`."""
+    parameter: Identifier
+    body: Expression
+
+    # The directly nested functions of a curried function like
+    # `a -> b -> a + b`, starting with this one. Computed on first call.
+    cached_lambdas: Optional[Any] = field(
+        default=None, compare=False, repr=False)
+
+    # The names the function refers to but doesn't bind, see free_variables
+    cached_free_variables: Optional[FrozenSet[str]] = field(
+        default=None, compare=False, repr=False)
+
+    # How often closures of this function were called, and the function
+    # compiled to Python once that passed tiering.COMPILE_THRESHOLD
+    call_count: int = field(default=0, compare=False, repr=False)
+    compiled: Optional[Callable[..., Any]] = field(default=None, compare=False, repr=False)
+
+    def __repr__(self) -> str:
+        return f"({self.parameter} -> {self.body})"
+
+
+@dataclass(slots=True)
+class Application(Expression):
+    """Applying a function to an argument, e.g., `f 1`."""
+    function: Expression
+    argument: Expression
+
+    def __repr__(self) -> str:
+        return f"({self.function} {self.argument})"
+
+
+@dataclass(slots=True)
+class RecordField(ASTNode):
+    """A single field in a record expression, e.g., `a = 1`."""
+    name: str
+    value: Expression
+
+
+@dataclass(slots=True)
+class RecordLiteral(Expression):
+    """A record expression, e.g., `{ a = 1, b = "x" }` or `{ ..g, a = 2 }`."""
+    fields: List[RecordField]
+    spread: Optional[Expression] = None
+
+    # The shape of the records built here, cached on first evaluation.
+    # Only used when there is no spread, as the field layout is then static.
+    cached_shape: Optional[Any] = field(
+        default=None, compare=False, repr=False)
+
+
+@dataclass(slots=True)
+class FieldAccess(Expression):
+    """Accessing a field on a record, e.g., `rec.a`."""
+    record: Expression
+    name: str
+
+    # Inline cache for this access site: the last seen record shape and
+    # the slot index of `name` within it, set together as one tuple.
+    cached_slot: Optional[Tuple[Any, int]] = field(
+        default=None, compare=False, repr=False)
+
+    def __repr__(self) -> str:
+        return f"{self.record}.{self.name}"
+
+
+@dataclass(slots=True)
+class ListLiteral(Expression):
+    """A list expression, e.g., `[1, 2, 3]`."""
+    elements: List[Expression]
+
+    def __repr__(self) -> str:
+        return f"[{', '.join(repr(element) for element in self.elements)}]"
+
+
+@dataclass(slots=True)
 class VariantConstruction(Expression):
     """A constructed variant, e.g., `scoop::chocolate 1`."""
     type_name: Identifier
@@ -115,13 +214,27 @@ class VariantConstruction(Expression):
     arguments: List[Expression]
 
 
-@dataclass
+@dataclass(slots=True)
 class PatternMatchExpression(Expression):
     """A pattern matching block, e.g., `| 1 -> "a" | _ -> "b"`."""
     clauses: List['PatternClause']
 
+    # The names the function refers to but doesn't bind, see free_variables
+    cached_free_variables: Optional[FrozenSet[str]] = field(
+        default=None, compare=False, repr=False)
+
+    # The clauses that can match each variant of the last type matched on,
+    # see evaluator.variant_clauses
+    cached_dispatch: Optional[Any] = field(
+        default=None, compare=False, repr=False)
 
-@dataclass
+    # How often closures of this function were called, and the function
+    # compiled to Python once that passed tiering.COMPILE_THRESHOLD
+    call_count: int = field(default=0, compare=False, repr=False)
+    compiled: Optional[Callable[..., Any]] = field(default=None, compare=False, repr=False)
+
+
+@dataclass(slots=True)
 class PatternClause:
     """A single clause of a pattern match, e.g., `| 1 -> "a"`."""
     pattern: 'Pattern'
@@ -132,49 +245,73 @@ class PatternClause:
 # == Pattern Nodes (for Pattern Matching)
 # =====================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Pattern(ASTNode):
     """Base class for all patterns used in pattern matching."""
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class LiteralPattern(Pattern):
     """A pattern that matches a literal value."""
     literal: 'Literal'
 
 
-@dataclass
+@dataclass(slots=True)
 class WildcardPattern(Pattern):
     """A pattern that matches anything and discards it (`_`)."""
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class VariablePattern(Pattern):
     """A pattern that matches anything and binds it to a variable."""
     identifier: Identifier
 
 
+@dataclass(slots=True)
+class VariantPattern(Pattern):
+    """A pattern that matches a variant by its tag, e.g., `#ok x` or `#fail`."""
+    tag: 'Atom'
+    payload: Optional[Pattern] = None
+
+
 # =====================================================================
 # == Type Definition Nodes
 # =====================================================================
 
-@dataclass
+@dataclass(slots=True)
 class TypeExpression(ASTNode):
     """The body of a type definition, e.g., `#a int | #b`."""
     variants: List['TypeVariant']
 
 
-@dataclass
+@dataclass(slots=True)
 class TypeVariant(ASTNode):
     """A single variant in a type definition, e.g., `#ok int`."""
     tag: 'Atom'
     parameter: Optional[Union[Identifier, TypeExpression]] = None
 
 
-@dataclass
-class Atom(ASTNode):
+@dataclass(slots=True)
+class HashReference(Expression):
+    """
+    An expression from the scrapyard, referred to by the hash of its
+    content, e.g. `$sha256'9f86d0...` (stored as the hex digest).
+    """
+    digest: str
+
+    # The value of the expression, which has no free variables and so is
+    # the same wherever it's used (see evaluator.evaluate_reference)
+    cached_value: Optional[Any] = field(
+        default=None, compare=False, repr=False)
+
+    def __repr__(self) -> str:
+        return f"$sha256'{self.digest}"
+
+
+@dataclass(slots=True)
+class Atom(Expression):
     """A symbolic tag, e.g., `#ok` (stored as 'ok')."""
     value: str
 
@@ -183,56 +320,91 @@ class Atom(ASTNode):
 # == Literal Nodes (a sub-category of Expression)
 # =====================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Literal(Expression):
     """Base class for all literal values."""
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class IntegerLiteral(Literal):
     value: int
 
+    # The value the literal evaluates to, created once instead of on
+    # every evaluation (see evaluator.literal_value)
+    cached_value: Optional[Any] = field(
+        default=None, compare=False, repr=False)
+
     def __repr__(self) -> str:
         return str(self.value)
 
 
-@dataclass
+@dataclass(slots=True)
 class FloatLiteral(Literal):
     value: float
 
+    # The value the literal evaluates to, created once instead of on
+    # every evaluation (see evaluator.literal_value)
+    cached_value: Optional[Any] = field(
+        default=None, compare=False, repr=False)
+
     def __repr__(self) -> str:
         return str(self.value)
 
 
-@dataclass
+@dataclass(slots=True)
 class TextLiteral(Literal):
     value: str
 
+    # The value the literal evaluates to, created once instead of on
+    # every evaluation (see evaluator.literal_value)
+    cached_value: Optional[Any] = field(
+        default=None, compare=False, repr=False)
+
+    @property
+    def text(self) -> str:
+        """The text without the surrounding quotation marks."""
+        if len(self.value) >= 2 and self.value[0] == self.value[-1] == '"':
+            return self.value[1:-1]
+
+        return self.value
+
     def __repr__(self) -> str:
         # Use Python's repr to keep the quotes, making it clear it's a string.
         return self.value
 
 
-@dataclass
+@dataclass(slots=True)
 class InterpolatedTextLiteral(Literal):
     value: str
 
+    # The compiled template: literal text chunks and embedded expressions
+    parts: List[Union[str, Expression]] = field(
+        default_factory=list, compare=False, repr=False)
+
     def __repr__(self) -> str:
         return f'`{self.value}`'
 
 
-@dataclass
+@dataclass(slots=True)
 class HexLiteral(Literal):
     value: str
 
+    # The decoded bytes value, so the literal is only decoded once
+    cached_value: Optional[Any] = field(
+        default=None, compare=False, repr=False)
+
     def __repr__(self) -> str:
         return f"Hex({self.value})"
 
 
-@dataclass
+@dataclass(slots=True)
 class Base64Literal(Literal):
     value: str
 
+    # The (lazily) decoded bytes value, so the literal is only decoded once
+    cached_value: Optional[Any] = field(
+        default=None, compare=False, repr=False)
+
     def __repr__(self) -> str:
         return self.value
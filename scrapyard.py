@@ -0,0 +1,326 @@
+"""
+This module implements the scrapyard: a local store of expressions, each
+saved under the SHA-256 hash of its content, which programs can refer to
+with `$sha256'<digest>` instead of by name.
+
+    yard = Scrapyard(directory)
+    digest = yard.save("| 0 -> 1 | n -> n * $sha256'...")
+    yard.load(digest)  # the parsed expression
+
+The hash is taken of the structure of the parsed tree (see
+hash_consing.structure), so formatting and comments don't change it.
+Stored expressions can't have free variables other than builtins, so an
+expression means the same wherever it's used.
+
+The store is two files:
+
+- `yard.pack`: the entries, appended one after the other. An entry holds
+  the source of the expression and its serialised tree, so loading it
+  doesn't lex or parse anything (the source is only parsed again if the
+  tree was saved by an interpreter with other AST classes).
+- `yard.idx`: an open-addressing hash table from digests to the offset
+  and length of their entries in the pack. Both files are memory mapped,
+  so finding an entry reads a slot or two, instead of loading the whole
+  index. The table is rebuilt twice as large once it's half full.
+
+Expressions are only loaded once per process, every reference to them
+shares the same tree. An entry can only build a tree (see program_cache),
+which is checked against its digest, and if it doesn't match (the entry is damaged, or was saved by an
+interpreter with other AST classes) the source is parsed and checked
+instead.
+
+Saving appends to the pack and updates the index in place, with the
+pack locked (where the platform has flock), so concurrent saves don't
+lose each other's entries.
+"""
+
+from __future__ import annotations
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+from exceptions import ScrapyardError
+from free_variables import free_variables
+from hash_consing import structure
+from lexer import extract_tokens
+from program_cache import dump_tree, load_tree
+from scrapscript_ast import Expression, ExpressionStatement
+
+_PACK_MAGIC = b"SCRAPACK"
+_INDEX_MAGIC = b"SCRAPIDX"
+_INDEX_VERSION = 1
+
+# Magic, version, number of slots (a power of two), number of entries
+_HEADER = struct.Struct("<8sIIQ")
+# Digest, offset and length of the entry in the pack
+_SLOT = struct.Struct("<32sQI4x")
+_EMPTY = bytes(32)
+
+# The number of slots of a new index
+INITIAL_SLOTS = 1024
+
+_directory: Optional[str] = None
+_yard: Optional[Scrapyard] = None
+
+
+def default_directory() -> str:
+    """$SCRAPYARD_DIR, or scrapyard in the user's data directory."""
+    directory = os.environ.get("SCRAPYARD_DIR")
+    if directory:
+        return directory
+
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "scrappy", "scrapyard")
+
+
+def use(directory: Optional[str]) -> None:
+    """Makes `$sha256'...` references resolve from the scrapyard in `directory`."""
+    global _directory, _yard
+    if _yard is not None:
+        _yard.close()
+        _yard = None
+    _directory = directory
+
+
+def current() -> Scrapyard:
+    """The scrapyard references are resolved from, opened on first use."""
+    global _yard
+    if _yard is None:
+        _yard = Scrapyard(_directory or default_directory())
+
+    return _yard
+
+
+def digest_of(expression: Expression) -> str:
+    """The hex digest an expression is stored under."""
+    return hashlib.sha256(marshal.dumps(structure(expression), 2)).hexdigest()
+
+
+def parse_expression(source: str) -> Expression:
+    """The expression of a source holding a single expression."""
+    from parser import Parser
+
+    program = Parser(extract_tokens(source.splitlines())).parse_program()
+    if len(program.declarations) != 1 or not isinstance(program.declarations[0], ExpressionStatement):
+        raise ScrapyardError("Only a single expression can be saved in the scrapyard")
+
+    return program.declarations[0].expression
+
+
+class Scrapyard():
+    __slots__ = ("directory", "_pack_path", "_index_path", "_index", "_pack", "_trees")
+
+    directory: str
+    _pack_path: str
+    _index_path: str
+    _index: Optional[mmap.mmap]
+    _pack: Optional[mmap.mmap]
+    # The expressions loaded so far, by digest
+    _trees: Dict[str, Expression]
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._pack_path = os.path.join(directory, "yard.pack")
+        self._index_path = os.path.join(directory, "yard.idx")
+        self._index = None
+        self._pack = None
+        self._trees = {}
+
+    def _open_index(self) -> Optional[mmap.mmap]:
+        if self._index is None:
+            try:
+                with open(self._index_path, "r+b") as file:
+                    self._index = mmap.mmap(file.fileno(), 0)
+            except FileNotFoundError:
+                return None
+
+            magic, version, _, _ = _HEADER.unpack_from(self._index)
+            if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+                raise ScrapyardError(f"Not a scrapyard index: {self._index_path}")
+
+        return self._index
+
+    def _find(self, index: mmap.mmap, key: bytes) -> Tuple[int, Optional[Tuple[int, int]]]:
+        """The slot of a digest (or the empty slot it would go in), and its entry if it's there."""
+        _, _, slots, _ = _HEADER.unpack_from(index)
+        slot = int.from_bytes(key[:8], "little") & (slots - 1)
+        while True:
+            digest, offset, length = _SLOT.unpack_from(index, _HEADER.size + slot * _SLOT.size)
+            if digest == key:
+                return slot, (offset, length)
+            if digest == _EMPTY:
+                return slot, None
+            slot = (slot + 1) & (slots - 1)
+
+    def _write_index(self, slots: int, entries: Dict[bytes, Tuple[int, int]]) -> None:
+        """Writes a new index with all the entries, and replaces the old one."""
+        table = bytearray(_HEADER.size + slots * _SLOT.size)
+        _HEADER.pack_into(table, 0, _INDEX_MAGIC, _INDEX_VERSION, slots, len(entries))
+        for key, (offset, length) in entries.items():
+            slot = int.from_bytes(key[:8], "little") & (slots - 1)
+            while _SLOT.unpack_from(table, _HEADER.size + slot * _SLOT.size)[0] != _EMPTY:
+                slot = (slot + 1) & (slots - 1)
+            _SLOT.pack_into(table, _HEADER.size + slot * _SLOT.size, key, offset, length)
+
+        temporary = self._index_path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(table)
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        os.replace(temporary, self._index_path)
+
+    def _entries(self, index: mmap.mmap) -> Iterator[Tuple[bytes, Tuple[int, int]]]:
+        _, _, slots, _ = _HEADER.unpack_from(index)
+        for slot in range(slots):
+            digest, offset, length = _SLOT.unpack_from(index, _HEADER.size + slot * _SLOT.size)
+            if digest != _EMPTY:
+                yield digest, (offset, length)
+
+    def __len__(self) -> int:
+        index = self._open_index()
+        return 0 if index is None else _HEADER.unpack_from(index)[3]
+
+    def __contains__(self, digest: str) -> bool:
+        return self._entry(digest) is not None
+
+    def _entry(self, digest: str) -> Optional[Tuple[int, int]]:
+        index = self._open_index()
+        if index is None:
+            return None
+
+        try:
+            key = bytes.fromhex(digest)
+        except ValueError:
+            return None
+
+        return self._find(index, key)[1] if len(key) == 32 else None
+
+    def _read(self, offset: int, length: int) -> bytes:
+        if self._pack is None or offset + length > len(self._pack):
+            # Entries were added since the pack was mapped
+            if self._pack is not None:
+                self._pack.close()
+            with open(self._pack_path, "rb") as file:
+                self._pack = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self._pack[offset:offset + length]
+
+    def save(self, source: str) -> str:
+        """Saves the expression of `source`, and returns its digest."""
+        from prelude import prelude_scope
+
+        expression = parse_expression(source)
+        unknown = [name for name in sorted(free_variables(expression))
+                   if name not in prelude_scope().variables]
+        if unknown:
+            raise ScrapyardError(f"Can't save an expression with free variables: {', '.join(unknown)}")
+
+        digest = digest_of(expression)
+        if digest in self:
+            return digest
+
+        encoded = source.encode()
+        entry = struct.pack("<I", len(encoded)) + encoded + dump_tree(expression)
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._pack_path, "ab") as pack:
+            if fcntl is not None:
+                # Released when the pack is closed
+                fcntl.flock(pack.fileno(), fcntl.LOCK_EX)
+
+            # Another process may have saved entries (or replaced the index)
+            # since the index was mapped
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+            if digest in self:
+                return digest
+
+            # Entries appended since the pack was opened move its end
+            pack.seek(0, os.SEEK_END)
+            if pack.tell() == 0:
+                pack.write(_PACK_MAGIC)
+            offset = pack.tell()
+            pack.write(entry)
+            pack.flush()
+
+            self._add_to_index(bytes.fromhex(digest), offset, len(entry))
+
+        self._trees[digest] = expression
+        return digest
+
+    def _add_to_index(self, key: bytes, offset: int, length: int) -> None:
+        index = self._open_index()
+        if index is None:
+            self._write_index(INITIAL_SLOTS, {})
+            index = self._open_index()
+            assert index is not None
+
+        _, _, slots, count = _HEADER.unpack_from(index)
+        if (count + 1) * 2 > slots:
+            # Half full, rehash into a table twice as large
+            entries = dict(self._entries(index))
+            entries[key] = (offset, length)
+            self._write_index(slots * 2, entries)
+        else:
+            slot, _ = self._find(index, key)
+            _SLOT.pack_into(index, _HEADER.size + slot * _SLOT.size, key, offset, length)
+            _HEADER.pack_into(index, 0, _INDEX_MAGIC, _INDEX_VERSION, slots, count + 1)
+            index.flush()
+
+    def source(self, digest: str) -> str:
+        """The source an expression was saved from."""
+        entry = self._entry(digest)
+        if entry is None:
+            raise ScrapyardError(f"$sha256'{digest} is not in the scrapyard ({self.directory})")
+
+        data = self._read(*entry)
+        (length,) = struct.unpack_from("<I", data)
+        return data[4:4 + length].decode()
+
+    def load(self, digest: str) -> Expression:
+        """The expression stored under a digest."""
+        shared = self._trees.get(digest)
+        if shared is not None:
+            return shared
+
+        entry = self._entry(digest)
+        if entry is None:
+            raise ScrapyardError(f"$sha256'{digest} is not in the scrapyard ({self.directory})")
+
+        data = self._read(*entry)
+        (length,) = struct.unpack_from("<I", data)
+        try:
+            expression = load_tree(data[4 + length:])
+            loaded = digest_of(expression) == digest
+        except Exception:
+            loaded = False
+
+        if not loaded:
+            # Saved by another version of the interpreter, or damaged
+            try:
+                expression = parse_expression(data[4:4 + length].decode())
+                parsed = digest_of(expression) == digest
+            except Exception:
+                parsed = False
+            if not parsed:
+                raise ScrapyardError(f"$sha256'{digest} is damaged in the scrapyard ({self.directory})")
+
+        self._trees[digest] = expression
+        return expression
+
+    def close(self) -> None:
+        for mapped in (self._index, self._pack):
+            if mapped is not None:
+                mapped.close()
+        self._index = None
+        self._pack = None
@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import embedding
+from embedding import CompiledProgram, cache_info, clear_cache, compile, to_value
+from exceptions import ScrapEvalError, ScrapNameError, ScrapParseError, ScrapTypeError
+from values import FloatValue, IntegerValue, TextValue, atom, make_list
+
+p = pytest.mark.parametrize
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+def test_programs_run_with_different_bindings():
+    program = compile('greeting ++ name ; greeting = "hi "')
+    assert program.run(bindings={"name": "ron"}) == TextValue("hi ron")
+    assert program.run(bindings={"name": TextValue("cowboy")}) == TextValue("hi cowboy")
+
+
+def test_definitions_hide_bindings_and_bindings_hide_builtins():
+    assert compile("x ; x = 1").run(bindings={"x": 2}) == IntegerValue(1)
+    assert compile("text/length").run(bindings={"text/length": 3}) == IntegerValue(3)
+
+
+def test_functions_see_bindings_and_definitions():
+    program = compile("list/map f xs |> list/sum ; f = x -> x * scale + offset ; offset = 1")
+    assert program.run(bindings={"xs": [1, 2], "scale": 10}) == IntegerValue(32)
+
+
+@p("python, expected", [
+    (1, IntegerValue(1)),
+    (2.5, FloatValue(2.5)),
+    ("a", TextValue("a")),
+    (True, atom("true")),
+    ([1, 2], make_list([IntegerValue(1), IntegerValue(2)])),
+    ((), make_list([])),
+])
+def test_python_values_are_converted(python, expected):
+    assert to_value(python) == expected
+
+
+def test_records_and_bytes_are_converted():
+    program = compile("r.a + bytes/length r.b")
+    assert program.run(bindings={"r": {"a": 1, "b": b"xyz"}}) == IntegerValue(4)
+    with pytest.raises(ScrapEvalError):
+        to_value(object())
+
+
+def test_programs_are_compiled_once():
+    first = compile("x * 2")
+    assert compile("x * 2") is first
+    assert compile("x * 2", optimisation_level=2) is not first
+    assert cache_info() == (1, 2, 2)
+    assert isinstance(first, CompiledProgram)
+
+
+def test_least_recently_used_programs_are_dropped(monkeypatch):
+    monkeypatch.setattr(embedding, "CACHE_SIZE", 2)
+    a = compile("1")
+    compile("2")
+    assert compile("1") is a
+    compile("3")
+
+    assert compile("1") is a
+    assert cache_info()[2] == 2
+    hits = cache_info()[0]
+    compile("2")
+    assert cache_info()[0] == hits
+
+
+@p("source", ["1 +", "1 @ 2", "[1, 2"])
+def test_syntax_errors_raise(source):
+    with pytest.raises(ScrapParseError):
+        compile(source)
+
+
+@p("source, bindings, error", [
+    ("x + 1", {}, ScrapNameError),
+    ('x + "a"', {"x": 1}, ScrapTypeError),
+    ("x / 0", {"x": 1}, ScrapEvalError),
+    ("f 1 ; f = x -> f x", {}, ScrapEvalError),
+    # Raised while computing the elements of a lazy list
+    ("list/map (x -> x / 0) (list/range 0 3)", {}, ScrapEvalError),
+    ("list/map (x -> x + 1) [1.0, 2]", {}, ScrapTypeError),
+    ("{ a = list/map (x -> x + 1) xs }", {"xs": [1.0, 2]}, ScrapTypeError),
+])
+def test_runtime_errors_raise(source, bindings, error):
+    with pytest.raises(error):
+        compile(source).run(bindings=bindings)
+
+
+def test_lazy_results_are_computed():
+    result = compile("list/map (x -> x * 2) (list/range 0 3)").run()
+    assert result == make_list([IntegerValue(0), IntegerValue(2), IntegerValue(4)])
+    assert str(result) == "[0, 2, 4]"
+
+
+def test_programs_are_compiled_from_several_threads():
+    sources = [f"x + {n % 10}" for n in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        programs = list(executor.map(compile, sources))
+
+    assert all(program is compile(source) for program, source in zip(programs, sources))
+    hits, misses, size = cache_info()
+    assert size == 10
+    assert hits + misses == 400
+
+
+def test_optimised_programs_run_with_bindings():
+    program = compile("f x ; f = y -> y * y ; unused = 3", optimisation_level=2)
+    assert [program.run(bindings={"x": n}) for n in range(3)] == [IntegerValue(n * n) for n in range(3)]
@@ -4,14 +4,19 @@ from values import Closure  # Your new value class
 from scrapscript_ast import FunctionDefinitionStatement, Identifier
 import logging
 import pytest
-from exceptions import ScrapNameError, ScrapTypeError
+from exceptions import ScrapEvalError, ScrapNameError, ScrapTypeError
 from scope import Scope
 from scrapscript_ast import (
     Expression,
+    FieldAccess,
     Identifier,
     IntegerLiteral,
+    InterpolatedTextLiteral,
+    ListLiteral,
     FloatLiteral,
     BinaryOperation,
+    RecordField,
+    RecordLiteral,
     TextLiteral,
     UnaryOperation,
 )
@@ -20,7 +25,7 @@ from enums import (
 )
 # We will create these in the next step
 from evaluator import evaluate_node
-from values import FloatValue, IntegerValue, Value
+from values import FloatValue, IntegerValue, ListValue, RecordValue, TextValue, Value
 
 p = pytest.mark.parametrize
 
@@ -274,3 +279,161 @@ def test_evaluate_function_definition_creates_closure():
     assert value.body == Identifier(name="x")
     # It should capture the scope it was defined in.
     assert value.scope is scope
+
+
+def test_records_with_the_same_fields_share_a_shape():
+    """
+    Records built with the same field layout should share one interned
+    shape, no matter which literal built them.
+    """
+    first = evaluate_node(
+        RecordLiteral(fields=[
+            RecordField(name="a", value=IntegerLiteral(1)),
+            RecordField(name="b", value=IntegerLiteral(2)),
+        ]),
+        scope=Scope()
+    )
+    second = evaluate_node(
+        RecordLiteral(fields=[
+            RecordField(name="a", value=IntegerLiteral(3)),
+            RecordField(name="b", value=IntegerLiteral(4)),
+        ]),
+        scope=Scope()
+    )
+
+    assert isinstance(first, RecordValue)
+    assert isinstance(second, RecordValue)
+    assert first.shape is second.shape
+    assert first.slots == [IntegerValue(1), IntegerValue(2)]
+
+
+def test_record_spread_overrides_and_adds_fields():
+    scope = Scope()
+    scope.put("g", evaluate_node(
+        RecordLiteral(fields=[
+            RecordField(name="a", value=IntegerLiteral(1)),
+            RecordField(name="b", value=IntegerLiteral(2)),
+        ]),
+        scope=scope
+    ))
+
+    result = evaluate_node(
+        RecordLiteral(
+            fields=[
+                RecordField(name="a", value=IntegerLiteral(5)),
+                RecordField(name="c", value=IntegerLiteral(6)),
+            ],
+            spread=Identifier("g")
+        ),
+        scope=scope
+    )
+
+    assert isinstance(result, RecordValue)
+    assert result.shape.fields == ("a", "b", "c")
+    assert result.slots == [IntegerValue(5), IntegerValue(2), IntegerValue(6)]
+
+
+def test_field_access_uses_inline_cache():
+    """
+    A field access site should remember the shape and slot it last saw,
+    and still give the right answer when a record of another shape arrives.
+    """
+    access = FieldAccess(record=Identifier("rec"), name="b")
+
+    scope = Scope()
+    scope.put("rec", evaluate_node(
+        RecordLiteral(fields=[
+            RecordField(name="a", value=IntegerLiteral(1)),
+            RecordField(name="b", value=IntegerLiteral(2)),
+        ]),
+        scope=scope
+    ))
+
+    assert evaluate_node(access, scope=scope) == IntegerValue(2)
+    assert access.cached_slot == (scope.get("rec").shape, 1)
+
+    # A record with a different layout misses the cache and refills it
+    scope.put("rec", evaluate_node(
+        RecordLiteral(fields=[
+            RecordField(name="b", value=IntegerLiteral(3)),
+        ]),
+        scope=scope
+    ))
+
+    assert evaluate_node(access, scope=scope) == IntegerValue(3)
+    assert access.cached_slot == (scope.get("rec").shape, 0)
+
+
+def test_field_access_on_missing_field_raises_error():
+    scope = Scope()
+    scope.put("rec", evaluate_node(RecordLiteral(fields=[]), scope=scope))
+
+    with pytest.raises(ScrapEvalError):
+        evaluate_node(FieldAccess(record=Identifier("rec"), name="a"), scope=scope)
+
+
+def test_evaluate_list_append_and_concatenate():
+    scope = Scope()
+    scope.put("xs", evaluate_node(
+        ListLiteral(elements=[IntegerLiteral(1), IntegerLiteral(2)]),
+        scope=scope
+    ))
+
+    appended = evaluate_node(
+        BinaryOperation(
+            left=Identifier("xs"),
+            operator=Operator.APPEND,
+            right=IntegerLiteral(3)
+        ),
+        scope=scope
+    )
+    concatenated = evaluate_node(
+        BinaryOperation(
+            left=Identifier("xs"),
+            operator=Operator.CONCATENATE,
+            right=Identifier("xs")
+        ),
+        scope=scope
+    )
+
+    assert appended == ListValue.from_iterable(
+        [IntegerValue(1), IntegerValue(2), IntegerValue(3)])
+    assert concatenated == ListValue.from_iterable(
+        [IntegerValue(1), IntegerValue(2), IntegerValue(1), IntegerValue(2)])
+
+    # The original list is left untouched
+    assert list(scope.get("xs")) == [IntegerValue(1), IntegerValue(2)]
+
+
+def test_concatenating_list_with_non_list_raises_error():
+    ast_node = BinaryOperation(
+        left=ListLiteral(elements=[]),
+        operator=Operator.CONCATENATE,
+        right=IntegerLiteral(1)
+    )
+
+    with pytest.raises(ScrapTypeError):
+        evaluate_node(node=ast_node, scope=Scope())
+
+
+def test_evaluate_text_concatenation():
+    ast_node = BinaryOperation(
+        left=TextLiteral(value='"baby "'),
+        operator=Operator.CONCATENATE,
+        right=TextLiteral(value='"cat"')
+    )
+
+    assert evaluate_node(node=ast_node, scope=Scope()) == TextValue("baby cat")
+
+
+def test_evaluate_interpolated_text():
+    ast_node = InterpolatedTextLiteral(
+        value='"`name` is `age`"',
+        parts=[Identifier("name"), " is ", Identifier("age")]
+    )
+
+    scope = Scope()
+    scope.put("name", TextValue("Max"))
+    scope.put("age", IntegerValue(30))
+
+    assert evaluate_node(node=ast_node, scope=scope) == TextValue("Max is 30")
@@ -0,0 +1,40 @@
+import pytest
+
+from free_variables import UnknownNode, free_variables
+from scrapscript_ast import TypeExpression
+from tests.helpers import parse_expression
+
+p = pytest.mark.parametrize
+
+
+@p("source, expected", [
+    ("1", set()),
+    ("x", {"x"}),
+    ("x -> x + y", {"y"}),
+    ("a -> b -> a + b + c", {"c"}),
+    ("x -> (x -> x) y", {"y"}),
+    ("| 0 -> z | n -> n * f (n - 1)", {"z", "f"}),
+    ("{ ..r, a = x }", {"x", "r"}),
+    ("[x, r.a, -y]", {"x", "r", "y"}),
+    ('"hi `name`!"', {"name"}),
+    ("f >> g |> h", {"f", "g", "h"}),
+    ("t::a x", {"t", "x"}),
+    ("| #ok n -> n + k | #fail -> #none", {"k"}),
+])
+def test_free_variables(source, expected):
+    assert free_variables(parse_expression(source)) == expected
+
+
+def test_free_variables_are_cached_on_functions():
+    node = parse_expression("x -> x + y")
+
+    free_variables(node)
+
+    assert node.cached_free_variables == {"y"}
+
+
+def test_unknown_nodes_are_reported():
+    node = TypeExpression(variants=[])
+
+    with pytest.raises(UnknownNode):
+        free_variables(node)
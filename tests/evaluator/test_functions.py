@@ -0,0 +1,123 @@
+import pytest
+
+from evaluator import apply_function, evaluate_node
+from exceptions import ScrapEvalError
+from scope import Scope
+from tests.helpers import parse_expression, run
+from values import BuiltinFunction, Closure, ComposedFunction, IntegerValue, ListValue, TextValue
+
+p = pytest.mark.parametrize
+
+
+@p("source, expected", [
+    ("(x -> x + 1) 2", IntegerValue(3)),
+    ("add 1 2 ; add = a -> b -> a + b", IntegerValue(3)),
+    ("f 4 ; f = | 7 -> \"cat\" | 4 -> \"dog\" | _ -> \"shark\"", TextValue("dog")),
+    ("f 3 ; f = | 7 -> 0 | n -> n * 2", IntegerValue(6)),
+    ("(f >> (x -> x) >> g) 7"
+     "; f = | 7 -> \"cat\" | 4 -> \"dog\" | _ -> \"shark\""
+     "; g = | \"cat\" -> \"kitten\" | \"dog\" -> \"puppy\" | a -> \"baby \" ++ a",
+     TextValue("kitten")),
+    ("(inc >> double >> inc) 1 ; inc = x -> x + 1 ; double = x -> x * 2", IntegerValue(5)),
+    ("1 |> inc |> (x -> x) |> inc ; inc = x -> x + 1", IntegerValue(3)),
+    ("f 1 2 3 ; f = a -> b -> c -> a * 100 + b * 10 + c", IntegerValue(123)),
+    ("(f 1 2) 3 ; f = a -> b -> c -> a * 100 + b * 10 + c", IntegerValue(123)),
+    ("g 3 ; g = f 1 2 ; f = a -> b -> c -> a * 100 + b * 10 + c", IntegerValue(123)),
+    ("f 1 2 ; f = a -> a -> a", IntegerValue(2)),
+    ("f 1 2 3 ; f = a -> b -> (c -> a + b + c)", IntegerValue(6)),
+    ("f 1 10 ; f = a -> | 1 -> a | n -> n", IntegerValue(10)),
+    ("f 2 3 ; f = a -> int/max a", IntegerValue(3)),
+])
+def test_functions(source, expected):
+    assert run(source) == expected
+
+
+def test_composition_is_flattened_into_one_function():
+    scope = Scope()
+    scope.put("f", BuiltinFunction(name="f", arity=1, function=lambda x: x))
+    scope.put("g", BuiltinFunction(name="g", arity=1, function=lambda x: x))
+
+    inner = evaluate_node(parse_expression("f >> g"), scope=scope)
+    scope.put("inner", inner)
+
+    composed = evaluate_node(parse_expression("(x -> x) >> inner >> (y -> y) >> f"), scope=scope)
+
+    # Nested compositions are spliced in, and identity functions are left out
+    assert isinstance(composed, ComposedFunction)
+    assert composed.stages == (scope.get("f"), scope.get("g"), scope.get("f"))
+
+
+def test_composition_of_a_single_function_is_the_function():
+    scope = Scope()
+    scope.put("f", BuiltinFunction(name="f", arity=1, function=lambda x: x))
+
+    assert evaluate_node(parse_expression("f >> (x -> x)"), scope=scope) is scope.get("f")
+
+
+def test_pattern_match_function_without_match_raises_error():
+    with pytest.raises(ScrapEvalError):
+        run("f 1 ; f = | 2 -> 3")
+
+
+def test_saturated_call_binds_all_arguments_in_one_scope(monkeypatch):
+    import evaluator
+
+    created = []
+
+    class CountingScope(Scope):
+        def __init__(self, parent=None):
+            created.append(self)
+            super().__init__(parent=parent)
+
+    scope = Scope()
+    scope.put("f", evaluate_node(parse_expression("a -> b -> c -> a + b + c"), scope=scope))
+    monkeypatch.setattr(evaluator, "Scope", CountingScope)
+
+    assert evaluate_node(parse_expression("f 1 2 3"), scope=scope) == IntegerValue(6)
+    assert len(created) == 1
+    assert created[0].variables == {"a": IntegerValue(1), "b": IntegerValue(2), "c": IntegerValue(3)}
+
+
+def test_partial_call_returns_closure_of_remaining_lambdas():
+    scope = Scope()
+    scope.put("f", evaluate_node(parse_expression("a -> b -> c -> a + b + c"), scope=scope))
+
+    partial = evaluate_node(parse_expression("f 1 2"), scope=scope)
+
+    assert isinstance(partial, Closure)
+    assert partial.body == parse_expression("c -> a + b + c")
+    assert partial.scope.variables == {"a": IntegerValue(1), "b": IntegerValue(2)}
+
+
+def test_closure_captures_only_its_free_variables():
+    scope = Scope()
+    scope.put("k", IntegerValue(10))
+    scope.put("big", ListValue.from_iterable([IntegerValue(0)] * 1000))
+    scope.put("make", evaluate_node(parse_expression("xs -> a -> b -> (c -> a + c + k)"), scope=scope))
+
+    closure = evaluate_node(parse_expression("make big 1 2"), scope=scope)
+
+    # Neither `xs` nor `b` are kept alive, and `k` is global
+    assert isinstance(closure, Closure)
+    assert closure.scope.variables == {"a": IntegerValue(1)}
+    assert closure.scope.parent is scope
+    assert apply_function(closure, IntegerValue(100)) == IntegerValue(111)
+
+
+def test_closure_without_local_free_variables_uses_the_global_scope():
+    scope = Scope()
+    scope.put("f", evaluate_node(parse_expression("a -> (b -> b + k)"), scope=scope))
+
+    closure = evaluate_node(parse_expression("f 1"), scope=scope)
+
+    assert closure.scope is scope
+
+
+@p("source, expected", [
+    ("fact 5 ; fact = | 0 -> 1 | n -> n * fact (n - 1)", IntegerValue(120)),
+    ("f 1 ; f = x -> g x ; g = x -> x + 1", IntegerValue(2)),
+    ("(f 1 2) 3 ; f = a -> b -> (| 3 -> a | n -> b)", IntegerValue(1)),
+    ("(x -> [x, y]) 1 ; y = 2", ListValue.from_iterable([IntegerValue(1), IntegerValue(2)])),
+])
+def test_closures_still_see_globals(source, expected):
+    assert run(source) == expected
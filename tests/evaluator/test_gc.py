@@ -0,0 +1,68 @@
+import gc
+import weakref
+
+import pytest
+
+from evaluator import apply_function, evaluate_program
+from gc_metrics import GCMetrics
+from prelude import prelude_scope
+from scope import Scope
+from tests.helpers import parse
+from values import Closure, IntegerValue
+
+p = pytest.mark.parametrize
+
+
+@pytest.fixture
+def gc_disabled():
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+@p("source", [
+    "fact 5 ; fact = | 0 -> 1 | n -> n * fact (n - 1)",
+    "even 4 ; even = | 0 -> 1 | n -> odd (n - 1) ; odd = | 0 -> 0 | n -> even (n - 1)",
+    "f 1 ; f = x -> x + 1",
+    # A closure over captured variables, whose scope's parent holds it
+    "k 1 ; k = make 3 ; make = n -> x -> x + n",
+    "k 1 ; k = make 3 ; make = n -> | 0 -> n | x -> k (x - 1)",
+])
+def test_definitions_are_freed_without_the_cyclic_gc(source, gc_disabled):
+    program = parse(source)
+    scope = Scope(parent=prelude_scope())
+    scope_ref = weakref.ref(scope)
+
+    evaluate_program(program, scope=scope)
+    del scope
+
+    assert scope_ref() is None
+
+
+@p("source", [
+    "add 1 ; add = a -> b -> a + b + k ; k = 10",
+    "add ; add = make 1 ; make = a -> b -> a + b + k ; k = 10",
+])
+def test_returned_functions_keep_their_program_alive(source, gc_disabled):
+    add = evaluate_program(parse(source))
+
+    assert isinstance(add, Closure)
+    assert apply_function(add, IntegerValue(2)) == IntegerValue(13)
+
+
+def test_gc_metrics_record_collections():
+    class Node:
+        pass
+
+    with GCMetrics() as metrics:
+        node = Node()
+        node.self = node
+        del node
+        gc.collect()
+
+    assert metrics.collections[2] >= 1
+    assert metrics.collected >= 1
+    assert metrics.longest_pause <= metrics.total_pause
+    assert "collections" in metrics.summary()
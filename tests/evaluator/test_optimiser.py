@@ -0,0 +1,157 @@
+import pytest
+
+from evaluator import evaluate_program
+from exceptions import ScrapEvalError, ScrapNameError
+from optimiser import (BETA_REDUCTION, COMMON_SUBEXPRESSIONS, DEAD_BINDINGS, INLINING, SHARING,
+                       PassManager, count_nodes, eliminate_common_subexpressions,
+                       eliminate_dead_bindings, inline_bindings, reduce_applications)
+from scrapscript_ast import ExpressionStatement, FunctionDefinitionStatement
+from tests.helpers import parse
+from values import IntegerValue, TextValue
+
+p = pytest.mark.parametrize
+
+
+def expression(program):
+    return repr(program.declarations[0].expression)
+
+
+def names(program):
+    return [statement.name for statement in program.declarations
+            if isinstance(statement, FunctionDefinitionStatement)]
+
+
+def test_dead_bindings_are_removed():
+    program = eliminate_dead_bindings(parse(
+        "f 1 ; f = x -> g x ; g = x -> x ; unused = y -> y ; also = [1, 2] ; c = 3"))
+    assert names(program) == ["f", "g"]
+
+
+def test_bindings_that_may_fail_are_kept():
+    program = eliminate_dead_bindings(parse("1 ; x = 1 / 0 ; y = unknown ; z = f 1"))
+    assert names(program) == ["x", "y", "z"]
+
+
+def test_the_result_binding_is_kept():
+    program = eliminate_dead_bindings(parse("f = x -> x ; 1"))
+    assert names(program) == ["f"]
+
+
+def test_bindings_used_by_kept_bindings_are_kept():
+    program = eliminate_dead_bindings(parse("1 ; y = f 2 ; f = x -> g x ; g = x -> x"))
+    assert names(program) == ["y", "f", "g"]
+
+
+@p("source, expected", [
+    ("(x -> x + 1) 2", "(+ 2 1)"),
+    ("(x -> x) (f 1)", "(f 1)"),
+    ("(a -> b -> a * b) 2 3", "(* 2 3)"),
+    ("(x -> 5) 1", "5"),
+    ("(x -> 5) (f 1)", "((x -> 5) (f 1))"),
+    ("(x -> x + x) (f 1)", "((x -> (+ x x)) (f 1))"),
+    ("(x -> y -> x + y) y", "((x -> (y -> (+ x y))) y)"),
+    ("(x -> (y -> x) 1) z", "z"),
+])
+def test_beta_reduction(source, expected):
+    assert expression(reduce_applications(parse(source))) == expected
+
+
+@p("source, expected", [
+    ("f 2 ; f = x -> x * x", "(* 2 2)"),
+    ("c + 1 ; c = 10", "(+ 10 1)"),
+    ("g 1 ; g = x -> f x c ; f = a -> b -> a + b ; c = 3", "(+ 1 3)"),
+    ("f 2 3 ; f = x -> y -> x * y", "(* 2 3)"),
+    ("list/map (f 1) [1] ; f = x -> y -> x + y", "((list/map (f 1)) [1])"),
+    ("f (g 1) ; f = x -> x * x ; g = x -> x", "(* 1 1)"),
+    ("f (h 1) ; f = x -> x * x ; h = | 0 -> 0 | n -> h (n - 1)", "(f (h 1))"),
+])
+def test_inlining(source, expected):
+    assert expression(inline_bindings(parse(source))) == expected
+
+
+@p("source", [
+    "fact 5 ; fact = | 0 -> 1 | n -> n * fact (n - 1)",
+    "even 4 ; even = x -> odd x ; odd = x -> even x",
+    "f 1 ; f = x -> x ; f = x -> x + 1",
+    "list/length [1] ; list/length = x -> 42",
+    # The unbound name would no longer be evaluated
+    "f 1 nowhere ; f = x -> y -> x",
+])
+def test_recursive_redefined_and_builtin_names_are_not_inlined(source):
+    program = parse(source)
+    assert expression(inline_bindings(program)) == expression(program)
+
+
+def test_inlining_does_not_capture_names():
+    # Inside g, `y` is g's parameter, not the global f refers to
+    source = "g 1 ; g = y -> f y ; f = x -> x + y ; y = h 5 ; h = a -> a"
+    program = inline_bindings(parse(source))
+    assert names(program) == ["g", "f", "y", "h"]
+    assert repr(program.declarations[1].body) == "(y -> (f y))"
+    assert evaluate_program(program) == IntegerValue(6)
+
+
+@p("level, passes", [(0, []), (1, [BETA_REDUCTION, DEAD_BINDINGS, SHARING]),
+                     (2, [INLINING, BETA_REDUCTION, DEAD_BINDINGS, COMMON_SUBEXPRESSIONS])])
+def test_levels(level, passes):
+    assert list(PassManager.for_level(level).passes) == passes
+
+
+@p("source, expected", [
+    ("h 3 ; h = y -> f y + c ; f = x -> x * c ; c = 10", IntegerValue(40)),
+    ("fact 5 ; fact = | 0 -> 1 | n -> n * fact (n - 1)", IntegerValue(120)),
+    ('greet "x" ; greet = name -> "hi " ++ name ; unused = 1', TextValue("hi x")),
+    ("f #b ; f = | #a -> 1 | #b -> 2", IntegerValue(2)),
+    ("r.a ; r = { a = c } ; c = 1", IntegerValue(1)),
+])
+def test_optimised_programs_give_the_same_results(source, expected):
+    for level in (0, 1, 2):
+        assert evaluate_program(PassManager.for_level(level).run(parse(source))) == expected
+
+
+@p("source, error", [
+    ("f 2 ; f = | 1 -> 1", ScrapEvalError),
+    ("f 1 nowhere ; f = x -> y -> x", ScrapNameError),
+    # The statements run from the last to the first, so c and f aren't bound yet
+    ("b ; c = 1 ; b = c", ScrapNameError),
+    ("r ; f = x -> x + 1 ; r = f 2", ScrapNameError),
+    ("r ; g = 1 ; r = f g ; f = x -> 0", ScrapNameError),
+])
+def test_optimised_programs_raise_the_same_errors(source, error):
+    for level in (0, 1, 2):
+        with pytest.raises(error):
+            evaluate_program(PassManager.for_level(level).run(parse(source)))
+
+
+def test_statistics():
+    program = parse("f 2 ; f = x -> x * x ; unused = 1")
+    manager = PassManager.for_level(2)
+    optimised = manager.run(program)
+
+    assert [statistics.name for statistics in manager.statistics] == \
+        ["inlining", "beta-reduction", "dead-bindings", "common-subexpressions"]
+    assert manager.statistics[0].nodes_before == count_nodes(program) == 11
+    # The 2s of `2 * 2` are one node
+    assert manager.statistics[-1].nodes_after == count_nodes(optimised) == 3
+    assert manager.summary().startswith("Passes: inlining ")
+    assert isinstance(optimised.declarations[0], ExpressionStatement)
+
+
+@p("source, expected", [
+    ("f 2 + f 2", "((_cse1 -> (+ _cse1 _cse1)) (f 2))"),
+    ("[f 1 + 1, f 1 + 1]", "((_cse1 -> [_cse1, _cse1]) (+ (f 1) 1))"),
+    ("g (f x) + g (f x) + f x", "((_cse2 -> ((_cse1 -> (+ (+ _cse1 _cse1) _cse2)) (g _cse2))) (f x))"),
+    ("x + 1 + (x + 1)", "(+ (+ x 1) (+ x 1))"),
+    ("f 1 + (x -> f 1)", "(+ (f 1) (x -> (f 1)))"),
+    ("x -> f x + f x", "(x -> ((_cse1 -> (+ _cse1 _cse1)) (f x)))"),
+    ("| 0 -> f 0 | n -> f n * f n", "PatternMatchExpression(clauses=[PatternClause(pattern=LiteralPattern"
+     "(literal=0), body=(f 0)), PatternClause(pattern=VariablePattern(identifier=n), "
+     "body=((_cse1 -> (* _cse1 _cse1)) (f n)))])"),
+])
+def test_common_subexpressions(source, expected):
+    assert expression(eliminate_common_subexpressions(parse(source))) == expected
+
+
+def test_common_subexpressions_give_the_same_results():
+    source = "g 3 ; g = x -> h (f x) + h (f x) + f x ; f = x -> x * x ; h = x -> x + 1"
+    assert evaluate_program(eliminate_common_subexpressions(parse(source))) == IntegerValue(29)
@@ -0,0 +1,135 @@
+import pytest
+
+import quickening
+from evaluator import evaluate_node
+from exceptions import ScrapNameError, ScrapTypeError
+from quickening import METRICS, SPECIALISATIONS
+from scope import Scope
+from scrapscript_ast import BinaryOperation, Identifier
+from tests.helpers import parse_expression, run
+from values import FALSE, TRUE, FloatValue, IntegerValue, TextValue
+
+p = pytest.mark.parametrize
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    METRICS.reset()
+
+
+def test_operation_specialises_on_first_run():
+    node = parse_expression("a + b")
+    scope = Scope()
+    scope.put("a", IntegerValue(1))
+    scope.put("b", IntegerValue(2))
+
+    assert evaluate_node(node, scope) == IntegerValue(3)
+    assert node.quickened == (IntegerValue, SPECIALISATIONS[(node.operator, IntegerValue)])
+    assert evaluate_node(node, scope) == IntegerValue(3)
+    assert (METRICS.operation_hits, METRICS.operation_misses) == (1, 0)
+
+
+def test_operation_despecialises_when_the_guard_fails():
+    node = parse_expression("a * b")
+    scope = Scope()
+    scope.put("a", IntegerValue(2))
+    scope.put("b", IntegerValue(3))
+    assert evaluate_node(node, scope) == IntegerValue(6)
+
+    scope.put("a", FloatValue(2.0))
+    scope.put("b", FloatValue(1.5))
+    assert evaluate_node(node, scope) == FloatValue(3.0)
+    assert node.quickened is None
+    assert METRICS.operation_misses == 1
+
+    # And specialises again for the new types
+    assert evaluate_node(node, scope) == FloatValue(3.0)
+    assert node.quickened is not None and node.quickened[0] is FloatValue
+
+
+def test_mixed_operands_still_raise_type_errors():
+    node = parse_expression("a + b")
+    scope = Scope()
+    scope.put("a", IntegerValue(1))
+    scope.put("b", IntegerValue(2))
+    evaluate_node(node, scope)
+
+    scope.put("b", FloatValue(2.0))
+    with pytest.raises(ScrapTypeError):
+        evaluate_node(node, scope)
+
+
+def test_operation_stays_generic_after_the_limit(monkeypatch):
+    monkeypatch.setattr(quickening, "ADAPTIVE_LIMIT", 2)
+    node = parse_expression("a ++ b")
+    scope = Scope()
+    scope.put("a", TextValue("a"))
+    scope.put("b", TextValue("b"))
+
+    for _ in range(5):
+        assert evaluate_node(node, scope) == TextValue("ab")
+    assert node.quickened is None
+    assert node.cached_misses == 2
+
+
+@p("source, expected", [
+    ("1 < 2", TRUE),
+    ("2.5 > 3.0", FALSE),
+    ("3 == 3", TRUE),
+    ("7 / 2", IntegerValue(3)),
+    ("1.0 - 0.5", FloatValue(0.5)),
+])
+def test_specialised_operations_match_generic(source, expected):
+    node = parse_expression(source)
+    assert evaluate_node(node, Scope()) == expected
+    assert evaluate_node(node, Scope()) == expected
+    assert isinstance(node, BinaryOperation) and node.quickened is not None
+
+
+def test_identifier_caches_how_far_up_it_was_found():
+    outer = Scope()
+    outer.put("x", IntegerValue(1))
+    node = Identifier("x")
+
+    assert evaluate_node(node, Scope(parent=Scope(parent=outer))) == IntegerValue(1)
+    assert node.cached_depth == 2
+    assert evaluate_node(node, Scope(parent=Scope(parent=outer))) == IntegerValue(1)
+    assert METRICS.identifier_hits == 1
+
+
+def test_identifier_despecialises_when_the_name_moves():
+    outer = Scope()
+    outer.put("x", IntegerValue(1))
+    node = Identifier("x")
+    evaluate_node(node, Scope(parent=Scope(parent=outer)))
+
+    assert evaluate_node(node, Scope(parent=outer)) == IntegerValue(1)
+    assert METRICS.identifier_misses == 1
+    assert node.cached_depth == 1
+
+    # Shadowed by a scope in between
+    inner = Scope(parent=outer)
+    inner.put("x", IntegerValue(3))
+    assert evaluate_node(node, inner) == IntegerValue(3)
+    assert METRICS.identifier_misses == 2
+    assert node.cached_depth == 0
+
+
+def test_global_defined_after_a_prelude_lookup():
+    # Definitions run from the last to the first, so `b` finds the
+    # prelude's list/length and `c` the one defined after it
+    source = "[b, c] ; c = f 1 ; list/length = x -> 42 ; b = f 1 ; f = x -> list/length [x]"
+    assert run(source) == run("[1, 42]")
+
+
+def test_unknown_identifier_raises():
+    node = Identifier("x")
+    with pytest.raises(ScrapNameError):
+        evaluate_node(node, Scope(parent=Scope()))
+
+
+def test_recursive_program_hits():
+    assert run("f 20 ; f = | 0 -> 0 | n -> n + f (n - 1)") == IntegerValue(210)
+    assert METRICS.operation_hits > 0 and METRICS.operation_misses == 0
+    assert METRICS.identifier_hits > 0 and METRICS.identifier_misses == 0
+    assert "100.0% hit rate" in METRICS.summary()
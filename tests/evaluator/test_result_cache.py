@@ -0,0 +1,135 @@
+import os
+
+import pytest
+
+import result_cache
+from evaluator import evaluate_program
+from result_cache import ResultCache, decode_value, encode_value
+from tests.helpers import imported_modules, parse
+from values import FloatValue, IntegerValue, TextValue, VariantValue, atom, make_list
+
+p = pytest.mark.parametrize
+
+SLOW = " ; slow = | 0 -> 1 | n -> slow (n - 1) + slow (n - 1)"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    # Caches everything, however fast
+    return ResultCache(str(tmp_path), min_duration=0)
+
+
+def run(cache: ResultCache, source: str):
+    return evaluate_program(parse(source), results=cache)
+
+
+def check_encoding(value):
+    decoded = decode_value(encode_value(value))
+    assert decoded == value
+    assert type(decoded) is type(value)
+
+
+@p("source", [
+    "1", "2.5", '"text"', "~FF", "~~aGVsbG8=", "#a", "[#a, #b]", "[]", "[1, 2, 3]", "[1.5, 2.0]",
+    "[1, 2.5]", '[{ a = 1, b = "x" }, { a = 2, b = "y" }]', '{ a = [1], b = { c = #d } }',
+    "[100000000000000000000000, 1]",
+])
+def test_values_survive_encoding(source):
+    check_encoding(evaluate_program(parse(source)))
+
+
+def test_variants_with_payloads_survive_encoding():
+    check_encoding(VariantValue(tag="a", payload=make_list([IntegerValue(1), atom("b")])))
+
+
+def test_results_are_reused_across_runs(cache):
+    assert run(cache, "slow 5" + SLOW) == IntegerValue(32)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert cache.bytes_written > 0
+
+    # Another program, with the same function under another name
+    assert run(cache, "[1, other 5] ; other = | 0 -> 1 | n -> other (n - 1) + other (n - 1)") \
+        == make_list([IntegerValue(1), IntegerValue(32)])
+    assert run(cache, "slow 5" + SLOW) == IntegerValue(32)
+    assert cache.hits == 1
+    assert cache.summary().startswith("Result cache: 1 hits, 2 misses")
+
+
+def test_keys_depend_on_free_variables(cache):
+    assert run(cache, "x + 1 ; x = 1") == IntegerValue(2)
+    assert run(cache, "x + 1 ; x = 2") == IntegerValue(3)
+    assert run(cache, "f 1 ; f = a -> a * 2") == IntegerValue(2)
+    assert run(cache, "f 1 ; f = a -> a * 3") == IntegerValue(3)
+    assert run(cache, "f 1 ; f = g >> g ; g = a -> a + 1") == IntegerValue(3)
+    assert run(cache, "f 1 ; f = g >> g ; g = a -> a + 2") == IntegerValue(5)
+    assert run(cache, "f [2] ; f = list/map (a -> a * 2) >> list/sum") == IntegerValue(4)
+    assert run(cache, "f [2] ; f = list/map (a -> a * 3) >> list/sum") == IntegerValue(6)
+
+
+def test_expressions_of_large_values_are_not_cached(cache, monkeypatch):
+    monkeypatch.setattr(result_cache, "MAX_KEY_VALUES", 10)
+    numbers = ", ".join(str(n) for n in range(20))
+
+    assert run(cache, f"list/length xs ; xs = [{numbers}]") == IntegerValue(20)
+    # Only the binding of xs, which has no free variables
+    assert cache.misses == 1
+
+
+def test_runtime_modules_cover_the_evaluator():
+    imported = imported_modules("evaluator.py", "prelude.py", "result_cache.py")
+    assert imported <= set(result_cache.RUNTIME_MODULES)
+
+
+def test_keys_depend_on_the_runtime_version(cache, monkeypatch):
+    run(cache, "slow 3" + SLOW)
+    monkeypatch.setattr(result_cache, "_version", "another version")
+    run(cache, "slow 3" + SLOW)
+    assert cache.hits == 0
+
+
+@p("source", ["f ; f = x -> x", "p::a 1 ; p : #a int | #b", "s ; s = list/repeat 3 1 |> list/map (x -> x)"])
+def test_functions_types_and_streams_are_not_stored(cache, source):
+    run(cache, source)
+    assert cache.skipped >= 1
+    assert cache.entries() == []
+
+
+def test_values_computed_by_functions_are_stored(cache):
+    assert run(cache, "list/map (x -> x) [1, 2]") == make_list([IntegerValue(1), IntegerValue(2)])
+    run(cache, "list/map (x -> x) [1, 2]")
+    assert cache.hits == 1
+
+
+def test_fast_results_are_not_stored(tmp_path):
+    cache = ResultCache(str(tmp_path), min_duration=60)
+    run(cache, "slow 3" + SLOW)
+    assert cache.entries() == []
+
+
+def test_failing_expressions_are_not_stored(cache):
+    with pytest.raises(Exception):
+        run(cache, "1 / 0")
+    assert cache.entries() == []
+
+
+def test_corrupt_entries_are_misses(cache):
+    source = "[1, 2.5, \"x\"]"
+    run(cache, source)
+    [(_, _, path)] = cache.entries()
+    with open(path, "wb") as file:
+        file.write(b"\x00garbage")
+
+    assert run(cache, source) == make_list([IntegerValue(1), FloatValue(2.5), TextValue("x")])
+    assert cache.hits == 0
+
+
+def test_entries_are_evicted(cache):
+    for n in range(3):
+        run(cache, f"x * {n} ; x = 2")
+    for time, (_, _, path) in enumerate(cache.entries()):
+        os.utime(path, (time, time))
+
+    entries = len(cache.entries())
+    assert cache.evict(cache.size() - 1) == 1
+    assert len(cache.entries()) == entries - 1
+    assert run(cache, "#a") == atom("a")
@@ -0,0 +1,150 @@
+import os
+import pickle
+
+import pytest
+
+import scrapyard
+from evaluator import evaluate_program
+from exceptions import ScrapyardError
+from scrapscript_ast import HashReference
+from scrapyard import Scrapyard, digest_of, parse_expression
+from tests.helpers import parse
+from values import IntegerValue, TextValue
+
+DOUBLE = "x -> x * 2"
+
+
+@pytest.fixture
+def yard(tmp_path):
+    scrapyard.use(str(tmp_path))
+    yield scrapyard.current()
+    scrapyard.use(None)
+
+
+def test_references_are_parsed():
+    digest = "ab" * 32
+    assert parse(f"$sha256'{digest} 1").declarations[0].expression.function == HashReference(digest)
+    assert repr(HashReference(digest)) == f"$sha256'{digest}"
+
+
+def test_saved_expressions_are_loaded(yard):
+    digest = yard.save(DOUBLE)
+    assert digest == digest_of(parse_expression(DOUBLE))
+    assert digest in yard
+    assert len(yard) == 1
+    assert yard.load(digest) == parse_expression(DOUBLE)
+    assert yard.source(digest) == DOUBLE
+
+
+def test_digests_ignore_formatting(yard):
+    assert yard.save(DOUBLE) == yard.save("x ->   x*2 -- doubles")
+    assert yard.save(DOUBLE) != yard.save("y -> y * 2")
+    assert len(yard) == 2
+
+
+def test_references_are_evaluated(yard):
+    double = yard.save(DOUBLE)
+    twice = yard.save("f -> x -> f (f x)")
+    source = f"$sha256'{twice} $sha256'{double} n ; n = 5"
+    assert evaluate_program(parse(source)) == IntegerValue(20)
+
+
+def test_stored_expressions_can_refer_to_others(yard):
+    greeting = yard.save('"hello "')
+    greet = yard.save(f"name -> $sha256'{greeting} ++ name")
+    assert evaluate_program(parse(f'$sha256\'{greet} "ron"')) == TextValue("hello ron")
+
+
+def test_expressions_are_loaded_from_disk(yard, tmp_path):
+    digests = [yard.save(f"x -> x + {n}") for n in range(10)]
+
+    reopened = Scrapyard(str(tmp_path))
+    assert len(reopened) == 10
+    assert [reopened.load(digest) for digest in digests] == [yard.load(digest) for digest in digests]
+    # Loaded once, and shared after that
+    assert reopened.load(digests[0]) is reopened.load(digests[0])
+
+
+def test_index_grows(yard, tmp_path, monkeypatch):
+    monkeypatch.setattr(scrapyard, "INITIAL_SLOTS", 4)
+    other = Scrapyard(str(tmp_path / "small"))
+    digests = [other.save(f"{n}") for n in range(50)]
+
+    reopened = Scrapyard(str(tmp_path / "small"))
+    assert len(reopened) == 50
+    assert all(digest in reopened for digest in digests)
+    assert reopened.load(digests[42]) == parse_expression("42")
+
+
+def test_source_is_parsed_if_the_tree_can_not_be_loaded(yard, tmp_path, monkeypatch):
+    digest = yard.save(DOUBLE)
+
+    def fail(data):
+        raise TypeError("unknown node")
+    monkeypatch.setattr(scrapyard, "load_tree", fail)
+    assert Scrapyard(str(tmp_path)).load(digest) == parse_expression(DOUBLE)
+
+
+def test_trees_that_do_not_match_their_digest_are_parsed_again(yard, tmp_path, monkeypatch):
+    digest = yard.save(DOUBLE)
+
+    monkeypatch.setattr(scrapyard, "load_tree", lambda data: parse_expression("x -> x * 3"))
+    assert Scrapyard(str(tmp_path)).load(digest) == parse_expression(DOUBLE)
+
+
+def test_trees_that_run_code_are_not_loaded(yard, tmp_path, monkeypatch):
+    ran = tmp_path / "ran"
+
+    class Exploit:
+        def __reduce__(self):
+            return os.mkdir, (str(ran),)
+    monkeypatch.setattr(scrapyard, "dump_tree", lambda tree: pickle.dumps(Exploit()))
+    digest = yard.save(DOUBLE)
+
+    assert Scrapyard(str(tmp_path)).load(digest) == parse_expression(DOUBLE)
+    assert not ran.exists()
+
+
+def test_damaged_entries_are_not_loaded(yard, tmp_path, monkeypatch):
+    digest = yard.save(DOUBLE)
+    monkeypatch.setattr(scrapyard, "load_tree", lambda data: parse_expression("x -> x * 3"))
+    with open(tmp_path / "yard.pack", "r+b") as pack:
+        data = pack.read()
+        pack.seek(data.index(b"* 2"))
+        pack.write(b"* 3")
+
+    reopened = Scrapyard(str(tmp_path))
+    assert reopened.source(digest) == "x -> x * 3"
+    with pytest.raises(ScrapyardError):
+        reopened.load(digest)
+
+
+def test_saves_from_several_yards_are_all_kept(yard, tmp_path, monkeypatch):
+    monkeypatch.setattr(scrapyard, "INITIAL_SLOTS", 4)
+    first = Scrapyard(str(tmp_path / "shared"))
+    second = Scrapyard(str(tmp_path / "shared"))
+
+    # The second yard rebuilds the index the first one has mapped
+    digests = [first.save("1"), second.save("2"), second.save("3"), first.save("4")]
+
+    reopened = Scrapyard(str(tmp_path / "shared"))
+    assert len(reopened) == 4
+    assert [reopened.source(digest) for digest in digests] == ["1", "2", "3", "4"]
+
+
+@pytest.mark.parametrize("source", ["x + 1", "1 ; x = 2", "t : #a"])
+def test_only_closed_expressions_can_be_saved(yard, source):
+    with pytest.raises(ScrapyardError):
+        yard.save(source)
+    assert len(yard) == 0
+
+
+def test_builtins_can_be_used(yard):
+    digest = yard.save("list/length")
+    assert evaluate_program(parse(f"$sha256'{digest} [1, 2]")) == IntegerValue(2)
+
+
+def test_unknown_references(yard):
+    with pytest.raises(ScrapyardError):
+        evaluate_program(parse(f"$sha256'{'0' * 64}"))
+    assert "not hex" not in yard
@@ -0,0 +1,88 @@
+import pytest
+
+import tiering
+from evaluator import evaluate_program
+from exceptions import ScrapEvalError, ScrapTypeError
+from tests.helpers import parse
+from tiering import describe_tiers
+from type_inference import specialise
+from values import FloatValue, IntegerValue, TextValue, atom, make_list
+
+p = pytest.mark.parametrize
+
+PERSON = " ; person : #cowboy #ron int #stranger text"
+
+
+@pytest.fixture
+def threshold(monkeypatch):
+    def set_threshold(calls):
+        monkeypatch.setattr(tiering, "COMPILE_THRESHOLD", calls)
+    return set_threshold
+
+
+@p("source, expected", [
+    ("f 10 ; f = | 0 -> 1 | n -> n * f (n - 1)", IntegerValue(3628800)),
+    ("f 1 2 ; f = a -> a -> a", IntegerValue(2)),
+    ("add 1 2 ; add = a -> b -> a + b", IntegerValue(3)),
+    ("half 3.0 ; half = x -> x / 2.0", FloatValue(1.5)),
+    ('greet "ron" ; greet = name -> "hi " ++ name', TextValue("hi ron")),
+    ("f 3 ; f = x -> [x, x + 1] +< 5", make_list([IntegerValue(n) for n in (3, 4, 5)])),
+    ("f 1 ; f = x -> (y -> x + y) 2", IntegerValue(3)),
+    ("f 2 ; f = x -> { a = x }.a", IntegerValue(2)),
+    ("f 1 ; f = x -> x < 2", atom("true")),
+    ('f "b" ; f = | "a" -> 1 | "b" -> 2', IntegerValue(2)),
+    ("f #b ; f = | #a -> 1 | _ -> 0", IntegerValue(0)),
+    ("f (person::ron 5) ; f = | #cowboy -> 0 | #ron n -> n" + PERSON, IntegerValue(5)),
+    ('f (person::stranger "x") ; f = | #stranger "x" -> 1 | _ -> 2' + PERSON, IntegerValue(1)),
+    ("(inc >> inc) 1 ; inc = x -> x + 1", IntegerValue(3)),
+])
+def test_compiled_functions_match_the_evaluator(source, expected, threshold):
+    threshold(None)
+    assert evaluate_program(parse(source)) == expected
+
+    threshold(1)
+    assert evaluate_program(parse(source)) == expected
+
+
+def test_specialised_operations_are_compiled(threshold):
+    threshold(1)
+    program = parse("f 10 ; f = | 0 -> 1 | n -> n * f (n - 1)")
+    assert specialise(program) is not None
+    assert evaluate_program(program) == IntegerValue(3628800)
+
+
+@p("source, error", [
+    ('f 1 ; f = x -> x + "a"', ScrapTypeError),
+    ("f 2 ; f = | 1 -> 0", ScrapEvalError),
+])
+def test_compiled_functions_raise_the_same_errors(source, error, threshold):
+    threshold(1)
+    with pytest.raises(error):
+        evaluate_program(parse(source))
+
+
+def test_functions_are_compiled_once_hot(threshold):
+    threshold(5)
+    program = parse("list/fold f 0 (list/range 0 10) ; f = a -> x -> a + x ; g = x -> x")
+    evaluate_program(program)
+
+    f = program.declarations[1].body
+    assert f.call_count == 10
+    assert f.compiled is not None
+    assert program.declarations[2].body.compiled is None
+
+
+def test_partial_application_stays_on_the_evaluator(threshold):
+    threshold(1)
+    program = parse("add 1 2 ; inc = add 1 ; add = a -> b -> a + b")
+    assert evaluate_program(program) == IntegerValue(3)
+
+
+def test_describe_tiers(threshold):
+    threshold(3)
+    program = parse('list/fold f "" ["a", "b", "c"] ; f = a -> x -> a ++ x ; g = | 0 -> 0 | n -> g (n - 1)')
+    evaluate_program(program)
+
+    lines = describe_tiers(program).splitlines()
+    assert lines[0] == "Tiers: 1 of 1 called functions compiled"
+    assert lines[1].split() == ["compiled", "3", "calls", "(a", "->", "(x", "->", "(++", "a", "x)))"]
@@ -0,0 +1,127 @@
+import pytest
+
+from evaluator import evaluate_program
+from exceptions import ScrapTypeError
+from prelude import BUILTINS
+from scrapscript_ast import BinaryOperation, FunctionDefinitionStatement
+from tests.helpers import parse
+from type_inference import (BOOL, BUILTIN_TYPES, FLOAT, INT, TEXT, CannotInfer, infer_types,
+                            list_of, specialise)
+from values import FloatValue, IntegerValue, TextValue
+
+p = pytest.mark.parametrize
+
+
+@p("source, expected", [
+    ("1 + 2", INT),
+    ("1.5 * 2.0", FLOAT),
+    ('"a" ++ "b"', TEXT),
+    ("[1, 2] +< 3", list_of(INT)),
+    ("1 < 2", BOOL),
+    ("f 3 ; f = x -> x * 2", INT),
+    ("f 10 ; f = | 0 -> 1 | n -> n * f (n - 1)", INT),
+    ('[id 1, id 2] ; y = id "a" ; id = x -> x', list_of(INT)),
+    ("even 10 ; even = | 0 -> #true | n -> odd (n - 1) ; odd = | 0 -> #false | n -> even (n - 1)", BOOL),
+    ("list/fold (a -> x -> a + x) 0 (list/range 0 10)", INT),
+    ("list/map int/to_float [1, 2] |> list/get 0", FLOAT),
+    ("list/sum [1, 2]", INT),
+    ("(inc >> inc) 1 ; inc = x -> x + 1", INT),
+    ("g (person::ron 3) ; g = | #cowboy -> 0 | #ron n -> n ; person : #cowboy #ron int", INT),
+])
+def test_infer_types(source, expected):
+    assert infer_types(parse(source)) == expected
+
+
+@p("source", [
+    '1 + "a"',
+    "add 1 2.0 ; add = a -> b -> a + b",
+    '"a" - "b"',
+    "x -> x x",
+    "{ a = 1 }",
+    "#ok",
+    "unknown 1",
+    "x ; x = 1 ; x = 2",
+    'list/sum ["a"]',
+    "list/sum [1.5, 2.0]",
+    "g (t::b 1) ; g = | #a -> 0 ; t : #a",
+])
+def test_cannot_infer(source):
+    with pytest.raises(CannotInfer):
+        infer_types(parse(source))
+
+
+def test_every_builtin_has_a_type():
+    assert BUILTIN_TYPES.keys() == BUILTINS.keys()
+
+
+def operations(program):
+    for statement in program.declarations:
+        node = statement.body if isinstance(statement, FunctionDefinitionStatement) \
+            else statement.expression
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, BinaryOperation):
+                yield node
+            stack.extend(getattr(node, name) for name in getattr(node, "__dataclass_fields__", ())
+                         if name not in ("specialised", "cached_free_variables", "cached_lambdas"))
+
+
+def test_arithmetic_on_known_types_is_specialised():
+    program = parse("f 3 ; f = x -> x * 2 + 1")
+
+    assert specialise(program) == INT
+    assert all(node.specialised is not None for node in operations(program))
+    assert evaluate_program(program) == IntegerValue(7)
+
+
+def test_polymorphic_arithmetic_stays_checked():
+    program = parse("[add 1 2] ; y = add 1.5 2.5 ; add = a -> b -> a + b")
+
+    assert specialise(program) is not None
+    assert all(node.specialised is None for node in operations(program))
+
+
+def test_programs_that_cannot_be_typed_run_checked():
+    program = parse('f 1 ; g = f "a" ; f = x -> x + 1')
+
+    assert specialise(program) is None
+    assert all(node.specialised is None for node in operations(program))
+    with pytest.raises(ScrapTypeError):
+        evaluate_program(parse('f "a" ; f = x -> x + 1'))
+
+
+@p("source, expected", [
+    ("f 10 ; f = | 0 -> 1 | n -> n * f (n - 1)", IntegerValue(3628800)),
+    ("7 / 2 - -1", IntegerValue(4)),
+    ("1.5 / 2.0 - -1.0", FloatValue(1.75)),
+    ("2000 * 2000", IntegerValue(4000000)),
+    ('text/repeat (1 + 1) "ab"', TextValue("abab")),
+    ("list/sum (list/filter (x -> x > 9) [1]) + 2", IntegerValue(2)),
+])
+def test_specialised_results_match_checked_results(source, expected):
+    checked = parse(source)
+    specialised = parse(source)
+
+    assert specialise(specialised) is not None
+    assert evaluate_program(specialised) == evaluate_program(checked) == expected
+
+
+
+def outcome(program):
+    try:
+        return evaluate_program(program)
+    except ScrapTypeError as error:
+        return type(error)
+
+
+@p("source, expected", [
+    ("list/sum [] + 1.5", ScrapTypeError),
+    ("list/sum (list/filter (x -> x > 9.0) [1.5]) + 0.5", FloatValue(0.5)),
+    ("list/sum [1.5, 2.0] / 2.0", FloatValue(1.75)),
+])
+def test_float_sums_agree_with_and_without_inference(source, expected):
+    inferred = parse(source)
+    specialise(inferred)
+
+    assert outcome(inferred) == outcome(parse(source)) == expected
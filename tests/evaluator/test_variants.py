@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+from exceptions import ScrapEvalError, ScrapTypeError
+from prelude import prelude_scope
+from scope import Scope
+from tests.helpers import run
+from values import (FALSE, HOLE, TRUE, IntegerValue, TaggedVariantValue, TextValue,
+                    VariantType, VariantValue, atom)
+
+p = pytest.mark.parametrize
+
+# The example the variants were added for, run as it is
+with open(os.path.join(os.path.dirname(__file__), "..", "..", "examples", "greet.scrap")) as file:
+    GREET = "\n" + file.read()
+
+
+def define_greet() -> Scope:
+    scope = Scope(parent=prelude_scope())
+    run("1" + GREET, scope=scope)
+    return scope
+
+
+@p("source, expected", [
+    ("greet person::cowboy", "howdy"),
+    ("greet (person::ron 3)", "hi aaaron"),
+    ("greet (person::parent #m)", "hey mom"),
+    ("greet (person::parent #f)", "greetings father"),
+    ("greet (person::friend 3)", "yo yo yo"),
+    ('greet (person::stranger "felicia")', "bye"),
+    ('greet (person::stranger "alice")', "hello alice"),
+])
+def test_match_on_variants(source, expected):
+    assert run(source + GREET) == TextValue(expected)
+
+
+def test_type_definition_numbers_its_variants():
+    variant_type = run("person" + GREET)
+
+    assert isinstance(variant_type, VariantType)
+    assert variant_type.tags == ("cowboy", "ron", "parent", "friend", "stranger")
+    assert variant_type.index("stranger") == 4
+
+
+def test_variants_carry_their_index():
+    value = run("person::ron 3" + GREET)
+
+    assert isinstance(value, TaggedVariantValue)
+    assert (value.index, value.payload) == (1, IntegerValue(3))
+    assert str(value) == "#ron 3"
+
+
+def test_the_example_runs_on_its_own():
+    assert run(GREET) == HOLE
+
+
+def test_variants_without_payload_are_shared():
+    scope = define_greet()
+
+    assert run("person::cowboy", scope=scope) is run("person::cowboy", scope=scope)
+
+
+@p("source", [
+    "person::ron 1 == person::ron 1",
+    "person::cowboy == person::cowboy",
+])
+def test_equal_variants(source):
+    assert run(source + GREET) == TRUE
+
+
+@p("source", [
+    "person::ron 1 == person::ron 2",
+    'person::ron 1 == person::stranger "a"',
+    "person::cowboy == #cowboy",
+])
+def test_unequal_variants(source):
+    assert run(source + GREET) == FALSE
+
+
+@p("source, error", [
+    ("person::nobody", ScrapEvalError),
+    ("person::ron", ScrapEvalError),
+    ("person::cowboy 1", ScrapEvalError),
+    ("greet::cowboy", ScrapTypeError),
+    ("greet (person::ron 3) ; greet = | #cowboy -> 1", ScrapEvalError),
+])
+def test_invalid_variants(source, error):
+    with pytest.raises(error):
+        run(source + GREET)
+
+
+def test_duplicate_variants_are_rejected():
+    with pytest.raises(ScrapEvalError):
+        run("1 ; t : #a #a")
+
+
+def test_match_dispatches_on_the_variant_index():
+    scope = define_greet()
+    greet = scope.get("greet")
+
+    run("greet person::cowboy", scope=scope)
+
+    variant_type, table = greet.body.cached_dispatch
+    assert variant_type is scope.get("person")
+    assert [len(clauses) for clauses in table] == [1, 1, 2, 1, 2]
+
+
+@p("source, expected", [
+    ("#ok", atom("ok")),
+    ("f #b ; f = | #a -> 1 | #b -> 2", IntegerValue(2)),
+    ("f (1 == 1) ; f = | #true -> 1 | #false -> 0", IntegerValue(1)),
+    ("f (person::ron 5) ; f = | #ron -> 1 | _ -> 0" + GREET, IntegerValue(1)),
+])
+def test_atoms(source, expected):
+    assert run(source) == expected
+
+
+def test_atoms_are_untagged_variants():
+    assert run("#ok") == VariantValue(tag="ok", payload=HOLE)
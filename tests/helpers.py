@@ -0,0 +1,48 @@
+import ast
+import os
+from typing import Optional, Set
+
+from evaluator import evaluate_program
+from lexer import extract_tokens
+from parser import Parser
+from scope import Scope
+from scrapscript_ast import Expression, Program
+from values import Value
+
+
+def parse(source: str, **kwargs) -> Program:
+    return Parser(extract_tokens(source.splitlines()), **kwargs).parse_program()
+
+
+def parse_expression(source: str) -> Expression:
+    return Parser(extract_tokens(source.splitlines())).parse_expression()
+
+
+def run(source: str, scope: Optional[Scope] = None) -> Value:
+    return evaluate_program(parse(source), scope=scope)
+
+
+def imported_modules(*modules: str) -> Set[str]:
+    """The interpreter's modules, with the ones they import, directly or not."""
+    directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    found = {name for name in os.listdir(directory) if name.endswith(".py")}
+
+    imported: Set[str] = set()
+    pending = list(modules)
+    while pending:
+        module = pending.pop()
+        if module in imported:
+            continue
+        imported.add(module)
+        with open(os.path.join(directory, module)) as file:
+            tree = ast.parse(file.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module is not None:
+                names = [node.module]
+            else:
+                continue
+            pending.extend(name + ".py" for name in names if name + ".py" in found)
+
+    return imported
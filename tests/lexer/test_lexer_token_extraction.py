@@ -26,6 +26,7 @@ import pytest
         (["::"], [TokenType.DOUBLE_COLON, TokenType.END_OF_FILE]),
 
         (["|"], [TokenType.PIPE, TokenType.END_OF_FILE]),
+        (["|>"], [TokenType.PIPE_APPLY, TokenType.END_OF_FILE]),
 
         (["hello"], [TokenType.IDENTIFIER, TokenType.END_OF_FILE]),
         # _ is another token we can match against, we can't start identifiers with it
@@ -34,6 +35,9 @@ import pytest
         # (["_1dsa23"], [TokenType.IDENTIFIER, TokenType.END_OF_FILE]),
         (["abc123"], [TokenType.IDENTIFIER, TokenType.END_OF_FILE]),
         (["abc_123"], [TokenType.IDENTIFIER, TokenType.END_OF_FILE]),
+        (["text/repeat"], [TokenType.IDENTIFIER, TokenType.END_OF_FILE]),
+        (["a / b"], [TokenType.IDENTIFIER, TokenType.SLASH, TokenType.IDENTIFIER, TokenType.END_OF_FILE]),
+        (["a/2"], [TokenType.IDENTIFIER, TokenType.SLASH, TokenType.INTEGER, TokenType.END_OF_FILE]),
 
         (["+"], [TokenType.PLUS, TokenType.END_OF_FILE]),
         (["++"], [TokenType.DOUBLE_PLUS, TokenType.END_OF_FILE]),
@@ -41,6 +45,7 @@ import pytest
         (["-"], [TokenType.MINUS, TokenType.END_OF_FILE]),
 
         (["="], [TokenType.EQUALS, TokenType.END_OF_FILE]),
+        (["=="], [TokenType.DOUBLE_EQUALS, TokenType.END_OF_FILE]),
 
         (["#hello"], [TokenType.ATOM, TokenType.END_OF_FILE]),
         (["#HELLO"], [TokenType.ATOM, TokenType.END_OF_FILE]),
@@ -81,6 +86,9 @@ import pytest
         (["{"], [TokenType.START_CURLY_BRACKETS, TokenType.END_OF_FILE]),
         (["}"], [TokenType.END_CURLY_BRACKETS, TokenType.END_OF_FILE]),
 
+        (["["], [TokenType.START_SQUARE_BRACKETS, TokenType.END_OF_FILE]),
+        (["]"], [TokenType.END_SQUARE_BRACKETS, TokenType.END_OF_FILE]),
+
         (["."], [TokenType.DOT, TokenType.END_OF_FILE]),
 
         ([","], [TokenType.COMMA, TokenType.END_OF_FILE]),
@@ -132,6 +140,13 @@ def test_token_extraction(test_input, expected_token_types):
         ('"a string"',  [(TokenType.TEXT, '"a string"')]),
         ('"a string with `"expressions"` in it"',
          [(TokenType.INTERPOLATED_TEXT, '"a string with `"expressions"` in it"')]),
+        # An interpolated text stops at its own closing quote
+        ('["`x`", "y"]',
+         [(TokenType.START_SQUARE_BRACKETS, "["), (TokenType.INTERPOLATED_TEXT, '"`x`"'), (TokenType.COMMA, ","),
+          (TokenType.TEXT, '"y"'), (TokenType.END_SQUARE_BRACKETS, "]")]),
+        ('"hi `name`!" ; name = "ron"',
+         [(TokenType.INTERPOLATED_TEXT, '"hi `name`!"'), (TokenType.SEMI_COLON, ";"),
+          (TokenType.IDENTIFIER, "name"), (TokenType.EQUALS, "="), (TokenType.TEXT, '"ron"')]),
         ("123",         [(TokenType.INTEGER, "123")]),
         ("45.67",       [(TokenType.FLOAT, "45.67")]),
         # ("  \t ",      [(TokenType.WHITE_SPACE, "  \t ")]),
@@ -0,0 +1,68 @@
+from evaluator import evaluate_program
+from hash_consing import NodeInterner, share_nodes
+from scrapscript_ast import FloatLiteral
+from tests.helpers import parse
+from type_inference import specialise
+from values import FloatValue, IntegerValue, make_list
+
+
+def test_identical_subtrees_are_shared():
+    elements = parse("[{ a = 1 + 2 }, { a = 1 + 2 }, { a = 1 + 3 }]").declarations[0].expression.elements
+
+    assert elements[0] is elements[1]
+    assert elements[0] is not elements[2]
+    assert elements[0].fields[0].value.left is elements[2].fields[0].value.left
+
+
+def test_sharing_can_be_turned_off():
+    elements = parse("[1 + 2, 1 + 2]", share_nodes=False).declarations[0].expression.elements
+    assert elements[0] == elements[1]
+    assert elements[0] is not elements[1]
+
+
+def test_identifiers_are_not_shared_but_their_parents_are():
+    elements = parse("[x, x, f x, f x]").declarations[0].expression.elements
+
+    assert elements[0] is not elements[1]
+    assert elements[2] is elements[3]
+
+
+def test_values_of_different_types_are_not_shared():
+    elements = parse("[1, 1.0, 0.0, 0.0]").declarations[0].expression.elements
+
+    assert elements[0] is not elements[1]
+    assert isinstance(elements[1], FloatLiteral)
+    assert elements[2] is elements[3]
+    assert NodeInterner()._key(0.0) != NodeInterner()._key(-0.0)
+
+
+def test_statements_are_not_shared():
+    declarations = parse("1 ; a = 1 ; b = 1").declarations
+    assert declarations[1] is not declarations[2]
+    assert declarations[1].body is declarations[2].body
+
+
+def test_programs_dont_share_nodes():
+    # Specialising one must not change the operations the other runs
+    first = parse("(x -> y -> x + y) 1 2")
+    second = parse("(x -> y -> x + y) 1.5 2.25")
+    assert first.declarations[0].expression.function.function is not \
+        second.declarations[0].expression.function.function
+
+    assert specialise(first) is not None
+    assert evaluate_program(second) == FloatValue(3.75)
+    assert evaluate_program(first) == IntegerValue(3)
+
+
+def test_share_nodes_of_an_unshared_program():
+    program = share_nodes(parse("[f (1 + 2), f (1 + 2)]", share_nodes=False))
+    elements = program.declarations[0].expression.elements
+    assert elements[0] is elements[1]
+
+
+def test_shared_operation_used_at_two_types_is_not_specialised():
+    # Both lambdas are one node, used with an int and with a float
+    program = parse("[(x -> x + x) 1] ; y = (x -> x + x) 1.5")
+    assert specialise(program) is not None
+    assert evaluate_program(program) == make_list([IntegerValue(2)])
+    assert evaluate_program(parse("(x -> x + x) 1.5 ; y = [(x -> x + x) 1]")) == FloatValue(3.0)
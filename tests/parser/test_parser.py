@@ -663,3 +663,367 @@ def test_parse_variant_construction(input_tokens, expected_ast):
     logging.debug(f"Actual:   {result_ast}")
 
     assert result_ast == expected_ast
+
+
+@p("input_tokens, expected_ast",
+    [
+        (
+            # Code: `{ a = 1, b = "x" }`
+            [
+                Token(token_type=TokenType.START_CURLY_BRACKETS, lexeme="{"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="a"),
+                Token(token_type=TokenType.EQUALS, lexeme="="),
+                Token(token_type=TokenType.INTEGER, lexeme="1"),
+                Token(token_type=TokenType.COMMA, lexeme=","),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="b"),
+                Token(token_type=TokenType.EQUALS, lexeme="="),
+                Token(token_type=TokenType.TEXT, lexeme='"x"'),
+                Token(token_type=TokenType.END_CURLY_BRACKETS, lexeme="}"),
+            ],
+            RecordLiteral(
+                fields=[
+                    RecordField(name="a", value=IntegerLiteral(1)),
+                    RecordField(name="b", value=TextLiteral('"x"')),
+                ]
+            )
+        ),
+        (
+            # Code: `{}`
+            [
+                Token(token_type=TokenType.START_CURLY_BRACKETS, lexeme="{"),
+                Token(token_type=TokenType.END_CURLY_BRACKETS, lexeme="}"),
+            ],
+            RecordLiteral(fields=[])
+        ),
+        (
+            # Code: `{ ..g, a = 2 }`
+            [
+                Token(token_type=TokenType.START_CURLY_BRACKETS, lexeme="{"),
+                Token(token_type=TokenType.DOT, lexeme="."),
+                Token(token_type=TokenType.DOT, lexeme="."),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="g"),
+                Token(token_type=TokenType.COMMA, lexeme=","),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="a"),
+                Token(token_type=TokenType.EQUALS, lexeme="="),
+                Token(token_type=TokenType.INTEGER, lexeme="2"),
+                Token(token_type=TokenType.END_CURLY_BRACKETS, lexeme="}"),
+            ],
+            RecordLiteral(
+                fields=[RecordField(name="a", value=IntegerLiteral(2))],
+                spread=Identifier("g")
+            )
+        ),
+        (
+            # Code: `rec.a.b + 1`
+            [
+                Token(token_type=TokenType.IDENTIFIER, lexeme="rec"),
+                Token(token_type=TokenType.DOT, lexeme="."),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="a"),
+                Token(token_type=TokenType.DOT, lexeme="."),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="b"),
+                Token(token_type=TokenType.PLUS, lexeme="+"),
+                Token(token_type=TokenType.INTEGER, lexeme="1"),
+            ],
+            BinaryOperation(
+                left=FieldAccess(
+                    record=FieldAccess(record=Identifier("rec"), name="a"),
+                    name="b"
+                ),
+                operator=Operator.ADD,
+                right=IntegerLiteral(1)
+            )
+        ),
+    ]
+   )
+def test_parse_records(input_tokens, expected_ast):
+    """Tests parsing of record expressions and field access."""
+    parser = Parser(tokens=input_tokens)
+    result_ast = parser.parse_expression()
+    logging.debug(f"Actual:   {result_ast}")
+
+    assert result_ast == expected_ast
+
+
+@p("input_tokens, expected_ast",
+    [
+        (
+            # Code: `[]`
+            [
+                Token(token_type=TokenType.START_SQUARE_BRACKETS, lexeme="["),
+                Token(token_type=TokenType.END_SQUARE_BRACKETS, lexeme="]"),
+            ],
+            ListLiteral(elements=[])
+        ),
+        (
+            # Code: `[1, 2 + 3] +< 4`
+            [
+                Token(token_type=TokenType.START_SQUARE_BRACKETS, lexeme="["),
+                Token(token_type=TokenType.INTEGER, lexeme="1"),
+                Token(token_type=TokenType.COMMA, lexeme=","),
+                Token(token_type=TokenType.INTEGER, lexeme="2"),
+                Token(token_type=TokenType.PLUS, lexeme="+"),
+                Token(token_type=TokenType.INTEGER, lexeme="3"),
+                Token(token_type=TokenType.END_SQUARE_BRACKETS, lexeme="]"),
+                Token(token_type=TokenType.APPEND, lexeme="+<"),
+                Token(token_type=TokenType.INTEGER, lexeme="4"),
+            ],
+            BinaryOperation(
+                left=ListLiteral(elements=[
+                    IntegerLiteral(1),
+                    BinaryOperation(
+                        left=IntegerLiteral(2),
+                        operator=Operator.ADD,
+                        right=IntegerLiteral(3)
+                    ),
+                ]),
+                operator=Operator.APPEND,
+                right=IntegerLiteral(4)
+            )
+        ),
+        (
+            # Code: `a ++ b ++ c`, concatenation groups to the right
+            [
+                Token(token_type=TokenType.IDENTIFIER, lexeme="a"),
+                Token(token_type=TokenType.DOUBLE_PLUS, lexeme="++"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="b"),
+                Token(token_type=TokenType.DOUBLE_PLUS, lexeme="++"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="c"),
+            ],
+            BinaryOperation(
+                left=Identifier("a"),
+                operator=Operator.CONCATENATE,
+                right=BinaryOperation(
+                    left=Identifier("b"),
+                    operator=Operator.CONCATENATE,
+                    right=Identifier("c")
+                )
+            )
+        ),
+        (
+            # Code: `a ++ b +< 1`, appending binds tighter than concatenation
+            [
+                Token(token_type=TokenType.IDENTIFIER, lexeme="a"),
+                Token(token_type=TokenType.DOUBLE_PLUS, lexeme="++"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="b"),
+                Token(token_type=TokenType.APPEND, lexeme="+<"),
+                Token(token_type=TokenType.INTEGER, lexeme="1"),
+            ],
+            BinaryOperation(
+                left=Identifier("a"),
+                operator=Operator.CONCATENATE,
+                right=BinaryOperation(
+                    left=Identifier("b"),
+                    operator=Operator.APPEND,
+                    right=IntegerLiteral(1)
+                )
+            )
+        ),
+    ]
+   )
+def test_parse_lists(input_tokens, expected_ast):
+    """Tests parsing of list expressions, appending and concatenation."""
+    parser = Parser(tokens=input_tokens)
+    result_ast = parser.parse_expression()
+    logging.debug(f"Actual:   {result_ast}")
+
+    assert result_ast == expected_ast
+
+
+def test_parse_interpolated_text_into_template():
+    """
+    Interpolated text is compiled into literal chunks and embedded
+    expressions, with text literals folded into the chunks.
+    """
+    parser = Parser(tokens=[
+        Token(token_type=TokenType.INTERPOLATED_TEXT,
+              lexeme='"hello `name`, `"frog"` and `x + 1`!"'),
+    ])
+
+    result = parser.parse_expression()
+
+    assert isinstance(result, InterpolatedTextLiteral)
+    assert result.parts == [
+        "hello ",
+        Identifier("name"),
+        ", frog and ",
+        BinaryOperation(
+            left=Identifier("x"),
+            operator=Operator.ADD,
+            right=IntegerLiteral(1)
+        ),
+        "!",
+    ]
+
+
+def test_parse_constant_interpolated_text_is_folded():
+    parser = Parser(tokens=[
+        Token(token_type=TokenType.INTERPOLATED_TEXT,
+              lexeme='"hello` "🐸" `frog"'),
+    ])
+
+    assert parser.parse_expression() == TextLiteral('"hello🐸frog"')
+
+
+@p("input_tokens, expected_ast",
+    [
+        (
+            # Code: `f x y`
+            [
+                Token(token_type=TokenType.IDENTIFIER, lexeme="f"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="x"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="y"),
+            ],
+            Application(
+                function=Application(function=Identifier("f"), argument=Identifier("x")),
+                argument=Identifier("y")
+            )
+        ),
+        (
+            # Code: `f 1 + 2`, application binds tighter than infix operators
+            [
+                Token(token_type=TokenType.IDENTIFIER, lexeme="f"),
+                Token(token_type=TokenType.INTEGER, lexeme="1"),
+                Token(token_type=TokenType.PLUS, lexeme="+"),
+                Token(token_type=TokenType.INTEGER, lexeme="2"),
+            ],
+            BinaryOperation(
+                left=Application(function=Identifier("f"), argument=IntegerLiteral(1)),
+                operator=Operator.ADD,
+                right=IntegerLiteral(2)
+            )
+        ),
+        (
+            # Code: `f - 1` is a subtraction, not an application
+            [
+                Token(token_type=TokenType.IDENTIFIER, lexeme="f"),
+                Token(token_type=TokenType.MINUS, lexeme="-"),
+                Token(token_type=TokenType.INTEGER, lexeme="1"),
+            ],
+            BinaryOperation(
+                left=Identifier("f"),
+                operator=Operator.SUBTRACT,
+                right=IntegerLiteral(1)
+            )
+        ),
+        (
+            # Code: `a -> b -> a + b`
+            [
+                Token(token_type=TokenType.IDENTIFIER, lexeme="a"),
+                Token(token_type=TokenType.RIGHT_ARROW, lexeme="->"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="b"),
+                Token(token_type=TokenType.RIGHT_ARROW, lexeme="->"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="a"),
+                Token(token_type=TokenType.PLUS, lexeme="+"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="b"),
+            ],
+            Function(
+                parameter=Identifier("a"),
+                body=Function(
+                    parameter=Identifier("b"),
+                    body=BinaryOperation(
+                        left=Identifier("a"),
+                        operator=Operator.ADD,
+                        right=Identifier("b")
+                    )
+                )
+            )
+        ),
+        (
+            # Code: `x |> f 1 |> g`
+            [
+                Token(token_type=TokenType.IDENTIFIER, lexeme="x"),
+                Token(token_type=TokenType.PIPE_APPLY, lexeme="|>"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="f"),
+                Token(token_type=TokenType.INTEGER, lexeme="1"),
+                Token(token_type=TokenType.PIPE_APPLY, lexeme="|>"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="g"),
+            ],
+            BinaryOperation(
+                left=BinaryOperation(
+                    left=Identifier("x"),
+                    operator=Operator.PIPE,
+                    right=Application(function=Identifier("f"), argument=IntegerLiteral(1))
+                ),
+                operator=Operator.PIPE,
+                right=Identifier("g")
+            )
+        ),
+    ]
+   )
+def test_parse_functions_and_application(input_tokens, expected_ast):
+    parser = Parser(tokens=input_tokens)
+    result_ast = parser.parse_expression()
+    logging.debug(f"Actual:   {result_ast}")
+
+    assert result_ast == expected_ast
+
+
+@p("input_tokens, expected_ast",
+    [
+        (
+            # Code: `| #ron n -> n | #parent #m -> 1 | #cowboy -> 2`
+            [
+                Token(token_type=TokenType.PIPE, lexeme="|"),
+                Token(token_type=TokenType.ATOM, lexeme="#ron"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="n"),
+                Token(token_type=TokenType.RIGHT_ARROW, lexeme="->"),
+                Token(token_type=TokenType.IDENTIFIER, lexeme="n"),
+                Token(token_type=TokenType.PIPE, lexeme="|"),
+                Token(token_type=TokenType.ATOM, lexeme="#parent"),
+                Token(token_type=TokenType.ATOM, lexeme="#m"),
+                Token(token_type=TokenType.RIGHT_ARROW, lexeme="->"),
+                Token(token_type=TokenType.INTEGER, lexeme="1"),
+                Token(token_type=TokenType.PIPE, lexeme="|"),
+                Token(token_type=TokenType.ATOM, lexeme="#cowboy"),
+                Token(token_type=TokenType.RIGHT_ARROW, lexeme="->"),
+                Token(token_type=TokenType.INTEGER, lexeme="2"),
+            ],
+            PatternMatchExpression(clauses=[
+                PatternClause(
+                    pattern=VariantPattern(
+                        tag=Atom("ron"),
+                        payload=VariablePattern(identifier=Identifier("n"))),
+                    body=Identifier("n")),
+                PatternClause(
+                    pattern=VariantPattern(
+                        tag=Atom("parent"),
+                        payload=VariantPattern(tag=Atom("m"))),
+                    body=IntegerLiteral(1)),
+                PatternClause(
+                    pattern=VariantPattern(tag=Atom("cowboy")),
+                    body=IntegerLiteral(2)),
+            ])
+        ),
+        (
+            # Code: `f #ok`
+            [
+                Token(token_type=TokenType.IDENTIFIER, lexeme="f"),
+                Token(token_type=TokenType.ATOM, lexeme="#ok"),
+            ],
+            Application(function=Identifier("f"), argument=Atom("ok"))
+        ),
+    ]
+   )
+def test_parse_variant_patterns_and_atoms(input_tokens, expected_ast):
+    parser = Parser(tokens=input_tokens)
+
+    assert parser.parse_expression() == expected_ast
+
+
+def test_parse_annotated_definitions():
+    # Code: `; double : int -> int = 2`
+    parser = Parser(tokens=[
+        Token(token_type=TokenType.SEMI_COLON, lexeme=";"),
+        Token(token_type=TokenType.IDENTIFIER, lexeme="double"),
+        Token(token_type=TokenType.COLON, lexeme=":"),
+        Token(token_type=TokenType.IDENTIFIER, lexeme="int"),
+        Token(token_type=TokenType.RIGHT_ARROW, lexeme="->"),
+        Token(token_type=TokenType.IDENTIFIER, lexeme="int"),
+        Token(token_type=TokenType.EQUALS, lexeme="="),
+        Token(token_type=TokenType.INTEGER, lexeme="2"),
+        Token(token_type=TokenType.END_OF_FILE, lexeme=""),
+    ])
+
+    assert parser.parse_program() == Program(declarations=[
+        FunctionDefinitionStatement(name="double", body=IntegerLiteral(2)),
+    ])
@@ -0,0 +1,141 @@
+import os
+import pickle
+
+import pytest
+
+import program_cache
+from evaluator import evaluate_program
+from optimiser import PassManager
+from program_cache import ProgramCache, dump_program, load_program
+from scrapscript_ast import FunctionDefinitionStatement
+from tests.helpers import imported_modules, parse
+from type_inference import specialise
+from values import IntegerValue, TextValue
+
+p = pytest.mark.parametrize
+
+SOURCE = "f 10 ; f = | 0 -> 1 | n -> n * f (n - 1)"
+
+
+@p("source, expected", [
+    (SOURCE, IntegerValue(3628800)),
+    ('greet "x" ; greet = name -> "hi " ++ name', TextValue("hi x")),
+    ("r.a + r.b ; r = { a = 1, b = [2, 3] |> list/length }", IntegerValue(3)),
+    ("f (p::b 2) ; f = | #a -> 0 | #b n -> n ; p : #a | #b int", IntegerValue(2)),
+    ('f 2 ; f = x -> "~~aGVsbG8=" == "~~aGVsbG8="', evaluate_program(parse("#true"))),
+])
+def test_loaded_programs_equal_parsed_programs(source, expected):
+    program = load_program(dump_program(parse(source)))
+    assert program == parse(source)
+    assert evaluate_program(program) == expected
+
+
+def test_caches_are_not_saved():
+    program = parse(SOURCE)
+    specialise(program)
+    evaluate_program(program)
+
+    loaded = load_program(dump_program(program))
+    body = loaded.declarations[1].body
+    assert body.call_count == 0
+    assert body.cached_free_variables is None
+    assert evaluate_program(loaded) == IntegerValue(3628800)
+
+
+def test_shared_nodes_stay_shared():
+    elements = load_program(dump_program(parse("[1 + 2, 1 + 2]"))).declarations[0].expression.elements
+    assert elements[0] is elements[1]
+
+
+def test_load_and_store(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    assert cache.load(SOURCE) is None
+
+    cache.store(SOURCE, 0, parse(SOURCE))
+    assert cache.load(SOURCE) == parse(SOURCE)
+    assert cache.load(SOURCE + " ", 0) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.summary().startswith("Program cache: 1 hits, 2 misses")
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_levels_are_cached_separately(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    source = "f 2 ; f = x -> x * x"
+    cache.store(source, 2, PassManager.for_level(2).run(parse(source)))
+
+    assert cache.load(source, 0) is None
+    optimised = cache.load(source, 2)
+    assert not any(isinstance(statement, FunctionDefinitionStatement) for statement in optimised.declarations)
+
+
+def test_interpreter_version_is_part_of_the_key(tmp_path, monkeypatch):
+    cache = ProgramCache(str(tmp_path))
+    cache.store(SOURCE, 0, parse(SOURCE))
+
+    monkeypatch.setattr(program_cache, "_version", "another version")
+    assert cache.load(SOURCE) is None
+
+
+def test_corrupt_entries_are_misses(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    with open(cache.path(cache.key(SOURCE, 0)), "wb") as file:
+        file.write(b"not a program")
+
+    assert cache.load(SOURCE) is None
+    cache.store(SOURCE, 0, parse(SOURCE))
+    assert cache.load(SOURCE) is not None
+
+
+class _Exploit:
+    def __reduce__(self):
+        return os.system, ("touch pwned",)
+
+
+@p("data", [
+    pickle.dumps(_Exploit()),
+    # A name reached through one of the tree's modules
+    b"\x80\x04cscrapscript_ast\nOptional\n.",
+    b"\x80\x04\x95\x00\x00\x00\x00\x00\x00\x00\x00\x8c\x05enums\x8c\x0cEnum.__new__\x93.",
+])
+def test_entries_can_only_build_trees(tmp_path, monkeypatch, data):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(pickle.UnpicklingError):
+        load_program(data)
+
+    cache = ProgramCache(str(tmp_path))
+    with open(cache.path(cache.key(SOURCE, 0)), "wb") as file:
+        file.write(data)
+    assert cache.load(SOURCE) is None
+    assert not os.path.exists(tmp_path / "pwned")
+
+
+def test_compiler_modules_cover_the_compiler():
+    imported = imported_modules("lexer.py", "parser.py", "optimiser.py", "program_cache.py")
+    assert imported <= set(program_cache.COMPILER_MODULES)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    sources = [f"{n} + 1" for n in range(3)]
+    for time, source in enumerate(sources):
+        cache.store(source, 0, parse(source))
+        os.utime(cache.path(cache.key(source, 0)), (time, time))
+
+    # Using the oldest entry makes it the newest
+    assert cache.load(sources[0]) is not None
+    cache.max_size = sum(size for _, size, _ in cache.entries()) - 1
+    assert cache.evict() == 1
+
+    assert cache.load(sources[1]) is None
+    assert cache.load(sources[0]) is not None
+    assert cache.load(sources[2]) is not None
+
+
+def test_clear(tmp_path):
+    cache = ProgramCache(str(tmp_path / "missing"))
+    assert cache.entries() == []
+
+    cache.store(SOURCE, 0, parse(SOURCE))
+    cache.clear()
+    assert cache.entries() == []
@@ -0,0 +1,113 @@
+import pytest
+
+from benchmarks.bench_prelude import CASES
+from exceptions import ScrapTypeError
+from prelude import BUILTINS
+from tests.helpers import run
+from values import BuiltinFunction, IntegerValue, ListValue, NumericListValue, RecordListValue, StreamValue, TextValue
+
+p = pytest.mark.parametrize
+
+
+@p("source, expected", [
+    ('"hi " ++ text/repeat 3 "a" ++ "ron"', TextValue("hi aaaron")),
+    ('"yo" |> list/repeat 3 |> string/join " "', TextValue("yo yo yo")),
+    ('text/split "," "a,b"', ListValue.from_iterable([TextValue("a"), TextValue("b")])),
+    ('text/length ("a" ++ "bc")', IntegerValue(3)),
+    ('list/map (x -> x * 2) [1, 2, 3]',
+     ListValue.from_iterable([IntegerValue(2), IntegerValue(4), IntegerValue(6)])),
+    ('list/fold (acc -> x -> acc - x) 10 [1, 2, 3]', IntegerValue(4)),
+    ('list/concat [[1], [], [2, 3]]',
+     ListValue.from_iterable([IntegerValue(1), IntegerValue(2), IntegerValue(3)])),
+    ('bytes/to_text (bytes/slice 1 3 ~~aGVsbG8=)', TextValue("el")),
+    ('bytes/length (bytes/join [~00, ~0102])', IntegerValue(3)),
+    ('int/max 3 (int/abs (-7))', IntegerValue(7)),
+    ('list/range 2 5', ListValue.from_iterable(map(IntegerValue, [2, 3, 4]))),
+    ('list/filter (x -> x > 1) [1, 2, 3]', ListValue.from_iterable(map(IntegerValue, [2, 3]))),
+    ('list/take 2 (list/repeat 5 "a")', ListValue.from_iterable([TextValue("a")] * 2)),
+    ('list/get 3 (list/range 10 20)', IntegerValue(13)),
+    ('list/length (list/filter (x -> x == 0) [0, 1, 0])', IntegerValue(2)),
+    ('list/fold (a -> x -> a + x) 0 (list/filter (x -> x > 2) (list/map (x -> x * 2) (list/range 0 10)))',
+     IntegerValue(88)),
+    ('list/range 0 3 ++ [7]', ListValue.from_iterable(map(IntegerValue, [0, 1, 2, 7]))),
+    ('list/length ["`x`", "y"] ; x = 1', IntegerValue(2)),
+    ('"hi `name`!" ; name = "ron"', TextValue("hi ron!")),
+    ('list/sum [1, 2, 3]', IntegerValue(6)),
+    ('list/sum (list/range 0 5)', IntegerValue(10)),
+    ('list/sum []', IntegerValue(0)),
+    ('list/sort [3, 1, 2]', ListValue.from_iterable(map(IntegerValue, [1, 2, 3]))),
+    ('list/sort ["b", "a"]', ListValue.from_iterable([TextValue("a"), TextValue("b")])),
+    ('[1, 2] + [3, 4]', ListValue.from_iterable(map(IntegerValue, [4, 6]))),
+    ('list/map (x -> 10 - x * k) [1, 2] ; k = 3', ListValue.from_iterable(map(IntegerValue, [7, 4]))),
+])
+def test_builtins(source, expected):
+    assert run(source) == expected
+
+
+def test_partially_applied_builtin_is_curried():
+    """Applying a builtin to fewer arguments than it takes gives a new function."""
+    result = run("repeat3 \"ab\" ; repeat3 = text/repeat 3")
+
+    assert result == TextValue("ababab")
+
+    partial = BUILTINS["text/repeat"].apply(IntegerValue(2))
+    assert isinstance(partial, BuiltinFunction)
+    assert partial.arguments == (IntegerValue(2),)
+    assert partial.apply(TextValue("x")) == TextValue("xx")
+
+
+def test_builtin_with_wrong_argument_type_raises_error():
+    with pytest.raises(ScrapTypeError):
+        run('text/repeat "a" "b"')
+
+
+def test_every_builtin_has_a_benchmark():
+    assert set(CASES) == set(BUILTINS)
+
+
+def test_stream_pipeline_is_never_materialized():
+    doubled = BUILTINS["list/map"].function(
+        run("x -> x * 2"), BUILTINS["list/range"].function(IntegerValue(0), IntegerValue(10)))
+    stream = BUILTINS["list/filter"].function(run("x -> x > 2"), doubled)
+
+    assert isinstance(stream, StreamValue)
+    assert len(stream.stages) == 2
+
+    assert BUILTINS["list/fold"].function(BUILTINS["int/max"], IntegerValue(0), stream) \
+        == IntegerValue(18)
+    assert stream._materialized is None
+
+
+def test_filter_predicate_must_return_a_boolean():
+    with pytest.raises(ScrapTypeError):
+        run("list/length (list/filter (x -> x) [1, 2])")
+
+
+@p("source, vectorised", [
+    ("list/map (x -> x * 2 + 1) [1, 2, 3]", True),
+    ("list/map (x -> 1) [1, 2, 3]", False),
+    ('list/map (x -> int/to_text x) [1, 2, 3]', False),
+])
+def test_arithmetic_map_over_numbers_is_vectorised(source, vectorised):
+    assert isinstance(run(source), NumericListValue) == vectorised
+
+
+ROWS = '[{ a = 1, b = "x" }, { a = 2, b = "y" }, { a = 3, b = "x" }]'
+
+
+@p("source, expected, kind", [
+    (f"list/map (r -> r.a) {ROWS}", "[1, 2, 3]", NumericListValue),
+    (f"list/map (r -> r.a * 2 - k) {ROWS} ; k = 1", "[1, 3, 5]", NumericListValue),
+    (f'list/filter (r -> r.b == "x") {ROWS}', '[{ a = 1, b = "x" }, { a = 3, b = "x" }]',
+     RecordListValue),
+    (f"list/filter (r -> 1 < r.a) {ROWS}", '[{ a = 2, b = "y" }, { a = 3, b = "x" }]',
+     RecordListValue),
+    ("list/filter (x -> x > 1) [3, 1, 2]", "[3, 2]", NumericListValue),
+    (f"list/map (r -> r.b ++ \"!\") {ROWS}", '["x!", "y!", "x!"]', StreamValue),
+    (f"list/filter (r -> r.a > r.a) {ROWS}", "[]", RecordListValue),
+])
+def test_columnar_map_and_filter(source, expected, kind):
+    result = run(source)
+
+    assert isinstance(result, kind)
+    assert str(result) == expected
@@ -0,0 +1,82 @@
+import base64
+
+import pytest
+
+from exceptions import ScrapTypeError
+from lexer import Token, TokenType
+from parser import Parser
+from rope import Rope
+from values import LAZY_BASE64_THRESHOLD, Base64Value, BytesValue, HexValue, TextValue
+
+p = pytest.mark.parametrize
+
+
+@p("lexeme, expected", [
+    ("~FF", b"\xff"),
+    ("~00ff", b"\x00\xff"),
+    ("~123", b"\x01\x23"),
+])
+def test_hex_value_from_lexeme(lexeme, expected):
+    assert HexValue.from_lexeme(lexeme).tobytes() == expected
+
+
+def test_small_base64_is_decoded_right_away():
+    value = Base64Value.from_lexeme("~~aGVsbG8gd29ybGQ=")
+
+    assert value._data == b"hello world"
+    assert str(value) == "~~aGVsbG8gd29ybGQ="
+
+
+def test_large_base64_is_decoded_lazily():
+    blob = bytes(range(256)) * (LAZY_BASE64_THRESHOLD // 128)
+    value = Base64Value.from_lexeme("~~" + base64.b64encode(blob).decode())
+
+    assert value._data is None
+    assert len(value) == len(blob)
+    assert value._data is None
+
+    assert value.tobytes() == blob
+    # Decoded once and kept
+    assert value.data is value.data
+
+
+def test_hex_and_base64_values_with_the_same_bytes_are_equal():
+    assert HexValue.from_lexeme("~68656c6c6f") == Base64Value.from_lexeme("~~aGVsbG8=")
+
+
+def test_slice_does_not_copy():
+    value = BytesValue(b"hello world")
+
+    sliced = value.slice(6, 11)
+
+    assert sliced.tobytes() == b"world"
+    assert isinstance(sliced.data, memoryview)
+    assert sliced.data.obj is value.data
+
+
+def test_concatenation_chain_is_joined_once():
+    piece = BytesValue(b"x" * 100)
+    large = BytesValue(memoryview(b"y" * 5000))
+
+    result = piece
+    for _ in range(50):
+        result = result.concatenate(piece)
+    result = result.concatenate(large).concatenate(piece)
+
+    assert isinstance(result._rope, Rope)
+    assert len(result) == 51 * 100 + 5000 + 100
+    assert result.tobytes() == b"x" * 5100 + b"y" * 5000 + b"x" * 100
+    assert result._rope is None
+
+
+def test_concatenating_bytes_with_text_raises_error():
+    with pytest.raises(ScrapTypeError):
+        BytesValue(b"a").concatenate(TextValue("a"))
+
+
+def test_parser_decodes_byte_literals():
+    parser = Parser(tokens=[Token(token_type=TokenType.HEXADECIMAL, lexeme="~FF")])
+
+    literal = parser.parse_expression()
+
+    assert literal.cached_value == HexValue(b"\xff")
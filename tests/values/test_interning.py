@@ -0,0 +1,81 @@
+import weakref
+
+import pytest
+
+from evaluator import evaluate_node, evaluate_program
+from prelude import prelude_scope
+from scope import Scope
+from tests.helpers import parse, parse_expression
+from values import (HOLE, INTERNED_TEXT_LENGTH, SMALL_INTEGER_MAX, SMALL_INTEGER_MIN,
+                    FALSE, TRUE, HoleValue, IntegerValue, TextValue, VariantValue,
+                    atom, integer, text)
+
+p = pytest.mark.parametrize
+
+
+@p("number", [SMALL_INTEGER_MIN, -1, 0, 1, 100, SMALL_INTEGER_MAX])
+def test_small_integers_are_shared(number):
+    assert integer(number) is integer(number)
+    assert integer(number) == IntegerValue(number)
+
+
+@p("number", [SMALL_INTEGER_MIN - 1, SMALL_INTEGER_MAX + 1, 10**30])
+def test_large_integers_are_not_cached(number):
+    assert integer(number) is not integer(number)
+    assert integer(number) == IntegerValue(number)
+
+
+def test_arithmetic_reuses_small_integers():
+    assert IntegerValue(2).add(IntegerValue(3)) is integer(5)
+    assert IntegerValue(3).negate() is integer(-3)
+
+
+def test_short_texts_are_shared():
+    assert text("hello") is text("hello")
+    assert text("hello") == TextValue("hello")
+
+
+def test_long_texts_are_not_interned():
+    long = "x" * (INTERNED_TEXT_LENGTH + 1)
+    assert text(long) is not text(long)
+    assert text(long) == TextValue(long)
+
+
+def test_atoms_are_shared():
+    assert atom("ok") is atom("ok")
+    assert atom("ok") == VariantValue(tag="ok", payload=HoleValue())
+    assert atom("true") is TRUE and atom("false") is FALSE
+
+
+def test_hole_is_a_singleton_but_equal_to_new_holes():
+    assert HOLE == HoleValue()
+
+
+@p("source", ["1", "1000000", "1.5", '"hi"', "~ff", "~~aGVsbG8="])
+def test_literal_evaluates_to_the_same_value_every_time(source):
+    node = parse_expression(source)
+    assert evaluate_node(node) is evaluate_node(node)
+
+
+def test_equal_literals_share_their_value():
+    assert evaluate_node(parse_expression('"a"')) is evaluate_node(parse_expression('"a"'))
+    assert evaluate_node(parse_expression("7")) is evaluate_node(parse_expression("7"))
+
+
+def test_literal_cache_does_not_affect_node_equality():
+    node = parse_expression("42")
+    evaluate_node(node)
+    assert node == parse_expression("42")
+
+
+def test_definitions_evaluate_to_the_hole():
+    program = parse("x = 1")
+    assert evaluate_program(program, scope=Scope(parent=prelude_scope())) is HOLE
+
+
+def test_interned_texts_are_not_kept_alive():
+    value = text("only here")
+    reference = weakref.ref(value)
+    del value
+
+    assert reference() is None
@@ -0,0 +1,106 @@
+import pytest
+
+import numeric_array
+from enums import Operator
+
+p = pytest.mark.parametrize
+
+
+@pytest.fixture(params=["array", "numpy"], autouse=True)
+def backend(request, monkeypatch):
+    """Runs every test with the standard library arrays, and with NumPy if it's installed."""
+    numpy = pytest.importorskip("numpy") if request.param == "numpy" else None
+    monkeypatch.setattr(numeric_array, "numpy", numpy)
+    return request.param
+
+
+def ints(*numbers):
+    return numeric_array.pack(list(numbers), is_float=False)
+
+
+def floats(*numbers):
+    return numeric_array.pack(list(numbers), is_float=True)
+
+
+def test_pack_round_trips():
+    assert numeric_array.to_list(ints(1, -2, 3)) == [1, -2, 3]
+    assert numeric_array.to_list(floats(1.5, 2.0)) == [1.5, 2.0]
+    assert numeric_array.item(ints(4, 5, 6), -1) == 6
+    assert type(numeric_array.item(ints(4), 0)) is int
+
+
+def test_pack_rejects_integers_that_dont_fit():
+    assert numeric_array.pack([1, 1 << 63], is_float=False) is None
+    assert numeric_array.pack([-(1 << 63) - 1], is_float=False) is None
+
+
+@p("numbers, expected", [
+    ([], 0),
+    ([1, 2, 3], 6),
+    ([numeric_array.INT_MAX, numeric_array.INT_MAX], 2 * numeric_array.INT_MAX),
+])
+def test_total(numbers, expected):
+    result = numeric_array.total(ints(*numbers), is_float=False)
+
+    assert result == expected
+    assert type(result) is int
+
+
+def test_sort_reverse_and_concatenate():
+    data = ints(3, 1, 2)
+
+    assert numeric_array.to_list(numeric_array.sort(data)) == [1, 2, 3]
+    assert numeric_array.to_list(numeric_array.reverse(data)) == [2, 1, 3]
+    assert numeric_array.to_list(numeric_array.concatenate(data, ints(4))) == [3, 1, 2, 4]
+    # The original is left as it was
+    assert numeric_array.to_list(data) == [3, 1, 2]
+
+
+@p("operator, left, right, is_float, expected", [
+    (Operator.ADD, [1, 2], [10, 20], False, [11, 22]),
+    (Operator.SUBTRACT, [1, 2], 1, False, [0, 1]),
+    (Operator.MULTIPLY, 3, [1, 2], False, [3, 6]),
+    # Integer division rounds towards zero
+    (Operator.DIVIDE, [7, -7], 2, False, [3, -3]),
+    (Operator.DIVIDE, 7, [2, -2], False, [3, -3]),
+    (Operator.DIVIDE, [1.0, 3.0], 2.0, True, [0.5, 1.5]),
+    (Operator.ADD, [0.5], [0.25], True, [0.75]),
+])
+def test_elementwise(operator, left, right, is_float, expected):
+    pack = floats if is_float else ints
+    left = pack(*left) if isinstance(left, list) else left
+    right = pack(*right) if isinstance(right, list) else right
+
+    result = numeric_array.elementwise(operator, left, right, is_float)
+
+    assert numeric_array.to_list(result) == expected
+
+
+@p("operator, left, right", [
+    (Operator.DIVIDE, [1, 2], 0),
+    (Operator.DIVIDE, [1, 2], [1, 0]),
+    (Operator.ADD, [numeric_array.INT_MAX], 1),
+    (Operator.MULTIPLY, [1 << 32], [1 << 32]),
+])
+def test_elementwise_gives_up_on_errors_and_overflow(operator, left, right):
+    right = ints(*right) if isinstance(right, list) else right
+
+    assert numeric_array.elementwise(operator, ints(*left), right, is_float=False) is None
+
+
+@p("operator, left, right, expected", [
+    (Operator.EQUAL, [1, 2, 3], 2, [False, True, False]),
+    (Operator.LESS_THAN, [1, 2, 3], 2, [True, False, False]),
+    (Operator.GREATER_THAN, 2, [1, 2, 3], [True, False, False]),
+    (Operator.LESS_THAN, [1, 5], [2, 4], [True, False]),
+])
+def test_compare_and_select(operator, left, right, expected):
+    data = ints(*left) if isinstance(left, list) else ints(*right)
+    left = ints(*left) if isinstance(left, list) else left
+    right = ints(*right) if isinstance(right, list) else right
+
+    mask = numeric_array.compare(operator, left, right)
+
+    assert [bool(keep) for keep in mask] == expected
+    assert numeric_array.to_list(numeric_array.select(data, mask)) == [
+        number for number, keep in zip(numeric_array.to_list(data), expected) if keep]
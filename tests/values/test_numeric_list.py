@@ -0,0 +1,106 @@
+import pytest
+
+from enums import Operator
+from exceptions import ScrapEvalError, ScrapTypeError
+from values import FloatValue, IntegerValue, ListValue, NumericListValue, TextValue, make_list
+
+p = pytest.mark.parametrize
+
+
+def ints(*numbers):
+    return make_list([IntegerValue(n) for n in numbers])
+
+
+def floats(*numbers):
+    return make_list([FloatValue(n) for n in numbers])
+
+
+@p("values, numeric", [
+    ([IntegerValue(1), IntegerValue(2)], True),
+    ([FloatValue(1.0), FloatValue(2.5)], True),
+    ([IntegerValue(1), FloatValue(2.5)], False),
+    ([IntegerValue(1), TextValue("a")], False),
+    ([IntegerValue(1 << 70)], False),
+    ([], False),
+])
+def test_make_list_packs_homogeneous_numbers(values, numeric):
+    result = make_list(values)
+
+    assert isinstance(result, NumericListValue) == numeric
+    assert result == ListValue.from_iterable(values)
+
+
+def test_numeric_list_boxes_elements_on_access():
+    values = ints(4, 5, 6)
+
+    assert values[1] == IntegerValue(5)
+    assert values[-1] == IntegerValue(6)
+    assert list(values) == [IntegerValue(4), IntegerValue(5), IntegerValue(6)]
+    assert str(floats(1.5, 2.0)) == "[1.5, 2.0]"
+
+
+def test_int_and_float_lists_are_not_equal():
+    assert ints(1, 2) != floats(1.0, 2.0)
+
+
+@p("operator, left, right, expected", [
+    (Operator.ADD, ints(1, 2), ints(10, 20), ints(11, 22)),
+    (Operator.SUBTRACT, ints(1, 2), IntegerValue(1), ints(0, 1)),
+    (Operator.MULTIPLY, floats(1.5, 2.0), FloatValue(2.0), floats(3.0, 4.0)),
+    (Operator.DIVIDE, ints(7, -7), IntegerValue(2), ints(3, -3)),
+    (Operator.DIVIDE, floats(1.0, 3.0), floats(2.0, 4.0), floats(0.5, 0.75)),
+])
+def test_elementwise_arithmetic(operator, left, right, expected):
+    result = left.elementwise(operator, right)
+
+    assert isinstance(result, NumericListValue)
+    assert result == expected
+
+
+def test_reflected_operand_order():
+    assert ints(1, 2).elementwise(Operator.SUBTRACT, IntegerValue(10), reflected=True) == ints(9, 8)
+
+
+def test_overflow_falls_back_to_boxed_integers():
+    big = (1 << 62) + 1
+    result = ints(big, 1).multiply(IntegerValue(4))
+
+    assert isinstance(result, ListValue)
+    assert result == ListValue.from_iterable([IntegerValue(big * 4), IntegerValue(4)])
+
+
+def test_errors_are_the_same_as_for_numbers():
+    with pytest.raises(ScrapTypeError):
+        ints(1, 2).add(FloatValue(1.0))
+
+    with pytest.raises(ZeroDivisionError):
+        ints(1, 2).divide(IntegerValue(0))
+
+    with pytest.raises(ScrapEvalError):
+        ints(1, 2).add(ints(1))
+
+
+def test_sum_sort_and_reverse():
+    values = floats(3.0, 1.0, 2.0)
+
+    assert values.sum() == FloatValue(6.0)
+    assert values.sort() == floats(1.0, 2.0, 3.0)
+    assert values.reverse() == floats(2.0, 1.0, 3.0)
+    assert values == floats(3.0, 1.0, 2.0)
+
+
+def test_concatenate_keeps_numbers_packed():
+    assert isinstance(ints(1).concatenate(ints(2)), NumericListValue)
+    assert ints(1).concatenate(ints(2)) == ints(1, 2)
+
+    mixed = ints(1).concatenate(floats(2.0))
+    assert isinstance(mixed, ListValue)
+    assert mixed == ListValue.from_iterable([IntegerValue(1), FloatValue(2.0)])
+
+
+def test_append_does_not_change_the_original():
+    values = ints(1, 2)
+
+    assert values.append(TextValue("a")) == ListValue.from_iterable(
+        [IntegerValue(1), IntegerValue(2), TextValue("a")])
+    assert values == ints(1, 2)
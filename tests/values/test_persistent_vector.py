@@ -0,0 +1,59 @@
+import pytest
+
+from persistent_vector import EMPTY_VECTOR, WIDTH, PersistentVector
+
+p = pytest.mark.parametrize
+
+
+@p("size", [0, 1, WIDTH - 1, WIDTH, WIDTH + 1, WIDTH * WIDTH, WIDTH * WIDTH + WIDTH + 1, 5000])
+def test_append_and_index(size):
+    vector = EMPTY_VECTOR
+    for n in range(size):
+        vector = vector.append(n)
+
+    assert len(vector) == size
+    assert list(vector) == list(range(size))
+    assert [vector[n] for n in range(size)] == list(range(size))
+
+
+def test_old_versions_stay_valid():
+    """
+    Appending to an older version must neither change it nor any of the
+    versions that were created from it before.
+    """
+    base = PersistentVector.from_iterable(range(10))
+    first = base.append("a")
+    second = base.append("b")
+
+    assert list(base) == list(range(10))
+    assert list(first) == list(range(10)) + ["a"]
+    assert list(second) == list(range(10)) + ["b"]
+
+
+def test_index_out_of_range_raises_error():
+    vector = PersistentVector.from_iterable(range(3))
+
+    assert vector[-1] == 2
+
+    with pytest.raises(IndexError):
+        vector[3]
+
+
+@p("left_size", [0, 1, WIDTH, WIDTH + 3, 1056, 2000])
+@p("right_size", [0, 1, WIDTH, WIDTH + 3, 1056, 2000])
+def test_concatenate(left_size, right_size):
+    left = PersistentVector.from_iterable(range(left_size))
+    right = PersistentVector.from_iterable(range(right_size))
+
+    result = left.concatenate(right)
+
+    expected = list(range(left_size)) + list(range(right_size))
+    assert list(result) == expected
+    assert [result[n] for n in range(len(result))] == expected
+
+    # Neither operand is changed
+    assert list(left) == list(range(left_size))
+    assert list(right) == list(range(right_size))
+
+    # And the result can keep growing
+    assert list(result.append("end")) == expected + ["end"]
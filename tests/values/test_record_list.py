@@ -0,0 +1,88 @@
+import pytest
+
+from values import (EMPTY_SHAPE, IntegerValue, ListValue, NumericListValue, RecordListValue,
+                    RecordValue, TextValue, make_list)
+
+AB = EMPTY_SHAPE.with_field("a").with_field("b")
+BA = EMPTY_SHAPE.with_field("b").with_field("a")
+
+
+def row(a, b, shape=AB):
+    slots = [IntegerValue(a), TextValue(b)]
+    return RecordValue(shape=shape, slots=slots if shape is AB else slots[::-1])
+
+
+def rows(*pairs):
+    return [row(a, b) for a, b in pairs]
+
+
+def test_same_shape_records_are_stored_in_columns():
+    values = make_list(rows((1, "x"), (2, "y")))
+
+    assert isinstance(values, RecordListValue)
+    assert isinstance(values.column("a"), NumericListValue)
+    assert values.column("a") == make_list([IntegerValue(1), IntegerValue(2)])
+    assert values.column("b") == ListValue.from_iterable([TextValue("x"), TextValue("y")])
+    assert values.column("c") is None
+
+
+def test_different_shapes_are_stored_as_rows():
+    values = make_list([row(1, "x"), row(2, "y", shape=BA)])
+
+    assert isinstance(values, ListValue)
+
+
+def test_rows_are_built_on_access():
+    records = rows((1, "x"), (2, "y"))
+    values = make_list(records)
+
+    assert len(values) == 2
+    assert values[1] == records[1]
+    assert values[-2] == records[0]
+    assert list(values) == records
+    assert values == ListValue.from_iterable(records)
+    assert str(values) == '[{ a = 1, b = "x" }, { a = 2, b = "y" }]'
+
+    with pytest.raises(IndexError):
+        values[2]
+
+
+def test_select_filters_every_column():
+    values = make_list(rows((1, "x"), (2, "y"), (3, "z")))
+
+    selected = values.select([True, False, True])
+
+    assert isinstance(selected, RecordListValue)
+    assert selected == ListValue.from_iterable(rows((1, "x"), (3, "z")))
+
+
+def test_append_and_concatenate_keep_columns():
+    values = make_list(rows((1, "x")))
+
+    appended = values.append(row(2, "y"))
+    assert isinstance(appended, RecordListValue)
+    assert appended == ListValue.from_iterable(rows((1, "x"), (2, "y")))
+
+    joined = values.concatenate(make_list(rows((3, "z"))))
+    assert isinstance(joined, RecordListValue)
+    assert joined == ListValue.from_iterable(rows((1, "x"), (3, "z")))
+
+    assert values == ListValue.from_iterable(rows((1, "x")))
+
+
+def test_appending_another_shape_falls_back_to_rows():
+    values = make_list(rows((1, "x"))).append(IntegerValue(5))
+
+    assert isinstance(values, ListValue)
+    assert values == ListValue.from_iterable([row(1, "x"), IntegerValue(5)])
+
+
+def test_records_and_lists_are_hashable():
+    assert hash(row(1, "x")) == hash(row(1, "x", shape=BA))
+    assert {row(1, "x"), row(1, "x", shape=BA)} == {row(1, "x")}
+
+    values = rows((1, "x"), (2, "y"))
+    assert hash(make_list(values)) == hash(ListValue.from_iterable(values))
+    numbers = [IntegerValue(1), IntegerValue(2)]
+    assert hash(make_list(numbers)) == hash(ListValue.from_iterable(numbers))
+    assert isinstance(make_list(numbers), NumericListValue)
@@ -0,0 +1,52 @@
+from rope import CHUNK_SIZE, ROPE_THRESHOLD, Rope
+from values import TextValue
+
+
+def test_short_concatenation_stays_a_string():
+    result = TextValue("hello ").concatenate(TextValue("world"))
+
+    assert result._rope is None
+    assert result.value == "hello world"
+
+
+def test_long_concatenation_is_flattened_once():
+    left = TextValue("a" * ROPE_THRESHOLD)
+    right = TextValue("b" * ROPE_THRESHOLD)
+
+    result = left.concatenate(right)
+
+    assert isinstance(result._rope, Rope)
+    assert len(result) == 2 * ROPE_THRESHOLD
+
+    assert result.value == "a" * ROPE_THRESHOLD + "b" * ROPE_THRESHOLD
+    # After flattening the text is kept and the rope is dropped
+    assert result._rope is None
+    assert result.value is result.value
+
+
+def test_small_pieces_are_merged_into_leaves():
+    text = TextValue("x" * ROPE_THRESHOLD)
+    for _ in range(CHUNK_SIZE // 2):
+        text = text.concatenate(TextValue("y"))
+
+    rope = text._rope
+    assert isinstance(rope, Rope)
+    assert rope.right == "y" * (CHUNK_SIZE // 2)
+
+
+def test_building_text_from_many_pieces_in_both_directions():
+    pieces = [TextValue(f"{n},") for n in range(20000)]
+
+    appended = TextValue("")
+    for piece in pieces:
+        appended = appended.concatenate(piece)
+
+    prepended = TextValue("")
+    for piece in reversed(pieces):
+        prepended = piece.concatenate(prepended)
+
+    expected = "".join(f"{n}," for n in range(20000))
+    assert appended.value == expected
+    assert prepended.value == expected
+    assert appended == prepended
+
@@ -0,0 +1,39 @@
+import dataclasses
+import inspect
+
+import pytest
+
+import scrapscript_ast
+import values
+from values import IntegerValue, ListValue, RecordValue, TextValue, EMPTY_SHAPE
+
+p = pytest.mark.parametrize
+
+
+def classes(module, base):
+    return [cls for _, cls in inspect.getmembers(module, inspect.isclass)
+            if cls.__module__ == module.__name__ and issubclass(cls, base)]
+
+
+@p("cls", classes(values, values.Value) + classes(scrapscript_ast, scrapscript_ast.ASTNode),
+   ids=lambda cls: cls.__name__)
+def test_instances_have_no_dict(cls):
+    assert "__dict__" not in dir(cls)
+
+
+@p("value, name", [
+    (IntegerValue(1), "value"),
+    (ListValue.from_iterable([]), "elements"),
+    (RecordValue(shape=EMPTY_SHAPE, slots=[]), "shape"),
+])
+def test_dataclass_values_are_frozen(value, name):
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        setattr(value, name, None)
+
+
+def test_equality_and_repr_are_unchanged():
+    assert IntegerValue(1) == IntegerValue(1)
+    assert IntegerValue(1) != TextValue("1")
+    assert repr(IntegerValue(1)) == "IntegerValue(1)"
+    assert repr(TextValue("a")) == "TextValue(value='a')"
+    assert repr(scrapscript_ast.Identifier(name="x")) == "x"
@@ -0,0 +1,79 @@
+import pytest
+
+from enums import StreamStage
+from exceptions import ScrapTypeError
+from values import IntegerValue, ListValue, StreamValue
+
+p = pytest.mark.parametrize
+
+
+def numbers(count: int) -> StreamValue:
+    return StreamValue(lambda: map(IntegerValue, range(count)))
+
+
+def test_stages_are_fused_into_one_stream():
+    source = numbers(10)
+
+    stream = source.map(lambda x: IntegerValue(x.value * 2)).filter(lambda x: x.value > 4)
+
+    assert stream.source is source.source
+    assert [stage for stage, _ in stream.stages] == [StreamStage.MAP, StreamStage.FILTER]
+    assert [x.value for x in stream] == [6, 8, 10, 12, 14, 16, 18]
+
+
+def test_stages_run_one_element_at_a_time():
+    calls = []
+
+    def record(name):
+        def stage(value):
+            calls.append((name, value.value))
+            return value
+        return stage
+
+    list(numbers(2).map(record("a")).map(record("b")))
+
+    assert calls == [("a", 0), ("b", 0), ("a", 1), ("b", 1)]
+
+
+def test_iterating_does_not_materialize():
+    stream = numbers(5).map(lambda x: x)
+
+    assert sum(x.value for x in stream) == 10
+    assert stream._materialized is None
+
+
+def test_materialize_is_cached():
+    evaluated = []
+    stream = numbers(3).map(lambda x: evaluated.append(x) or x)
+
+    first = stream.materialize()
+    assert stream.materialize() is first
+    assert list(stream) == list(first)
+    assert len(evaluated) == 3
+
+
+@p("stream, expected", [
+    (numbers(3), ListValue.from_iterable(map(IntegerValue, range(3)))),
+    (numbers(0), ListValue.from_iterable([])),
+    (numbers(3).concatenate(numbers(2)),
+     ListValue.from_iterable(map(IntegerValue, [0, 1, 2, 0, 1]))),
+])
+def test_stream_equals_list(stream, expected):
+    assert stream == expected
+    assert expected == stream
+
+
+def test_stream_of_different_length_is_not_equal():
+    assert numbers(3) != numbers(4)
+
+
+def test_list_concatenated_with_stream_is_a_list():
+    result = ListValue.from_iterable([IntegerValue(9)]).concatenate(numbers(2))
+
+    assert isinstance(result, ListValue)
+    assert result == ListValue.from_iterable(map(IntegerValue, [9, 0, 1]))
+
+
+def test_concatenate_rejects_non_lists():
+    with pytest.raises(ScrapTypeError):
+        numbers(1).concatenate(IntegerValue(1))
@@ -0,0 +1,296 @@
+"""
+This module implements the second execution tier: functions that are
+called often are compiled to Python code, while everything else stays on
+the tree-walking evaluator, so running a program doesn't pay for
+compiling code that only runs once.
+
+The evaluator counts the calls of every closure body (a Function or a
+PatternMatchExpression node). Once a body has been called
+COMPILE_THRESHOLD times, `tier_up` compiles it to a Python function
+and keeps it on the node, and later calls go there instead.
+
+The compiled code keeps the parameters and pattern variables in Python
+locals, and inlines integer arithmetic and comparisons, literals,
+applications and pattern matching. Any other node (e.g. a record or a
+lambda) is handed back to the evaluator, with the locals put in a scope
+for it, so every function can be compiled.
+
+    f = | 0 -> 1 | n -> n * f (n - 1)
+
+becomes roughly
+
+    def compiled(scope, argument):
+        if c0 == argument:
+            return c1
+        v0 = argument
+        return (integer(t0.value * t1.value)
+                if type(t0 := v0) is type(t1 := call_function(...)) is IntegerValue
+                else binary_operation(Operator.MULTIPLY, t0, t1))
+        raise ScrapEvalError(f"No pattern matched {argument}")
+"""
+
+from __future__ import annotations
+import dataclasses
+import logging
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from enums import Operator
+from exceptions import ScrapEvalError
+from quickening import lookup
+from scope import Scope
+from scrapscript_ast import *
+from values import (IntegerValue, TaggedVariantValue, Value, VariantValue, atom, integer,
+                    make_list, to_boolean)
+
+# How many calls make a function hot enough to compile, None to never compile
+COMPILE_THRESHOLD: Optional[int] = 1000
+
+# A function that can be compiled: the body of a closure
+Body = Union[Function, PatternMatchExpression]
+
+# Integer operations done inline, the rest go through binary_operation
+_INTEGER_OPERATIONS = {
+    Operator.ADD: "integer({0}.value + {1}.value)",
+    Operator.SUBTRACT: "integer({0}.value - {1}.value)",
+    Operator.MULTIPLY: "integer({0}.value * {1}.value)",
+    Operator.DIVIDE: "integer(int({0}.value / {1}.value))",
+    Operator.LESS_THAN: "to_boolean({0}.value < {1}.value)",
+    Operator.GREATER_THAN: "to_boolean({0}.value > {1}.value)",
+}
+
+
+def tier_up(node: Body) -> Optional[Callable[..., Value]]:
+    """
+    Counts a call of a closure body, and returns its compiled version if
+    it has one (or just became hot enough for one), None otherwise.
+    """
+    node.call_count += 1
+    compiled = node.compiled
+    if compiled is None and COMPILE_THRESHOLD is not None and node.call_count >= COMPILE_THRESHOLD:
+        compiled = node.compiled = compile_body(node)
+
+    return compiled
+
+
+def _local_scope(parent: Scope, variables: Dict[str, Value]) -> Scope:
+    scope = Scope(parent=parent)
+    scope.variables = variables
+    return scope
+
+
+class Compiler():
+    """Generates the Python source of one function, and the names it uses."""
+    __slots__ = ("lines", "namespace", "counter")
+
+    lines: List[str]
+    namespace: Dict[str, Any]
+    counter: int
+
+    def __init__(self):
+        # The compiled code calls back into the evaluator, so it's imported here
+        from evaluator import binary_operation, call_function, evaluate_node
+
+        self.lines = []
+        self.counter = 0
+        self.namespace = {
+            "IntegerValue": IntegerValue,
+            "Operator": Operator,
+            "ScrapEvalError": ScrapEvalError,
+            "VARIANTS": (VariantValue, TaggedVariantValue),
+            "binary_operation": binary_operation,
+            "call_function": call_function,
+            "evaluate_node": evaluate_node,
+            "integer": integer,
+            "local_scope": _local_scope,
+            "lookup": lookup,
+            "make_list": make_list,
+            "to_boolean": to_boolean,
+        }
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, value: Any) -> str:
+        name = self.name("c")
+        self.namespace[name] = value
+        return name
+
+    def emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def scope(self, local: Dict[str, str]) -> str:
+        """The source of the scope the evaluator needs to see the locals."""
+        if not local:
+            return "scope"
+
+        variables = ", ".join(f"{name!r}: {variable}" for name, variable in local.items())
+        return f"local_scope(scope, {{{variables}}})"
+
+    def expression(self, node: Expression, local: Dict[str, str]) -> str:
+        from evaluator import literal_value
+
+        match node:
+            case IntegerLiteral() | FloatLiteral() | TextLiteral() | HexLiteral() | Base64Literal():
+                return self.constant(literal_value(node))
+
+            case Atom():
+                return self.constant(atom(node.value))
+
+            case Identifier(name=name) if name in local:
+                return local[name]
+
+            case Identifier():
+                return f"lookup({self.constant(node)}, scope)"
+
+            case ListLiteral():
+                elements = ", ".join(self.expression(element, local) for element in node.elements)
+                return f"make_list([{elements}])"
+
+            case Application():
+                arguments: List[Expression] = []
+                head: Expression = node
+                while isinstance(head, Application):
+                    arguments.append(head.argument)
+                    head = head.function
+                arguments.reverse()
+
+                function = self.expression(head, local)
+                values = ", ".join(self.expression(argument, local) for argument in arguments)
+                return f"call_function({function}, [{values}])"
+
+            case BinaryOperation(specialised=operation) if operation is not None:
+                left = self.expression(node.left, local)
+                right = self.expression(node.right, local)
+                return f"{self.constant(operation)}({left}, {right})"
+
+            case BinaryOperation(operator=Operator.EQUAL):
+                left = self.expression(node.left, local)
+                right = self.expression(node.right, local)
+                return f"to_boolean({left} == {right})"
+
+            case BinaryOperation(operator=operator) if operator in _INTEGER_OPERATIONS:
+                left, right = self.name("t"), self.name("t")
+                fast = _INTEGER_OPERATIONS[operator].format(left, right)
+                return (f"({fast} if type({left} := {self.expression(node.left, local)})"
+                        f" is type({right} := {self.expression(node.right, local)}) is IntegerValue"
+                        f" else binary_operation(Operator.{operator.name}, {left}, {right}))")
+
+            case BinaryOperation(operator=operator) \
+                    if operator not in (Operator.COMPOSE, Operator.PIPE):
+                left = self.expression(node.left, local)
+                right = self.expression(node.right, local)
+                return f"binary_operation(Operator.{operator.name}, {left}, {right})"
+
+        return f"evaluate_node({self.constant(node)}, {self.scope(local)})"
+
+    def pattern(self, pattern: Pattern, subject: str, local: Dict[str, str], indent: int) -> int:
+        """
+        Emits the checks and bindings of a pattern, and returns the
+        indentation of the code that runs when it matches.
+        """
+        from evaluator import literal_value
+
+        match pattern:
+            case WildcardPattern():
+                return indent
+
+            case VariablePattern():
+                variable = self.name("v")
+                self.emit(indent, f"{variable} = {subject}")
+                local[pattern.identifier.name] = variable
+                return indent
+
+            case LiteralPattern(literal=IntegerLiteral() | FloatLiteral() | TextLiteral()
+                                | HexLiteral() | Base64Literal()):
+                self.emit(indent, f"if {self.constant(literal_value(pattern.literal))} == {subject}:")
+                return indent + 1
+
+            case LiteralPattern():
+                literal = f"evaluate_node({self.constant(pattern.literal)}, {self.scope(local)})"
+                self.emit(indent, f"if {literal} == {subject}:")
+                return indent + 1
+
+            case VariantPattern():
+                self.emit(indent, f"if isinstance({subject}, VARIANTS)"
+                                  f" and {subject}.tag == {pattern.tag.value!r}:")
+                if pattern.payload is None:
+                    return indent + 1
+
+                payload = self.name("t")
+                self.emit(indent + 1, f"{payload} = {subject}.payload")
+                return self.pattern(pattern.payload, payload, local, indent + 1)
+
+        raise ScrapEvalError(f"Don't know how to match pattern: <{pattern}>")
+
+
+def compile_body(node: Body) -> Callable[..., Value]:
+    """
+    Compiles a closure body to a Python function, called with the scope
+    of the closure and its arguments: all the parameters of a curried
+    Function, or the one argument of a PatternMatchExpression.
+    """
+    from evaluator import uncurry
+
+    compiler = Compiler()
+    if isinstance(node, Function):
+        local: Dict[str, str] = {}
+        parameters: List[str] = []
+        for lambda_node in uncurry(node):
+            # A later parameter of the same name hides the earlier one
+            parameters.append(compiler.name("v"))
+            local[lambda_node.parameter.name] = parameters[-1]
+        compiler.emit(0, f"def compiled(scope, {', '.join(parameters)}):")
+        compiler.emit(1, f"return {compiler.expression(uncurry(node)[-1].body, local)}")
+    else:
+        compiler.emit(0, "def compiled(scope, argument):")
+        for clause in node.clauses:
+            local = {}
+            indent = compiler.pattern(clause.pattern, "argument", local, 1)
+            compiler.emit(indent, f"return {compiler.expression(clause.body, local)}")
+        compiler.emit(1, 'raise ScrapEvalError(f"No pattern matched {argument}")')
+
+    source = "\n".join(compiler.lines)
+    logging.debug("Compiled %s after %s calls:\n%s", node, node.call_count, source)
+
+    namespace = compiler.namespace
+    exec(compile(source, "<scrapscript>", "exec"), namespace)
+    # Taken out of its own globals, so it isn't part of a reference cycle
+    return namespace.pop("compiled")
+
+
+def _bodies(node: Any) -> List[Body]:
+    """The closure bodies in a tree, outermost first."""
+    bodies: List[Body] = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not dataclasses.is_dataclass(node):
+            continue
+
+        if isinstance(node, (Function, PatternMatchExpression)):
+            bodies.append(node)
+        # Only the children, not the caches
+        stack.extend(getattr(node, field.name) for field in reversed(dataclasses.fields(node))
+                     if field.compare)
+
+    return bodies
+
+
+def describe_tiers(program: Program) -> str:
+    """The calls and the tier of every function of a program that was called."""
+    called = [body for body in _bodies(program) if body.call_count]
+    compiled = sum(body.compiled is not None for body in called)
+    lines = [f"Tiers: {compiled} of {len(called)} called functions compiled"]
+    for body in sorted(called, key=lambda body: -body.call_count):
+        tier = "compiled" if body.compiled is not None else "interpreted"
+        description = repr(body) if isinstance(body, Function) \
+            else " ".join(f"| {clause.pattern} -> {clause.body}" for clause in body.clauses)
+        if len(description) > 60:
+            description = description[:57] + "..."
+        lines.append(f"  {tier:<11} {body.call_count:>10} calls  {description}")
+
+    return "\n".join(lines)
@@ -0,0 +1,673 @@
+"""
+This module implements an optional type inference pass, which lets the
+evaluator skip the runtime type checks of arithmetic it can prove safe.
+
+The inference is Hindley-Milner style: every expression gets a type,
+type variables are solved by unification, and top level definitions are
+generalised so they can be used at different types (`id = x -> x`).
+Definitions are inferred one strongly connected component at a time, so
+definitions can refer to each other in any order. Type variables are
+generalised by level (like OCaml does), so generalising doesn't have to
+scan the environment and inference stays close to linear in the size of
+the program.
+
+The arithmetic operators work on both integers and floats, so the type
+variable of an arithmetic operation is marked numeric, and is only
+allowed to become `int` or `float`. When the whole program is well
+typed, every arithmetic operation whose operands are known to be
+integers (or floats) gets a `specialised` operation, which the evaluator
+runs without checking the operands again. Operations inside polymorphic
+functions stay checked.
+
+The pass is conservative: records, atoms that aren't #true or #false,
+and anything else it doesn't know the typing rules of, make it give up
+on the whole program, which then runs fully checked as before. The
+specialisations assume the program runs in its own scope, as it does by
+default in `evaluate_program`.
+"""
+
+from __future__ import annotations
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from enums import Operator
+from free_variables import UnknownNode, free_variables
+from scrapscript_ast import (
+    Application,
+    Atom,
+    Base64Literal,
+    BinaryOperation,
+    Expression,
+    ExpressionStatement,
+    FloatLiteral,
+    Function,
+    FunctionDefinitionStatement,
+    HexLiteral,
+    Identifier,
+    IntegerLiteral,
+    InterpolatedTextLiteral,
+    ListLiteral,
+    LiteralPattern,
+    Pattern,
+    PatternMatchExpression,
+    Program,
+    TextLiteral,
+    TypeDefinitionStatment,
+    TypeExpression,
+    UnaryOperation,
+    VariablePattern,
+    VariantConstruction,
+    VariantPattern,
+    WildcardPattern,
+)
+from values import (
+    FloatValue,
+    UNCHECKED_FLOAT_OPERATIONS,
+    UNCHECKED_INTEGER_OPERATIONS,
+    Value,
+    integer,
+)
+
+
+class CannotInfer(Exception):
+    """Raised when a program isn't well typed, or uses something the pass doesn't know."""
+
+
+# Generalised type variables have this level, they are copied when used
+GENERIC = 1 << 30
+
+
+class TypeVariable:
+    __slots__ = ("instance", "level", "numeric")
+
+    instance: Optional[Type]
+    level: int
+    numeric: bool
+
+    def __init__(self, level: int, numeric: bool = False):
+        self.instance = None
+        self.level = level
+        self.numeric = numeric
+
+    def __repr__(self):
+        if self.instance is not None:
+            return repr(self.instance)
+
+        return f"'{'num' if self.numeric else 't'}{id(self) % 1000}"
+
+
+class TypeConstructor:
+    """A type like `int`, `list int` or `int -> text`, or a defined type."""
+    __slots__ = ("name", "arguments")
+
+    name: str
+    arguments: Tuple[Type, ...]
+
+    def __init__(self, name: str, *arguments: Type):
+        self.name = name
+        self.arguments = arguments
+
+    def __eq__(self, other):
+        if not isinstance(other, TypeConstructor):
+            return NotImplemented
+
+        return self.name == other.name and self.arguments == other.arguments
+
+    def __repr__(self):
+        if self.name == "->":
+            return f"({self.arguments[0]!r} -> {self.arguments[1]!r})"
+        if self.arguments:
+            return f"({self.name} {' '.join(repr(argument) for argument in self.arguments)})"
+
+        return self.name
+
+
+Type = Union[TypeVariable, TypeConstructor]
+
+INT = TypeConstructor("int")
+FLOAT = TypeConstructor("float")
+TEXT = TypeConstructor("text")
+BYTES = TypeConstructor("bytes")
+BOOL = TypeConstructor("bool")
+HOLE_TYPE = TypeConstructor("()")
+
+BASE_TYPES: Dict[str, TypeConstructor] = {
+    "int": INT,
+    "float": FLOAT,
+    "text": TEXT,
+    "bytes": BYTES,
+}
+
+
+def list_of(element: Type) -> TypeConstructor:
+    return TypeConstructor("list", element)
+
+
+def function(*types: Type) -> Type:
+    """`function(a, b, c)` is the curried function type `a -> b -> c`."""
+    result = types[-1]
+    for parameter in reversed(types[:-1]):
+        result = TypeConstructor("->", parameter, result)
+
+    return result
+
+
+def prune(t: Type) -> Type:
+    """The type a variable has been solved to, or the variable itself."""
+    while isinstance(t, TypeVariable) and t.instance is not None:
+        if isinstance(t.instance, TypeVariable) and t.instance.instance is not None:
+            t.instance = t.instance.instance  # Path compression
+        t = t.instance
+
+    return t
+
+
+def resolve(t: Type) -> Type:
+    """The type with every solved variable in it replaced by its solution."""
+    t = prune(t)
+    if isinstance(t, TypeVariable) or not t.arguments:
+        return t
+
+    return TypeConstructor(t.name, *(resolve(argument) for argument in t.arguments))
+
+
+def _builtin_types() -> Dict[str, Type]:
+    """The types of the builtins in the prelude, with generic type variables."""
+    a = TypeVariable(GENERIC)
+    b = TypeVariable(GENERIC)
+
+    return {
+        "text/length": function(TEXT, INT),
+        "text/repeat": function(INT, TEXT, TEXT),
+        "text/join": function(TEXT, list_of(TEXT), TEXT),
+        "string/join": function(TEXT, list_of(TEXT), TEXT),
+        "text/concat": function(list_of(TEXT), TEXT),
+        "text/split": function(TEXT, TEXT, list_of(TEXT)),
+        "text/upper": function(TEXT, TEXT),
+        "text/lower": function(TEXT, TEXT),
+        "list/length": function(list_of(a), INT),
+        "list/range": function(INT, INT, list_of(INT)),
+        "list/repeat": function(INT, a, list_of(a)),
+        "list/take": function(INT, list_of(a), list_of(a)),
+        "list/get": function(INT, list_of(a), a),
+        "list/reverse": function(list_of(a), list_of(a)),
+        "list/sort": function(list_of(a), list_of(a)),
+        # Only sums of integers are typed: the sum of an empty list is the
+        # integer 0, which a float operation on the result would reject
+        "list/sum": function(list_of(INT), INT),
+        "list/concat": function(list_of(list_of(a)), list_of(a)),
+        "list/map": function(function(a, b), list_of(a), list_of(b)),
+        "list/filter": function(function(a, BOOL), list_of(a), list_of(a)),
+        "list/fold": function(function(b, a, b), b, list_of(a), b),
+        "bytes/length": function(BYTES, INT),
+        "bytes/slice": function(INT, INT, BYTES, BYTES),
+        "bytes/join": function(list_of(BYTES), BYTES),
+        "bytes/from_text": function(TEXT, BYTES),
+        "bytes/to_text": function(BYTES, TEXT),
+        "int/abs": function(INT, INT),
+        "int/min": function(INT, INT, INT),
+        "int/max": function(INT, INT, INT),
+        "int/to_float": function(INT, FLOAT),
+        "int/to_text": function(INT, TEXT),
+        "float/abs": function(FLOAT, FLOAT),
+        "float/to_int": function(FLOAT, INT),
+    }
+
+
+BUILTIN_TYPES: Dict[str, Type] = _builtin_types()
+
+ARITHMETIC_OPERATORS = (Operator.ADD, Operator.SUBTRACT, Operator.MULTIPLY, Operator.DIVIDE)
+COMPARISON_OPERATORS = (Operator.EQUAL, Operator.LESS_THAN, Operator.GREATER_THAN)
+
+_NEGATIONS: Dict[str, Callable[[Value], Value]] = {
+    "int": lambda value: integer(-value.value),  # type: ignore[attr-defined]
+    "float": lambda value: FloatValue(-value.value),  # type: ignore[attr-defined]
+}
+
+_OPERATIONS: Dict[str, Dict[Operator, Callable[[Value, Value], Value]]] = {
+    "int": UNCHECKED_INTEGER_OPERATIONS,
+    "float": UNCHECKED_FLOAT_OPERATIONS,
+}
+
+
+class Environment:
+    """The types of the names in scope, like Scope is for their values."""
+    __slots__ = ("types", "parent")
+
+    def __init__(self, parent: Optional[Environment] = None):
+        self.types: Dict[str, Type] = {}
+        self.parent = parent
+
+    def get(self, name: str) -> Type:
+        environment: Optional[Environment] = self
+        while environment is not None:
+            if name in environment.types:
+                return environment.types[name]
+            environment = environment.parent
+
+        raise CannotInfer(f"Unknown name '{name}'")
+
+
+class Inference:
+    level: int
+    defined_types: Dict[str, TypeConstructor]
+    # Tag -> (its type, the type of its payload if it has one)
+    tags: Dict[str, Tuple[TypeConstructor, Optional[Type]]]
+    arithmetic: List[Tuple[Union[BinaryOperation, UnaryOperation], Type]]
+
+    def __init__(self):
+        self.level = 0
+        self.defined_types = {}
+        self.tags = {}
+        self.arithmetic = []
+
+    # =================================================================
+    # == Unification
+    # =================================================================
+
+    def fresh(self, numeric: bool = False) -> TypeVariable:
+        return TypeVariable(self.level, numeric)
+
+    def unify(self, a: Type, b: Type) -> None:
+        a, b = prune(a), prune(b)
+        if a is b:
+            return
+
+        if isinstance(a, TypeVariable):
+            self._bind(a, b)
+        elif isinstance(b, TypeVariable):
+            self._bind(b, a)
+        elif a.name != b.name or len(a.arguments) != len(b.arguments):
+            raise CannotInfer(f"Type mismatch: {a} and {b}")
+        else:
+            for left, right in zip(a.arguments, b.arguments):
+                self.unify(left, right)
+
+    def _bind(self, variable: TypeVariable, t: Type) -> None:
+        if isinstance(t, TypeVariable):
+            t.level = min(t.level, variable.level)
+            t.numeric = t.numeric or variable.numeric
+            variable.instance = t
+            return
+
+        if variable.numeric and t.name not in ("int", "float"):
+            raise CannotInfer(f"Arithmetic on {t}")
+
+        # Occurs check, and keep the variables in t from being generalised
+        # any further out than the variable they're bound to
+        for inner in _variables(t):
+            if inner is variable:
+                raise CannotInfer(f"Infinite type: {variable} = {t}")
+            inner.level = min(inner.level, variable.level)
+
+        variable.instance = t
+
+    def generalise(self, t: Type) -> None:
+        for variable in _variables(t):
+            if variable.level > self.level:
+                variable.level = GENERIC
+
+    def instantiate(self, t: Type) -> Type:
+        copies: Dict[int, TypeVariable] = {}
+
+        def copy(t: Type) -> Type:
+            t = prune(t)
+            if isinstance(t, TypeVariable):
+                if t.level != GENERIC:
+                    return t
+                if id(t) not in copies:
+                    copies[id(t)] = self.fresh(t.numeric)
+                return copies[id(t)]
+
+            if not t.arguments:
+                return t
+            return TypeConstructor(t.name, *(copy(argument) for argument in t.arguments))
+
+        return copy(t)
+
+    # =================================================================
+    # == Programs
+    # =================================================================
+
+    def infer_program(self, program: Program) -> Type:
+        definitions: Dict[str, Expression] = {}
+        for statement in program.declarations:
+            match statement:
+                case TypeDefinitionStatment():
+                    self.define_type(statement)
+                case FunctionDefinitionStatement():
+                    if statement.name in definitions:
+                        raise CannotInfer(f"'{statement.name}' is defined twice")
+                    definitions[statement.name] = statement.body
+
+        for statement in program.declarations:
+            if isinstance(statement, TypeDefinitionStatment):
+                self.define_variants(statement)
+
+        environment = Environment()
+        environment.types.update(BUILTIN_TYPES)
+        environment = Environment(parent=environment)
+        for name in definitions:
+            self._check_not_a_type(name)
+
+        for component in _components(definitions):
+            self.level += 1
+            group = Environment(parent=environment)
+            for name in component:
+                group.types[name] = self.fresh()
+            for name in component:
+                self.unify(group.types[name], self.infer(definitions[name], group))
+            self.level -= 1
+
+            for name in component:
+                self.generalise(group.types[name])
+                environment.types[name] = group.types[name]
+
+        result: Type = HOLE_TYPE
+        for statement in reversed(program.declarations):
+            match statement:
+                case ExpressionStatement():
+                    result = self.infer(statement.expression, environment)
+                case _:
+                    result = HOLE_TYPE
+
+        return result
+
+    def define_type(self, statement: TypeDefinitionStatment) -> None:
+        name = statement.name.name
+        if name in self.defined_types or name in BASE_TYPES:
+            raise CannotInfer(f"Type {name} is defined twice")
+
+        self.defined_types[name] = TypeConstructor(name)
+
+    def define_variants(self, statement: TypeDefinitionStatment) -> None:
+        variant_type = self.defined_types[statement.name.name]
+        for variant in statement.body.variants:
+            tag = variant.tag.value
+            if tag in self.tags or tag in ("true", "false"):
+                # The same tag in several types, patterns can't tell which one
+                raise CannotInfer(f"Tag #{tag} is ambiguous")
+
+            payload: Optional[Type]
+            match variant.parameter:
+                case None:
+                    payload = None
+                case Identifier(name=name) if name in BASE_TYPES:
+                    payload = BASE_TYPES[name]
+                case Identifier(name=name) if name in self.defined_types:
+                    payload = self.defined_types[name]
+                case TypeExpression():
+                    # The payloads are untyped atoms, nothing can be proven about them
+                    payload = TypeConstructor(f"{variant_type.name}.{tag}")
+                case _:
+                    raise CannotInfer(f"Unknown type {variant.parameter}")
+
+            self.tags[tag] = (variant_type, payload)
+
+    def _check_not_a_type(self, name: str) -> None:
+        # Types live in the same scope as values, a variable named like a
+        # type would change what `type::tag` refers to
+        if name in self.defined_types:
+            raise CannotInfer(f"'{name}' is both a type and a variable")
+
+    # =================================================================
+    # == Expressions
+    # =================================================================
+
+    def infer(self, node: Expression, environment: Environment) -> Type:
+        match node:
+            case IntegerLiteral():
+                return INT
+            case FloatLiteral():
+                return FLOAT
+            case TextLiteral():
+                return TEXT
+            case InterpolatedTextLiteral():
+                for part in node.parts:
+                    if not isinstance(part, str):
+                        self.infer(part, environment)
+                return TEXT
+            case HexLiteral() | Base64Literal():
+                return BYTES
+
+            case Identifier():
+                return self.instantiate(environment.get(node.name))
+
+            case Atom(value="true" | "false"):
+                return BOOL
+
+            case ListLiteral():
+                element = self.fresh()
+                for item in node.elements:
+                    self.unify(element, self.infer(item, environment))
+                return list_of(element)
+
+            case Function():
+                self._check_not_a_type(node.parameter.name)
+                parameter = self.fresh()
+                inner = Environment(parent=environment)
+                inner.types[node.parameter.name] = parameter
+                return function(parameter, self.infer(node.body, inner))
+
+            case Application():
+                result = self.fresh()
+                self.unify(self.infer(node.function, environment),
+                           function(self.infer(node.argument, environment), result))
+                return result
+
+            case PatternMatchExpression():
+                argument = self.fresh()
+                result = self.fresh()
+                for clause in node.clauses:
+                    inner = Environment(parent=environment)
+                    self.infer_pattern(clause.pattern, argument, inner)
+                    self.unify(result, self.infer(clause.body, inner))
+                return function(argument, result)
+
+            case VariantConstruction():
+                return self.infer_variant(node, environment)
+
+            case UnaryOperation(operator=Operator.SUBTRACT):
+                operand = self.fresh(numeric=True)
+                self.unify(operand, self.infer(node.expression, environment))
+                self.arithmetic.append((node, operand))
+                return operand
+
+            case BinaryOperation():
+                return self.infer_operation(node, environment)
+
+        raise CannotInfer(f"Can't infer the type of <{type(node).__name__}>")
+
+    def infer_operation(self, node: BinaryOperation, environment: Environment) -> Type:
+        left = self.infer(node.left, environment)
+        right = self.infer(node.right, environment)
+
+        match node.operator:
+            case operator if operator in ARITHMETIC_OPERATORS:
+                operand = self.fresh(numeric=True)
+                self.unify(operand, left)
+                self.unify(operand, right)
+                self.arithmetic.append((node, operand))
+                return operand
+
+            case Operator.CONCATENATE:
+                # Text, bytes or lists, checked when it runs
+                self.unify(left, right)
+                return left
+
+            case Operator.APPEND:
+                self.unify(left, list_of(right))
+                return left
+
+            case operator if operator in COMPARISON_OPERATORS:
+                self.unify(left, right)
+                return BOOL
+
+            case Operator.PIPE:
+                result = self.fresh()
+                self.unify(right, function(left, result))
+                return result
+
+            case Operator.COMPOSE:
+                a, b, c = self.fresh(), self.fresh(), self.fresh()
+                self.unify(left, function(a, b))
+                self.unify(right, function(b, c))
+                return function(a, c)
+
+        raise CannotInfer(f"Can't infer the type of operator {node.operator}")
+
+    def infer_variant(self, node: VariantConstruction, environment: Environment) -> Type:
+        variant_type = self.defined_types.get(node.type_name.name)
+        tag = self.tags.get(node.variant_name.name)
+        if variant_type is None or tag is None or tag[0] is not variant_type:
+            raise CannotInfer(f"Unknown variant {node.type_name.name}::{node.variant_name.name}")
+
+        payload = tag[1]
+        if len(node.arguments) != (0 if payload is None else 1):
+            raise CannotInfer(f"Wrong number of arguments for {node.variant_name.name}")
+
+        for argument in node.arguments:
+            assert payload is not None
+            self.unify(payload, self.infer(argument, environment))
+
+        return variant_type
+
+    def infer_pattern(self, pattern: Pattern, t: Type, environment: Environment) -> None:
+        match pattern:
+            case WildcardPattern():
+                return
+
+            case VariablePattern():
+                self._check_not_a_type(pattern.identifier.name)
+                environment.types[pattern.identifier.name] = t
+                return
+
+            case LiteralPattern():
+                self.unify(t, self.infer(pattern.literal, environment))
+                return
+
+            case VariantPattern(payload=None) if pattern.tag.value in ("true", "false"):
+                self.unify(t, BOOL)
+                return
+
+            case VariantPattern() if pattern.tag.value in self.tags:
+                variant_type, payload = self.tags[pattern.tag.value]
+                self.unify(t, variant_type)
+                if pattern.payload is None:
+                    return
+                if payload is None:
+                    raise CannotInfer(f"#{pattern.tag.value} has no payload")
+                self.infer_pattern(pattern.payload, payload, environment)
+                return
+
+        raise CannotInfer(f"Can't infer the type of pattern <{pattern}>")
+
+
+def _variables(t: Type) -> Iterator[TypeVariable]:
+    stack = [t]
+    while stack:
+        t = prune(stack.pop())
+        if isinstance(t, TypeVariable):
+            yield t
+        else:
+            stack.extend(t.arguments)
+
+
+def _components(definitions: Dict[str, Expression]) -> List[List[str]]:
+    """
+    The definitions grouped into strongly connected components of the
+    graph of which definitions refer to which, each component after the
+    components it refers to (Tarjan's algorithm).
+    """
+    try:
+        references = {
+            name: [other for other in free_variables(body) if other in definitions]
+            for name, body in definitions.items()
+        }
+    except UnknownNode as e:
+        raise CannotInfer(str(e))
+
+    index: Dict[str, int] = {}
+    lowest: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    components: List[List[str]] = []
+
+    for root in definitions:
+        if root in index:
+            continue
+
+        # An explicit stack of (definition, position in its references),
+        # long chains of definitions would overflow Python's stack
+        work: List[Tuple[str, int]] = [(root, 0)]
+        while work:
+            name, position = work.pop()
+            if position == 0:
+                index[name] = lowest[name] = len(index)
+                stack.append(name)
+                on_stack.add(name)
+
+            targets = references[name]
+            while position < len(targets):
+                other = targets[position]
+                position += 1
+                if other not in index:
+                    work.append((name, position))
+                    work.append((other, 0))
+                    break
+                if other in on_stack:
+                    lowest[name] = min(lowest[name], index[other])
+            else:
+                if lowest[name] == index[name]:
+                    component: List[str] = []
+                    while True:
+                        other = stack.pop()
+                        on_stack.discard(other)
+                        component.append(other)
+                        if other == name:
+                            break
+                    components.append(component)
+
+                if work:
+                    parent = work[-1][0]
+                    lowest[parent] = min(lowest[parent], lowest[name])
+
+    return components
+
+
+def infer_types(program: Program) -> Type:
+    """The type of the program's result. Raises CannotInfer if it isn't well typed."""
+    return resolve(Inference().infer_program(program))
+
+
+def specialise(program: Program) -> Optional[Type]:
+    """
+    Infers the types of a program, and specialises the arithmetic whose
+    operand types are known. Returns the type of the result, or None
+    (leaving the program unchanged) if the types can't be inferred.
+    """
+    inference = Inference()
+    try:
+        result = inference.infer_program(program)
+    except CannotInfer:
+        return None
+
+    # A node the parser shared between several places (see hash_consing)
+    # is only specialised if its operands have the same type in all of them
+    operand_types: Dict[int, Tuple[Union[UnaryOperation, BinaryOperation], Set[Optional[str]]]] = {}
+    for node, operand in inference.arithmetic:
+        operand = prune(operand)
+        # Not a type constructor if used at several types, e.g. in `add = a -> b -> a + b`
+        name = operand.name if isinstance(operand, TypeConstructor) else None
+        operand_types.setdefault(id(node), (node, set()))[1].add(name)
+
+    for node, names in operand_types.values():
+        name = names.pop() if len(names) == 1 else None
+        if name is None:
+            continue
+
+        if isinstance(node, UnaryOperation):
+            node.specialised = _NEGATIONS[name]
+        else:
+            node.specialised = _OPERATIONS[name][node.operator]
+
+    return resolve(result)
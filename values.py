@@ -1,11 +1,18 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+import base64
+import sys
+import weakref
+from itertools import chain, compress, zip_longest
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-from enums import Operator
+from enums import Operator, StreamStage
 from exceptions import ScrapEvalError, ScrapTypeError
-from protocols import Addable, Concatenatable, Dividable, Multipliable, Negatable, Subtractable
+import numeric_array
+from persistent_vector import PersistentVector
+from protocols import Addable, Appendable, Comparable, Concatenatable, Dividable, Multipliable, Negatable, Subtractable
+from rope import CHUNK_SIZE, Piece, Rope, concatenate
 from scrapscript_ast import Expression
 
 if TYPE_CHECKING:
@@ -13,16 +20,22 @@ if TYPE_CHECKING:
 
 
 class Value():  # Base class for runtime values
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class HoleValue(Value):
-    pass
 
+    def __str__(self):
+        return "()"
+
+
+# All holes are the same, so there's no need to ever create another one
+HOLE = HoleValue()
 
-@dataclass
-class IntegerValue(Value, Addable, Subtractable, Multipliable, Dividable, Negatable):
+
+@dataclass(frozen=True, slots=True)
+class IntegerValue(Value, Addable, Subtractable, Multipliable, Dividable, Negatable, Comparable):
     value: int
 
     def _do_math_operation(self, other: Value, operator: Operator) -> IntegerValue:
@@ -32,13 +45,13 @@ class IntegerValue(Value, Addable, Subtractable, Multipliable, Dividable, Negata
 
         match operator:
             case Operator.ADD:
-                return IntegerValue(self.value + other.value)
+                return integer(self.value + other.value)
             case Operator.SUBTRACT:
-                return IntegerValue(self.value - other.value)
+                return integer(self.value - other.value)
             case Operator.DIVIDE:
-                return IntegerValue(int(self.value / other.value))
+                return integer(int(self.value / other.value))
             case Operator.MULTIPLY:
-                return IntegerValue(self.value * other.value)
+                return integer(self.value * other.value)
 
         raise ScrapEvalError(
             f"Don't know how to apply operator '{operator} to <{type(self)}> and <{type(other)}> objects'"
@@ -57,7 +70,12 @@ class IntegerValue(Value, Addable, Subtractable, Multipliable, Dividable, Negata
         return self._do_math_operation(other, operator=Operator.MULTIPLY)
 
     def negate(self) -> IntegerValue:
-        return IntegerValue(value=-self.value)
+        return integer(-self.value)
+
+    def less_than(self, other) -> bool:
+        if not isinstance(other, IntegerValue):
+            raise ScrapTypeError(f"Cannot compare {type(self)} and {type(other)}")
+        return self.value < other.value
 
     def __str__(self):
         return f"{self.value}"
@@ -66,8 +84,25 @@ class IntegerValue(Value, Addable, Subtractable, Multipliable, Dividable, Negata
         return f"IntegerValue({self.value})"
 
 
-@dataclass
-class FloatValue(Value, Addable, Subtractable, Multipliable, Dividable, Negatable):
+# Like CPython, keep one preallocated value for each small integer, they
+# are by far the most common (counters, indices, lengths, ...)
+SMALL_INTEGER_MIN = -5
+SMALL_INTEGER_MAX = 1024
+
+_small_integers: Tuple[IntegerValue, ...] = tuple(
+    IntegerValue(number) for number in range(SMALL_INTEGER_MIN, SMALL_INTEGER_MAX + 1))
+
+
+def integer(number: int) -> IntegerValue:
+    """An IntegerValue, shared for small numbers instead of allocating a new one."""
+    if SMALL_INTEGER_MIN <= number <= SMALL_INTEGER_MAX:
+        return _small_integers[number - SMALL_INTEGER_MIN]
+
+    return IntegerValue(number)
+
+
+@dataclass(frozen=True, slots=True)
+class FloatValue(Value, Addable, Subtractable, Multipliable, Dividable, Negatable, Comparable):
     value: float
 
     def _do_math_operation(self, other: Value, operator: Operator) -> FloatValue:
@@ -104,70 +139,1048 @@ class FloatValue(Value, Addable, Subtractable, Multipliable, Dividable, Negatabl
     def negate(self) -> FloatValue:
         return FloatValue(value=-self.value)
 
+    def less_than(self, other) -> bool:
+        if not isinstance(other, FloatValue):
+            raise ScrapTypeError(f"Cannot compare {type(self)} and {type(other)}")
+        return self.value < other.value
+
     def __str__(self):
         return f"{self.value}"
 
 
-@dataclass
-class HexValue(Value, Addable, Subtractable, Multipliable, Dividable):
-    value: str
+class BytesValue(Value, Concatenatable):
+    """
+    A sequence of bytes, backed by `bytes` or a `memoryview` into them.
+
+    Slices are views into the same buffer, and concatenation chains are
+    collected in a rope and joined into a single `bytes` object once,
+    the first time the data is needed.
+    """
+    __slots__ = ("_data", "_rope")
+
+    _data: Optional[bytes | memoryview]
+    _rope: Optional[Rope]
+
+    def __init__(self, data: bytes | memoryview | Rope):
+        if isinstance(data, Rope):
+            self._data = None
+            self._rope = data
+        else:
+            self._data = data
+            self._rope = None
+
+    @property
+    def data(self) -> bytes | memoryview:
+        if self._data is None:
+            assert self._rope is not None
+            self._data = self._rope.flatten_bytes()
+            # The rope is no longer needed, let it be collected
+            self._rope = None
 
-    def add(self, other):
-        assert isinstance(other, HexValue)
-        return HexValue(value=self.value + other.value)
+        return self._data
 
-    def subtract(self, other):
-        assert isinstance(other, HexValue)
-        return HexValue(value=self.value - other.value)
+    def _piece(self) -> Piece:
+        if self._rope is not None:
+            return self._rope
 
-    def divide(self, other):
-        assert isinstance(other, HexValue)
-        return HexValue(value=self.value / other.value)
+        data = self.data
+        if isinstance(data, memoryview) and len(data) <= CHUNK_SIZE:
+            # Small pieces may get merged with others, which needs bytes
+            return data.tobytes()
 
-    def multiply(self, other):
-        assert isinstance(other, HexValue)
-        return HexValue(value=self.value * other.value)
+        return data
+
+    def tobytes(self) -> bytes:
+        data = self.data
+        if isinstance(data, memoryview):
+            return data.tobytes()
+
+        return data
+
+    def slice(self, start: int, stop: int) -> BytesValue:
+        """Returns a view of the bytes between start and stop, without copying."""
+        return BytesValue(memoryview(self.data)[start:stop])
+
+    def concatenate(self, other) -> BytesValue:
+        if not isinstance(other, BytesValue):
+            raise ScrapTypeError(
+                f"Cannot concatenate {type(self)} and {type(other)}")
+
+        piece = concatenate(self._piece(), other._piece())
+        # Bytes only ever concatenate to bytes
+        assert not isinstance(piece, str)
+        return BytesValue(piece)
+
+    def __len__(self) -> int:
+        if self._rope is not None:
+            return len(self._rope)
+
+        return len(self.data)
+
+    def __eq__(self, other):
+        if not isinstance(other, BytesValue):
+            return NotImplemented
+
+        return len(self) == len(other) and self.data == other.data
+
+    def __hash__(self):
+        return hash(self.tobytes())
 
     def __str__(self):
-        return f"#{self.value}"
+        return f"~~{base64.b64encode(self.data).decode('ascii')}"
 
+    def __repr__(self):
+        return f"{type(self).__name__}({self.tobytes()!r})"
 
-@dataclass
-class TextValue(Value, Concatenatable):
-    value: str
 
-    def concatenate(self, other):
-        assert isinstance(other, TextValue)
+class HexValue(BytesValue):
+    """Bytes written as hexadecimal, e.g. `~FF`."""
+    __slots__ = ()
 
-        return TextValue(self.value + other.value)
+    @staticmethod
+    def from_lexeme(lexeme: str) -> HexValue:
+        digits = lexeme.lstrip("~")
+        if len(digits) % 2:
+            digits = "0" + digits
+
+        return HexValue(bytes.fromhex(digits))
+
+    def __str__(self):
+        return f"~{self.data.hex()}"
+
+
+# Base64 literals larger than this are only decoded when first used
+LAZY_BASE64_THRESHOLD = 64 * 1024
+
+
+class Base64Value(BytesValue):
+    """
+    Bytes written as base64, e.g. `~~aGVsbG8=`. Large blobs keep their
+    encoded text around and are only decoded (once) when first used.
+    """
+    __slots__ = ("_encoded",)
+
+    _encoded: str
+
+    def __init__(self, encoded: str, data: Optional[bytes] = None):
+        super().__init__(b"")
+        # None until the encoded text has been decoded
+        self._data = data
+        self._encoded = encoded
+
+    @staticmethod
+    def from_lexeme(lexeme: str) -> Base64Value:
+        encoded = lexeme[2:]  # Strip the "~~"
+        if len(encoded) > LAZY_BASE64_THRESHOLD:
+            return Base64Value(encoded)
+
+        return Base64Value(encoded, data=base64.b64decode(encoded))
+
+    @property
+    def data(self) -> bytes | memoryview:
+        if self._data is None:
+            self._data = base64.b64decode(self._encoded)
+
+        return self._data
+
+    def __len__(self) -> int:
+        if self._data is None:
+            padding = len(self._encoded) - len(self._encoded.rstrip("="))
+            return len(self._encoded) // 4 * 3 - padding
+
+        return len(self._data)
+
+    def __str__(self):
+        return f"~~{self._encoded}"
+
+
+class TextValue(Value, Concatenatable, Comparable):
+    """
+    A text value. Long concatenations are kept as a rope, which is only
+    flattened into a single string the first time the text is needed.
+    """
+    # Weakly referenced by the table of interned texts, see `text`
+    __slots__ = ("_text", "_rope", "__weakref__")
+
+    _text: Optional[str]
+    _rope: Optional[Rope]
+
+    def __init__(self, value: str | Rope):
+        if isinstance(value, Rope):
+            self._text = None
+            self._rope = value
+        else:
+            self._text = value
+            self._rope = None
+
+    @property
+    def value(self) -> str:
+        if self._text is None:
+            assert self._rope is not None
+            self._text = self._rope.flatten()
+            # The rope is no longer needed, let it be collected
+            self._rope = None
+
+        return self._text
+
+    def _piece(self) -> Piece:
+        if self._text is not None:
+            return self._text
+
+        assert self._rope is not None
+        return self._rope
+
+    def concatenate(self, other) -> TextValue:
+        if not isinstance(other, TextValue):
+            raise ScrapTypeError(
+                f"Cannot concatenate {type(self)} and {type(other)}")
+
+        piece = concatenate(self._piece(), other._piece())
+        # Text only ever concatenates to text
+        assert isinstance(piece, (str, Rope))
+        return TextValue(piece)
+
+    def less_than(self, other) -> bool:
+        if not isinstance(other, TextValue):
+            raise ScrapTypeError(f"Cannot compare {type(self)} and {type(other)}")
+        return self.value < other.value
+
+    def __len__(self) -> int:
+        return len(self._piece())
+
+    def __eq__(self, other):
+        if not isinstance(other, TextValue):
+            return NotImplemented
+
+        return len(self) == len(other) and self.value == other.value
+
+    def __hash__(self):
+        return hash(self.value)
 
     def __str__(self):
         return f"\"{self.value}\""
 
+    def __repr__(self):
+        return f"TextValue(value={self.value!r})"
+
+
+@dataclass(frozen=True, slots=True)
+class ListValue(Value, Appendable, Concatenatable):
+    """
+    A list, backed by a persistent vector so that appending and indexing
+    are cheap and every older version of the list stays valid.
+    """
+    elements: PersistentVector
+
+    @staticmethod
+    def from_iterable(values: Iterable[Value]) -> ListValue:
+        return ListValue(elements=PersistentVector.from_iterable(values))
+
+    def append(self, other) -> ListValue:
+        return ListValue(elements=self.elements.append(other))
+
+    def concatenate(self, other) -> ListValue:
+        if isinstance(other, StreamValue):
+            other = other.materialize()
+        if isinstance(other, (NumericListValue, RecordListValue)):
+            other = other.boxed()
+
+        if not isinstance(other, ListValue):
+            raise ScrapTypeError(
+                f"Cannot concatenate {type(self)} and {type(other)}")
 
-@dataclass
-class Base64Value(Value):
-    value: str
+        return ListValue(elements=self.elements.concatenate(other.elements))
+
+    def select(self, mask: Sequence[bool]) -> ListValue:
+        """The elements where the mask is true."""
+        return ListValue.from_iterable(compress(self.elements, mask))
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def __getitem__(self, index: int) -> Value:
+        return self.elements[index]
+
+    def __iter__(self) -> Iterator[Value]:
+        return iter(self.elements)
+
+    def __hash__(self):
+        # The hash of the elements, like the other kinds of lists it's equal to
+        return hash(tuple(self.elements))
+
+    def __str__(self):
+        return f"[{', '.join(str(element) for element in self.elements)}]"
+
+
+class NumericListValue(Value, Appendable, Concatenatable, Addable, Subtractable, Multipliable, Dividable):
+    """
+    A list of only integers or only floats, stored unboxed in an array
+    (see numeric_array). Lists are stored like this automatically when
+    they are created, see `make_list`.
+
+    Arithmetic operators work elementwise, on two lists of the same length
+    or on a list and a number, e.g. `[1, 2] * 2` is `[2, 4]`. Appending or
+    concatenating anything else turns the list back into a ListValue.
+    """
+    __slots__ = ("data", "is_float")
+
+    data: numeric_array.NumericArray
+    is_float: bool
+
+    def __init__(self, data: numeric_array.NumericArray, is_float: bool):
+        self.data = data
+        self.is_float = is_float
+
+    def _box(self, number) -> Value:
+        return FloatValue(number) if self.is_float else integer(number)
+
+    def boxed(self) -> ListValue:
+        return ListValue.from_iterable(self)
+
+    def elementwise(self, operator: Operator, other: Value, reflected: bool = False) -> Value:
+        """`self <operator> other`, or `other <operator> self` if reflected."""
+        scalar_type = FloatValue if self.is_float else IntegerValue
+        if isinstance(other, NumericListValue) and other.is_float == self.is_float:
+            if len(other) != len(self):
+                raise ScrapEvalError(
+                    f"Cannot apply '{operator}' to lists of length {len(self)} and {len(other)}")
+            operand = other.data
+        elif isinstance(other, scalar_type):
+            operand = other.value
+        else:
+            operand = None
+
+        if operand is not None:
+            left, right = (operand, self.data) if reflected else (self.data, operand)
+            data = numeric_array.elementwise(operator, left, right, self.is_float)
+            if data is not None:
+                return NumericListValue(data, self.is_float)
+
+        # Not representable as an array, do it on the boxed values instead
+        # so the results (and errors) are the same as for the numbers
+        pairs: Iterable[Tuple[Value, Value]]
+        if isinstance(other, NumericListValue):
+            pairs = zip(other, self) if reflected else zip(self, other)
+        elif reflected:
+            pairs = ((other, element) for element in self)
+        else:
+            pairs = ((element, other) for element in self)
+
+        return make_list([arithmetic(operator, left, right) for left, right in pairs])
+
+    def add(self, other) -> Value:
+        return self.elementwise(Operator.ADD, other)
+
+    def subtract(self, other) -> Value:
+        return self.elementwise(Operator.SUBTRACT, other)
+
+    def multiply(self, other) -> Value:
+        return self.elementwise(Operator.MULTIPLY, other)
+
+    def divide(self, other) -> Value:
+        return self.elementwise(Operator.DIVIDE, other)
+
+    def sum(self) -> Value:
+        return self._box(numeric_array.total(self.data, self.is_float))
+
+    def sort(self) -> NumericListValue:
+        return NumericListValue(numeric_array.sort(self.data), self.is_float)
+
+    def reverse(self) -> NumericListValue:
+        return NumericListValue(numeric_array.reverse(self.data), self.is_float)
+
+    def select(self, mask: Sequence[bool]) -> NumericListValue:
+        return NumericListValue(numeric_array.select(self.data, mask), self.is_float)
+
+    def compare(self, operator: Operator, other: Value, reflected: bool = False) -> Sequence[bool]:
+        """A mask of `self <operator> other`, or `other <operator> self` if reflected."""
+        scalar_type = FloatValue if self.is_float else IntegerValue
+        if isinstance(other, NumericListValue) and other.is_float == self.is_float:
+            operand = other.data
+        elif isinstance(other, scalar_type):
+            operand = other.value
+        else:
+            return compare_boxed(operator, self, other, reflected)
+
+        left, right = (operand, self.data) if reflected else (self.data, operand)
+        return numeric_array.compare(operator, left, right)
+
+    def append(self, other) -> ListValue:
+        return self.boxed().append(other)
+
+    def concatenate(self, other) -> SequenceValue:
+        if isinstance(other, NumericListValue) and other.is_float == self.is_float:
+            return NumericListValue(
+                numeric_array.concatenate(self.data, other.data), self.is_float)
+
+        return self.boxed().concatenate(other)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index: int) -> Value:
+        return self._box(numeric_array.item(self.data, index))
+
+    def __iter__(self) -> Iterator[Value]:
+        return map(self._box, numeric_array.to_list(self.data))
+
+    def __eq__(self, other):
+        if isinstance(other, NumericListValue):
+            return self.is_float == other.is_float \
+                and numeric_array.to_list(self.data) == numeric_array.to_list(other.data)
+
+        if not isinstance(other, LIST_TYPES):
+            return NotImplemented
+
+        return _equal_elements(self, other)
+
+    def __hash__(self):
+        return hash(tuple(self))
 
     def __str__(self):
-        return self.value
+        return f"[{', '.join(str(element) for element in self)}]"
+
+    def __repr__(self):
+        return f"NumericListValue({numeric_array.to_list(self.data)!r})"
+
+
+def arithmetic(operator: Operator, left: Value, right: Value) -> Value:
+    match operator:
+        case Operator.ADD if isinstance(left, Addable):
+            return left.add(right)
+        case Operator.SUBTRACT if isinstance(left, Subtractable):
+            return left.subtract(right)
+        case Operator.MULTIPLY if isinstance(left, Multipliable):
+            return left.multiply(right)
+        case Operator.DIVIDE if isinstance(left, Dividable):
+            return left.divide(right)
+
+    raise ScrapTypeError(f"Operator {operator.value} not valid on <{type(left)}> objects")
+
+
+# Arithmetic on operands that are known to be integers, or known to be
+# floats, without checking their types again (see type_inference)
+UNCHECKED_INTEGER_OPERATIONS: Dict[Operator, Callable[[Any, Any], Value]] = {
+    Operator.ADD: lambda left, right: integer(left.value + right.value),
+    Operator.SUBTRACT: lambda left, right: integer(left.value - right.value),
+    Operator.MULTIPLY: lambda left, right: integer(left.value * right.value),
+    Operator.DIVIDE: lambda left, right: integer(int(left.value / right.value)),
+}
+
+UNCHECKED_FLOAT_OPERATIONS: Dict[Operator, Callable[[Any, Any], Value]] = {
+    Operator.ADD: lambda left, right: FloatValue(left.value + right.value),
+    Operator.SUBTRACT: lambda left, right: FloatValue(left.value - right.value),
+    Operator.MULTIPLY: lambda left, right: FloatValue(left.value * right.value),
+    Operator.DIVIDE: lambda left, right: FloatValue(left.value / right.value),
+}
+
+
+def make_list(values: Iterable[Value]) -> SequenceValue:
+    """
+    Creates a list from the values, as a NumericListValue if they are all
+    integers or all floats and a ListValue otherwise.
+    """
+    values = values if isinstance(values, list) else list(values)
+    if not values:
+        return ListValue.from_iterable(values)
+
+    first = values[0]
+    if isinstance(first, (IntegerValue, FloatValue)):
+        kind = type(first)
+        numbers = [value.value for value in values if type(value) is kind]
+        if len(numbers) == len(values):
+            data = numeric_array.pack(numbers, is_float=kind is FloatValue)
+            if data is not None:
+                return NumericListValue(data, is_float=kind is FloatValue)
+
+    if type(first) is RecordValue:
+        shape = first.shape
+        rows = [value for value in values if type(value) is RecordValue and value.shape is shape]
+        if len(rows) == len(values):
+            return RecordListValue.from_rows(shape, rows)
+
+    return ListValue.from_iterable(values)
+
+
+def compare_elementwise(operator: Operator, left: Value, right: Value,
+                        reflected: bool = False) -> Optional[Sequence[bool]]:
+    """
+    Compares a list (left) with a value or another list of the same length
+    elementwise, giving a mask for `select`. Returns None if left isn't a
+    list. Numeric lists compare on their arrays.
+    """
+    if isinstance(left, NumericListValue):
+        return left.compare(operator, right, reflected)
+
+    if not isinstance(left, SEQUENCE_TYPES):
+        return None
+
+    return compare_boxed(operator, left, right, reflected)
+
+
+def compare_boxed(operator: Operator, left: SequenceValue, right: Value,
+                  reflected: bool = False) -> List[bool]:
+    """Like compare_elementwise, one boxed element at a time."""
+    pairs: Iterable[Tuple[Value, Value]]
+    if isinstance(right, SEQUENCE_TYPES):
+        pairs = zip(right, left) if reflected else zip(left, right)
+    elif reflected:
+        pairs = ((right, element) for element in left)
+    else:
+        pairs = ((element, right) for element in left)
+
+    return [comparison(operator, a, b) for a, b in pairs]
+
+
+def comparison(operator: Operator, left: Value, right: Value) -> bool:
+    match operator:
+        case Operator.EQUAL:
+            return left == right
+        case Operator.LESS_THAN if isinstance(left, Comparable):
+            return left.less_than(right)
+        case Operator.GREATER_THAN if isinstance(right, Comparable):
+            # `a > b` is the same as `b < a`
+            return right.less_than(left)
+        case Operator.GREATER_THAN:
+            raise ScrapTypeError(f"Operator > not valid on <{type(right)}> objects")
+
+    raise ScrapTypeError(f"Operator {operator.value} not valid on <{type(left)}> objects")
+
+
+def _equal_elements(left: Iterable[Value], right: Iterable[Value]) -> bool:
+    sentinel = object()
+    for a, b in zip_longest(left, right, fillvalue=sentinel):
+        if a is sentinel or b is sentinel or a != b:
+            return False
+
+    return True
+
+
+class StreamValue(Value, Appendable, Concatenatable):
+    """
+    A lazy list, e.g. the result of `list/range` or `list/map`.
+
+    A stream is a source of elements and a tuple of map and filter stages.
+    Mapping or filtering a stream only adds a stage, and iterating it runs
+    all stages on one element at a time in a single loop, so a chain like
+    range -> map -> filter -> fold makes one pass and never builds an
+    intermediate list. The elements are only stored when the stream has
+    to be materialised as a list, e.g. when it is printed. Until then,
+    iterating a stream twice computes the elements twice.
+    """
+    __slots__ = ("source", "stages", "_materialized")
+
+    source: Callable[[], Iterable[Value]]
+    stages: Tuple[Tuple[StreamStage, Callable[[Value], Any]], ...]
+    _materialized: Optional[SequenceValue]
+
+    def __init__(self, source: Callable[[], Iterable[Value]],
+                 stages: Tuple[Tuple[StreamStage, Callable[[Value], Any]], ...] = ()):
+        self.source = source
+        self.stages = stages
+        self._materialized = None
+
+    def _with_stage(self, stage: StreamStage, function: Callable[[Value], Any]) -> StreamValue:
+        if self._materialized is not None:
+            # No need to compute the earlier stages again
+            materialized = self._materialized
+            return StreamValue(lambda: materialized, ((stage, function),))
 
+        return StreamValue(self.source, self.stages + ((stage, function),))
 
-@dataclass
+    def map(self, function: Callable[[Value], Value]) -> StreamValue:
+        return self._with_stage(StreamStage.MAP, function)
+
+    def filter(self, predicate: Callable[[Value], bool]) -> StreamValue:
+        return self._with_stage(StreamStage.FILTER, predicate)
+
+    def __iter__(self) -> Iterator[Value]:
+        if self._materialized is not None:
+            return iter(self._materialized)
+
+        return self._run()
+
+    def _run(self) -> Iterator[Value]:
+        stages = self.stages
+        if not stages:
+            yield from self.source()
+            return
+
+        for value in self.source():
+            for stage, function in stages:
+                if stage == StreamStage.MAP:
+                    value = function(value)
+                elif not function(value):
+                    break
+            else:
+                yield value
+
+    def materialize(self) -> SequenceValue:
+        if self._materialized is None:
+            self._materialized = make_list(self._run())
+
+        return self._materialized
+
+    def append(self, other) -> Value:
+        return self.materialize().append(other)
+
+    def concatenate(self, other) -> StreamValue:
+        if not isinstance(other, LIST_TYPES):
+            raise ScrapTypeError(
+                f"Cannot concatenate {type(self)} and {type(other)}")
+
+        return StreamValue(lambda: chain(self, other))
+
+    def __eq__(self, other):
+        if not isinstance(other, LIST_TYPES):
+            return NotImplemented
+
+        return _equal_elements(self, other)
+
+    def __str__(self):
+        return str(self.materialize())
+
+    def __repr__(self):
+        return f"StreamValue({self.materialize()!r})"
+
+
+class Shape():
+    """
+    The ordered field layout shared by records, e.g. `(a, b)`.
+
+    Shapes are interned: they are only created through `EMPTY_SHAPE` and
+    `with_field`, which caches the transition to the next shape. Records
+    built with the same field names in the same order therefore share the
+    very same Shape object, so an identity check is enough to know that a
+    field lives in a given slot.
+    """
+    __slots__ = ("fields", "_slots", "_transitions")
+
+    fields: Tuple[str, ...]
+    _slots: Dict[str, int]
+    _transitions: Dict[str, Shape]
+
+    def __init__(self, fields: Tuple[str, ...]):
+        self.fields = fields
+        self._slots = {name: index for index, name in enumerate(fields)}
+        self._transitions = {}
+
+    def with_field(self, name: str) -> Shape:
+        """Returns the shape with `name` added, or self if already present."""
+        if name in self._slots:
+            return self
+
+        shape = self._transitions.get(name)
+        if shape is None:
+            shape = Shape(self.fields + (name,))
+            self._transitions[name] = shape
+
+        return shape
+
+    def slot_of(self, name: str) -> Optional[int]:
+        return self._slots.get(name)
+
+    def __repr__(self):
+        return f"Shape({', '.join(self.fields)})"
+
+
+EMPTY_SHAPE = Shape(())
+
+
+@dataclass(frozen=True, slots=True)
+class RecordValue(Value):
+    shape: Shape
+    slots: List[Value]
+
+    def get(self, name: str) -> Value:
+        slot = self.shape.slot_of(name)
+        if slot is None:
+            raise ScrapEvalError(f"Record has no field '{name}'")
+
+        return self.slots[slot]
+
+    def __eq__(self, other):
+        if not isinstance(other, RecordValue):
+            return NotImplemented
+
+        if self.shape is other.shape:
+            return self.slots == other.slots
+
+        # Same fields in a different order are still the same record
+        return dict(zip(self.shape.fields, self.slots)) \
+            == dict(zip(other.shape.fields, other.slots))
+
+    def __hash__(self):
+        # Independent of the order of the fields, like equality
+        return hash(frozenset(zip(self.shape.fields, self.slots)))
+
+    def __str__(self):
+        fields = ", ".join(
+            f"{name} = {value}" for name, value in zip(self.shape.fields, self.slots))
+        return f"{{ {fields} }}"
+
+
+class RecordListValue(Value, Appendable, Concatenatable):
+    """
+    A list of records that all have the same shape, stored column by
+    column: one list per field, e.g. `[{ a = 1, b = "x" }, { a = 2, b = "y" }]`
+    is stored as the columns `a = [1, 2]` and `b = ["x", "y"]`. Lists are
+    stored like this automatically when they are created, see `make_list`.
+
+    Columns are lists themselves, so a column of numbers is an unboxed
+    NumericListValue. The rows are only built as RecordValues when they
+    are accessed, and reading a field of every row (`list/map (r -> r.a)`)
+    just returns its column.
+    """
+    __slots__ = ("shape", "columns", "length")
+
+    shape: Shape
+    columns: Tuple[SequenceValue, ...]
+    length: int
+
+    def __init__(self, shape: Shape, columns: Tuple[SequenceValue, ...], length: int):
+        self.shape = shape
+        self.columns = columns
+        self.length = length
+
+    @staticmethod
+    def from_rows(shape: Shape, rows: List[RecordValue]) -> RecordListValue:
+        columns = tuple(make_list([row.slots[slot] for row in rows])
+                        for slot in range(len(shape.fields)))
+        return RecordListValue(shape, columns, len(rows))
+
+    def column(self, name: str) -> Optional[SequenceValue]:
+        slot = self.shape.slot_of(name)
+        return self.columns[slot] if slot is not None else None
+
+    def boxed(self) -> ListValue:
+        return ListValue.from_iterable(self)
+
+    def select(self, mask: Sequence[bool]) -> RecordListValue:
+        # Every column needs the mask, so make sure it can be read repeatedly
+        mask = mask if isinstance(mask, list) else list(mask)
+        return RecordListValue(self.shape, tuple(column.select(mask) for column in self.columns),
+                               sum(1 for keep in mask if keep))
+
+    def append(self, other) -> SequenceValue:
+        if isinstance(other, RecordValue) and other.shape is self.shape:
+            return RecordListValue(
+                self.shape,
+                tuple(column.append(value) for column, value in zip(self.columns, other.slots)),
+                self.length + 1)
+
+        return self.boxed().append(other)
+
+    def concatenate(self, other) -> SequenceValue:
+        if isinstance(other, RecordListValue) and other.shape is self.shape:
+            return RecordListValue(
+                self.shape,
+                tuple(left.concatenate(right) for left, right in zip(self.columns, other.columns)),
+                self.length + other.length)
+
+        return self.boxed().concatenate(other)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> Value:
+        if not -self.length <= index < self.length:
+            raise IndexError("list index out of range")
+
+        return RecordValue(shape=self.shape, slots=[column[index] for column in self.columns])
+
+    def __iter__(self) -> Iterator[Value]:
+        shape = self.shape
+        if not self.columns:
+            return (RecordValue(shape=shape, slots=[]) for _ in range(self.length))
+
+        return (RecordValue(shape=shape, slots=list(slots)) for slots in zip(*self.columns))
+
+    def __eq__(self, other):
+        if isinstance(other, RecordListValue) and other.shape is self.shape:
+            return self.length == other.length and self.columns == other.columns
+
+        if not isinstance(other, LIST_TYPES):
+            return NotImplemented
+
+        return _equal_elements(self, other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __str__(self):
+        return f"[{', '.join(str(element) for element in self)}]"
+
+    def __repr__(self):
+        return f"RecordListValue({self.shape!r}, {self.columns!r})"
+
+
+# Lists that hold their elements (and can be indexed), and all lists
+SEQUENCE_TYPES = (ListValue, NumericListValue, RecordListValue)
+SequenceValue = Union[ListValue, NumericListValue, RecordListValue]
+LIST_TYPES = SEQUENCE_TYPES + (StreamValue,)
+
+
+@dataclass(frozen=True, slots=True)
 class VariantValue(Value):
     tag: str
     payload: Value
 
+    def __str__(self):
+        if isinstance(self.payload, HoleValue):
+            return f"#{self.tag}"
+
+        return f"#{self.tag} {self.payload}"
+
+
+class VariantType(Value):
+    """
+    A type from a type definition, e.g. `person : #cowboy | #ron int`.
+
+    Every variant is numbered by its position in the definition. Values of
+    the type carry that number instead of their tag name, so a pattern
+    match can look up the clauses for a variant by indexing a list (see
+    `evaluator.variant_clauses`). Variants without a payload are created
+    once, every `person::cowboy` is the same object.
+    """
+    __slots__ = ("name", "tags", "takes_payload", "_indices", "_nullary")
+
+    name: str
+    tags: Tuple[str, ...]
+    takes_payload: Tuple[bool, ...]
+    _indices: Dict[str, int]
+    _nullary: Tuple[Optional[TaggedVariantValue], ...]
+
+    def __init__(self, name: str, variants: Sequence[Tuple[str, bool]]):
+        self.name = name
+        self.tags = tuple(tag for tag, _ in variants)
+        self.takes_payload = tuple(takes_payload for _, takes_payload in variants)
+        self._indices = {tag: index for index, tag in enumerate(self.tags)}
+        if len(self._indices) != len(self.tags):
+            raise ScrapEvalError(f"Type {name} defines the same variant twice")
+
+        self._nullary = tuple(
+            None if takes_payload else TaggedVariantValue(self, index, HOLE)
+            for index, takes_payload in enumerate(self.takes_payload))
+
+    def index(self, tag: str) -> int:
+        try:
+            return self._indices[tag]
+        except KeyError:
+            raise ScrapEvalError(f"Type {self.name} has no variant #{tag}")
+
+    def construct(self, index: int, arguments: Sequence[Value]) -> TaggedVariantValue:
+        expected = 1 if self.takes_payload[index] else 0
+        if len(arguments) != expected:
+            raise ScrapEvalError(
+                f"{self.name}::{self.tags[index]} takes {expected} argument(s), got {len(arguments)}")
+
+        nullary = self._nullary[index]
+        if nullary is not None:
+            return nullary
+
+        return TaggedVariantValue(self, index, arguments[0])
+
+    def __str__(self):
+        return f"<type {self.name}>"
+
+    def __repr__(self):
+        return f"VariantType({self.name}, {self.tags})"
+
+
+class TaggedVariantValue(Value):
+    """A variant of a VariantType, e.g. `person::ron 3`, tagged by its index."""
+    __slots__ = ("variant_type", "index", "payload")
+
+    variant_type: VariantType
+    index: int
+    payload: Value
+
+    def __init__(self, variant_type: VariantType, index: int, payload: Value):
+        self.variant_type = variant_type
+        self.index = index
+        self.payload = payload
+
+    @property
+    def tag(self) -> str:
+        return self.variant_type.tags[self.index]
+
+    def __eq__(self, other):
+        if not isinstance(other, TaggedVariantValue):
+            return NotImplemented
+
+        return self.variant_type is other.variant_type and self.index == other.index \
+            and self.payload == other.payload
+
+    def __str__(self):
+        if isinstance(self.payload, HoleValue):
+            return f"#{self.tag}"
+
+        return f"#{self.tag} {self.payload}"
+
+    def __repr__(self):
+        return f"TaggedVariantValue({self.variant_type.name}::{self.tag}, {self.payload!r})"
+
 
-@dataclass
-@dataclass
 class Closure(Value):
+    """
+    A function together with the scope it was created in.
+
+    A closure that a definition binds into the scope it closes over, like
+    a top-level (possibly recursive) function, would make a reference
+    cycle: scope -> closure -> scope. So would a function returned by
+    another one and bound at the top level, like `k = make 3`, through
+    the scope of the variables it captured, whose parent is the global
+    scope (see evaluator.capture). Only the cyclic garbage collector can
+    free those, so such closures hold on to the scope through a weak
+    reference instead, see `hold_scope_weakly`.
+    """
+    __slots__ = ("body", "_scope", "_scope_ref", "_captured")
+
     body: Expression
-    scope: "Scope"
+    _scope: Optional[Scope]
+    _scope_ref: Optional[weakref.ref[Scope]]
+    # The variables of a captured scope on top of the weakly held one
+    _captured: Optional[Dict[str, Value]]
+
+    def __init__(self, body: Expression, scope: Scope):
+        self.body = body
+        self._scope = scope
+        self._scope_ref = None
+        self._captured = None
+
+    @property
+    def scope(self) -> Scope:
+        if self._scope is not None:
+            return self._scope
+
+        assert self._scope_ref is not None
+        scope = self._scope_ref()
+        if scope is None:
+            raise ScrapEvalError("Function called after the program defining it has ended")
+
+        if self._captured is None:
+            return scope
+
+        # Scope imports this module, so the class is taken from the instance
+        captured = type(scope)(parent=scope)
+        captured.variables = self._captured
+        return captured
+
+    def hold_scope_weakly(self, scope: Scope) -> None:
+        """
+        Only keep a weak reference to `scope`, which holds this closure, if
+        it closes over it directly or through the scope of its captured
+        variables.
+        """
+        if self._scope is scope:
+            self._scope_ref = weakref.ref(scope)
+            self._scope = None
+        elif self._scope is not None and self._scope.parent is scope:
+            self._captured = self._scope.variables
+            self._scope_ref = weakref.ref(scope)
+            self._scope = None
+
+    def hold_scope_strongly(self) -> None:
+        if self._scope is None:
+            self._scope = self.scope
+            self._scope_ref = None
+            self._captured = None
+
+    def __eq__(self, other):
+        if not isinstance(other, Closure):
+            return NotImplemented
+
+        # A captured scope is rebuilt on every access, compare what it's made of
+        scope, other_scope = self.scope, other.scope
+        return self.body == other.body and scope.parent is other_scope.parent \
+            and scope.variables is other_scope.variables
+
+    def __repr__(self):
+        return f"Closure(body={self.body!r})"
+
+    def __str__(self):
+        return "<function>"
+
+
+@dataclass(frozen=True, slots=True)
+class ComposedFunction(Value):
+    """
+    A pipeline of functions built with `>>`, e.g. `f >> g >> h`.
+
+    The stages of nested compositions are flattened into one tuple, so
+    applying it calls each stage in turn instead of going through one
+    intermediate closure per `>>`.
+    """
+    stages: Tuple[Value, ...]
 
     def __str__(self):
         return "<function>"
 
 
-# TRUE = VariantValue(tag="true", payload=HoleValue())
-# FALSE = VariantValue(tag="false", payload=HoleValue())
+@dataclass(frozen=True, slots=True)
+class BuiltinFunction(Value):
+    """
+    A function implemented natively in Python, e.g. `text/repeat`.
+
+    Builtins are curried like any other function: applying one to fewer
+    arguments than its arity gives a new builtin holding on to them.
+    """
+    name: str
+    arity: int
+    function: Callable[..., Value]
+    arguments: Tuple[Value, ...] = ()
+
+    def apply(self, argument: Value) -> Value:
+        arguments = self.arguments + (argument,)
+        if len(arguments) == self.arity:
+            return self.function(*arguments)
+
+        return BuiltinFunction(
+            name=self.name, arity=self.arity, function=self.function, arguments=arguments)
+
+    def __str__(self):
+        return f"<builtin {self.name}>"
+
+
+# Short texts are interned, so literals with the same text share one
+# value (every evaluation of one literal shares its value anyway, it's
+# cached on the node). Only literals go through here, but a process can
+# compile any number of programs, so the table only holds texts that are
+# still in use somewhere and doesn't keep them alive.
+INTERNED_TEXT_LENGTH = 64
+
+_texts: weakref.WeakValueDictionary[str, TextValue] = weakref.WeakValueDictionary()
+
+
+def text(value: str) -> TextValue:
+    """The TextValue for a text literal, shared if the text is short."""
+    if len(value) > INTERNED_TEXT_LENGTH:
+        return TextValue(value)
+
+    interned = _texts.get(value)
+    if interned is None:
+        interned = TextValue(sys.intern(value))
+        _texts[value] = interned
+
+    return interned
+
+
+_atoms: Dict[str, VariantValue] = {}
+
+
+def atom(tag: str) -> VariantValue:
+    """The variant `#tag` without a payload, there is only ever one of each."""
+    interned = _atoms.get(tag)
+    if interned is None:
+        interned = _atoms[tag] = VariantValue(tag=sys.intern(tag), payload=HOLE)
+
+    return interned
+
+
+TRUE = atom("true")
+FALSE = atom("false")
+
+
+def to_boolean(value: bool) -> VariantValue:
+    return TRUE if value else FALSE